@@ -0,0 +1,241 @@
+"""
+Measures latency and throughput of the weather endpoints against a fake upstream.
+
+Every scenario runs the full Django request cycle in-process, with the districts API
+and Open-Meteo served by `benchmarks.upstream.FakeUpstream`. Cold scenarios clear
+every cache before each request, warm scenarios prime them once.
+
+Run with:
+    python -m benchmarks.endpoints [--requests 50] [--concurrency 10] [--latency 0.05]
+        [--jitter 0.02] [--error-rate 0] [--output DIR] [--compare BASELINE.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.test import AsyncClient  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks.upstream import FakeUpstream  # noqa: E402
+from weather.cache import forecast_cache  # noqa: E402
+from weather.http import http_clients  # noqa: E402
+from weather.registry import reset_registry  # noqa: E402
+from weather.store import forecast_store  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# Reported in the comparison, lower is better for all but throughput
+COMPARED_METRICS = ("p50_ms", "p95_ms", "throughput_rps")
+
+
+def configure() -> None:
+    # The benchmark measures the request path, not the background machinery
+    settings.ALLOWED_HOSTS = ["*"]
+    settings.WEATHER_RANKING_BACKGROUND_REFRESH = False
+    settings.WEATHER_LOOP_MONITOR = False
+    settings.WEATHER_WARMUP = False
+    settings.WEATHER_ARCHIVE = False
+    settings.WEATHER_FORECAST_CACHE_ALIAS = "default"
+
+
+def reset_caches() -> None:
+    cache.clear()
+    forecast_cache.clear()
+    forecast_store.clear()
+    reset_registry()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def summarize(latencies, elapsed, errors, upstream) -> dict:
+    ordered = sorted(latencies)
+    percentiles = (
+        statistics.quantiles(ordered, n=100, method="inclusive")
+        if len(ordered) > 1
+        else ordered * 99
+    )
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "upstream_requests": dict(upstream),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 2),
+    }
+
+
+class EndpointBenchmark:
+    def __init__(self, upstream: FakeUpstream, requests: int, concurrency: int):
+        self.upstream = upstream
+        self.requests = requests
+        self.concurrency = concurrency
+        self.client = AsyncClient()
+        self.rng = random.Random(0)
+
+    def top_districts(self):
+        return self.client.get(reverse("top-districts"))
+
+    def travel_decision(self):
+        current, dest = self.rng.sample(self.upstream.districts, 2)
+        travel_date = date.today() + timedelta(days=self.rng.randint(0, 6))
+        return self.client.post(
+            reverse("travel-decision"),
+            {
+                "currentDistrictId": int(current["id"]),
+                "destDistrictId": int(dest["id"]),
+                "travelDate": travel_date.isoformat(),
+            },
+            content_type="application/json",
+        )
+
+    async def _timed(self, request) -> tuple:
+        started = time.perf_counter()
+        response = await request()
+        return time.perf_counter() - started, response.status_code >= 400
+
+    async def cold(self, request) -> dict:
+        """Every request starts with empty caches, so they run one at a time."""
+        self.upstream.reset()
+        latencies, errors, started = [], 0, time.perf_counter()
+        for _ in range(self.requests):
+            reset_caches()
+            latency, failed = await self._timed(request)
+            latencies.append(latency)
+            errors += failed
+        elapsed = time.perf_counter() - started
+        return summarize(latencies, elapsed, errors, self.upstream.requests)
+
+    async def warm(self, request) -> dict:
+        """Primes the caches with the same requests, then replays them concurrently."""
+        reset_caches()
+        self.rng.seed(0)
+        for _ in range(self.requests):
+            await request()
+        self.rng.seed(0)
+        self.upstream.reset()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited():
+            async with semaphore:
+                return await self._timed(request)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(limited() for _ in range(self.requests)))
+        elapsed = time.perf_counter() - started
+        return summarize(
+            [latency for latency, _ in results],
+            elapsed,
+            sum(failed for _, failed in results),
+            self.upstream.requests,
+        )
+
+    async def run(self) -> dict:
+        scenarios = {}
+        for name, request in (
+            ("top_districts", self.top_districts),
+            ("travel_decision", self.travel_decision),
+        ):
+            scenarios[f"{name}_cold"] = await self.cold(request)
+            scenarios[f"{name}_warm"] = await self.warm(request)
+        await http_clients.aclose()
+        return scenarios
+
+
+def compare(results: dict, baseline: dict) -> None:
+    sys.stdout.write(
+        f"\ncompared with {baseline['commit']} ({baseline['timestamp']})\n"
+    )
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            if previous[metric]:
+                change = (current[metric] - previous[metric]) / previous[metric] * 100
+                changes.append(f"{metric} {change:+6.1f}%")
+        sys.stdout.write(f"{name:>24}: {'  '.join(changes)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, help="A previous results file.")
+    args = parser.parse_args()
+
+    configure()
+    upstream = FakeUpstream(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    http_clients.use_transport(upstream)
+
+    benchmark = EndpointBenchmark(upstream, args.requests, args.concurrency)
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "scenarios": asyncio.run(benchmark.run()),
+    }
+
+    for name, summary in results["scenarios"].items():
+        sys.stdout.write(
+            f"{name:>24}: p50 {summary['p50_ms']:9.2f} ms  p95 {summary['p95_ms']:9.2f} ms"
+            f"  {summary['throughput_rps']:8.1f} req/s  errors {summary['errors']}"
+            f"  upstream {sum(summary['upstream_requests'].values())}\n"
+        )
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    path = args.output / f"endpoints-{results['commit']}-{int(time.time())}.json"
+    path.write_text(json.dumps(results, indent=2))
+    sys.stdout.write(f"\nresults saved to {path}\n")
+
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
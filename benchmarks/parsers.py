@@ -0,0 +1,114 @@
+"""
+Compares the numpy and pandas forecast parsing engines on real-sized payloads.
+
+Run with:
+    python -m benchmarks.parsers [--districts 64] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from weather.parsers import (  # noqa: E402
+    parse_csv_temperatures,
+    parse_json_temperatures,
+)
+from weather.services import WeatherForecast  # noqa: E402
+
+# Open-Meteo returns 8 days of hourly rows for the 7 day window (start and end inclusive)
+HOURS = 24 * 8
+
+
+def make_csv(rng: random.Random) -> str:
+    rows = [
+        "latitude,longitude,elevation,utc_offset_seconds,timezone,timezone_abbreviation",
+        "23.8,90.4,10.0,21600,Asia/Dhaka,+06",
+        "",
+        "time,temperature_2m (°C)",
+    ]
+    for hour in range(HOURS):
+        day, hour_of_day = divmod(hour, 24)
+        rows.append(
+            f"2024-07-{10 + day:02d}T{hour_of_day:02d}:00,{rng.uniform(20, 38):.1f}"
+        )
+    return "\n".join(rows) + "\n"
+
+
+def make_json(rng: random.Random) -> dict:
+    return {
+        "hourly": {
+            "time": [
+                f"2024-07-{10 + hour // 24:02d}T{hour % 24:02d}:00"
+                for hour in range(HOURS)
+            ],
+            "temperature_2m": [round(rng.uniform(20, 38), 1) for _ in range(HOURS)],
+        }
+    }
+
+
+def run_csv(forecasts, payloads, engine):
+    for forecast, csv_data in zip(forecasts, payloads):
+        if engine == "pandas":
+            df = forecast._read_csv(csv_data)
+            forecast._build_result(
+                forecast._get_avg_forcast(forecast._filter_2pm_rows(df))
+            )
+        else:
+            forecast.process_temperatures(parse_csv_temperatures(csv_data))
+
+
+def run_json(forecasts, payloads, engine):
+    for forecast, payload in zip(forecasts, payloads):
+        if engine == "pandas":
+            _data = forecast._get_2pm_rows_from_json(payload)
+            forecast._build_result(forecast._get_avg_forcast(_data))
+        else:
+            forecast.process_temperatures(parse_json_temperatures(payload))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--districts", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    district = {"name": "Benchmark", "lat": 23.81, "long": 90.41}
+    csv_payloads = [make_csv(rng) for _ in range(args.districts)]
+    json_payloads = [make_json(rng) for _ in range(args.districts)]
+
+    sys.stdout.write(
+        f"{args.districts} districts x {HOURS} hourly rows, best of {args.repeat}\n"
+    )
+    for fmt, runner, payloads in (
+        ("csv", run_csv, csv_payloads),
+        ("json", run_json, json_payloads),
+    ):
+        timings = {}
+        for engine in ("pandas", "numpy"):
+            forecasts = [
+                WeatherForecast(district, engine=engine) for _ in range(args.districts)
+            ]
+            timings[engine] = min(
+                timeit.repeat(
+                    lambda: runner(forecasts, payloads, engine),  # noqa: B023
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+        sys.stdout.write(
+            f"{fmt:>4}: pandas {timings['pandas'] * 1000:8.2f} ms"
+            f"  numpy {timings['numpy'] * 1000:8.2f} ms"
+            f"  speedup {timings['pandas'] / timings['numpy']:5.1f}x\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
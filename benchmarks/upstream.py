@@ -0,0 +1,143 @@
+"""
+In-process fake of the districts API and Open-Meteo for benchmarks.
+
+`FakeUpstream` is an `httpx.MockTransport` serving upstream-shaped district JSON and
+forecast CSV/JSON for any number of locations, with configurable latency, jitter
+and error rate, and counting the requests it receives.
+"""
+
+import asyncio
+import json
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+import httpx
+
+from weather.parsers import HOURS_PER_DAY
+from weather.services import DISTRICT_CALL_URL, FORECAST_API_URL
+
+DISTRICT_COUNT = 64
+
+
+def make_districts(count: int = DISTRICT_COUNT, seed: int = 0) -> List[Dict[str, str]]:
+    """Generates districts spread over Bangladesh, shaped like the districts API."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(index),
+            "division_id": str(rng.randint(1, 8)),
+            "name": f"District {index}",
+            "bn_name": f"জেলা {index}",
+            "lat": f"{rng.uniform(20.6, 26.6):.7f}",
+            "long": f"{rng.uniform(88.0, 92.7):.7f}",
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+class FakeUpstream(httpx.MockTransport):
+    def __init__(
+        self,
+        districts: List[Dict[str, str]] = None,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initializes the fake upstream.
+
+        Parameters:
+        districts (list): Districts served by the districts API. Defaults to 64 generated ones.
+        latency (float): Mean response time in seconds.
+        jitter (float): Maximum random deviation from `latency` in seconds.
+        error_rate (float): Share of requests answered with a 500, between 0 and 1.
+        seed (int): Seeds the jitter, errors and temperatures for repeatable runs.
+        """
+        super().__init__(self.handle)
+        self.districts = districts or make_districts(seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = Counter()
+
+    def reset(self) -> None:
+        self.requests.clear()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(0.0, delay))
+
+        url = str(request.url.copy_with(query=None))
+        kind = "districts" if url == DISTRICT_CALL_URL else "forecast"
+        self.requests[kind] += 1
+        if self.rng.random() < self.error_rate:
+            self.requests["errors"] += 1
+            return httpx.Response(500, json={"error": True, "reason": "injected"})
+
+        if kind == "districts":
+            return httpx.Response(200, json={"districts": self.districts})
+        if url == FORECAST_API_URL:
+            return self._forecast(request.url.params)
+        return httpx.Response(404)
+
+    def _forecast(self, params) -> httpx.Response:
+        latitudes = params["latitude"].split(",")
+        start = date.fromisoformat(params["start_date"])
+        end = date.fromisoformat(params["end_date"])
+        hours = ((end - start).days + 1) * HOURS_PER_DAY
+        times = [
+            (datetime(start.year, start.month, start.day) + timedelta(hours=hour))
+            for hour in range(hours)
+        ]
+        series = [self._temperatures(float(lat), times) for lat in latitudes]
+
+        if params.get("format") == "csv":
+            return httpx.Response(200, text=self._csv(latitudes[0], times, series[0]))
+
+        locations = [
+            {
+                "latitude": float(lat),
+                "hourly": {
+                    "time": [time.strftime("%Y-%m-%dT%H:%M") for time in times],
+                    "temperature_2m": temperatures,
+                },
+            }
+            for lat, temperatures in zip(latitudes, series)
+        ]
+        # Open-Meteo answers a single location with a bare object
+        payload = locations[0] if len(locations) == 1 else locations
+        return httpx.Response(
+            200,
+            content=json.dumps(payload).encode(),
+            headers={"content-type": "application/json"},
+        )
+
+    def _temperatures(self, lat: float, times) -> List[float]:
+        # Cooler up north, warmest in the afternoon, plus some noise
+        return [
+            round(
+                34
+                - (lat - 20.6)
+                + 4 * (1 - abs(time.hour - 14) / 12)
+                + self.rng.uniform(-1.5, 1.5),
+                1,
+            )
+            for time in times
+        ]
+
+    def _csv(self, lat: str, times, temperatures) -> str:
+        rows = [
+            "latitude,longitude,elevation,utc_offset_seconds,timezone,timezone_abbreviation",
+            f"{lat},90.4,10.0,21600,Asia/Dhaka,+06",
+            "",
+            "time,temperature_2m (°C)",
+        ]
+        rows.extend(
+            f"{time.strftime('%Y-%m-%dT%H:%M')},{temperature}"
+            for time, temperature in zip(times, temperatures)
+        )
+        return "\n".join(rows) + "\n"
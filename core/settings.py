@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 from core.openapi_metadata import SETTINGS_METADATA as OPENAPI_SETTINGS
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "weather.middleware.MetricsMiddleware",
+    "weather.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -154,5 +157,126 @@ CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "unique-snowflake",
-    }
+    },
+    # Shared by every worker on the host, so a forecast is only fetched once. One
+    # entry per district and day: 64 districts × 8 days per forecast window, for
+    # WEATHER_FORECAST_STORE_WINDOWS windows plus travel dates, with headroom so the
+    # backend doesn't cull entries that are still in use.
+    "forecasts": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": Path(tempfile.gettempdir()) / "weather-forecasts",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
 }
+
+
+# weather app settings
+
+# Number of districts sent per Open-Meteo request on the top districts endpoint.
+# Set to None to fall back to one request per district.
+WEATHER_FORECAST_BATCH_SIZE = 50
+
+# Maximum number of forecast requests in flight at once, and the timeout in seconds
+# for a single request once it has started. Keep the timeout above
+# WEATHER_HTTP_TIMEOUT × (WEATHER_UPSTREAM_RETRIES + 1) plus the retry backoff, or
+# the retries of a slow request never get to run.
+WEATHER_FETCH_CONCURRENCY = 8
+WEATHER_FETCH_TIMEOUT = 35
+
+# Recompute the top districts ranking from a background task every
+# WEATHER_RANKING_REFRESH_INTERVAL seconds so requests only read the cached payload.
+WEATHER_RANKING_BACKGROUND_REFRESH = True
+WEATHER_RANKING_REFRESH_INTERVAL = 60 * 30
+
+# Open-Meteo refreshes its forecast models roughly every hour, cached forecasts expire
+# on the next WEATHER_FORECAST_UPDATE_INTERVAL boundary.
+WEATHER_FORECAST_UPDATE_INTERVAL = 60 * 60
+
+# Shared upstream HTTP connection pool. HTTP/2 requires installing `httpx[http2]`.
+WEATHER_HTTP_TIMEOUT = 10
+WEATHER_HTTP_MAX_CONNECTIONS = 100
+WEATHER_HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+WEATHER_HTTP_KEEPALIVE_EXPIRY = 30
+WEATHER_HTTP2 = False
+
+# Forecast parsing engine: "numpy" picks hours by index arithmetic, "pandas" parses
+# timestamps into DataFrames.
+WEATHER_PARSER_ENGINE = "numpy"
+
+# Pool used to parse forecasts off the event loop: "thread", "process" or None to
+# parse inline. WEATHER_PARSE_WORKERS of None lets the pool pick from the CPU count.
+WEATHER_PARSE_EXECUTOR = "thread"
+WEATHER_PARSE_WORKERS = None
+
+# Probe the event loop every WEATHER_LOOP_MONITOR_INTERVAL seconds and log a warning
+# when it was blocked for longer than WEATHER_LOOP_BLOCKING_WARNING seconds.
+WEATHER_LOOP_MONITOR = True
+WEATHER_LOOP_MONITOR_INTERVAL = 0.1
+WEATHER_LOOP_BLOCKING_WARNING = 0.1
+
+# Maximum number of trips accepted by one bulk travel-decision request
+WEATHER_TRAVEL_BULK_MAX_ITEMS = 500
+
+# Seconds an expired district or forecast entry is still served while a background
+# task refreshes it, after that the next request waits for upstream again
+WEATHER_CACHE_MAX_STALENESS = 60 * 60 * 6
+
+# Seconds a stale entry whose background refresh failed is served as is before
+# another refresh is tried, so a failing upstream isn't called on every stale hit
+WEATHER_REVALIDATE_RETRY_BACKOFF = 30
+
+# Forecasts are cached in the shared WEATHER_FORECAST_CACHE_ALIAS backend behind a
+# per-process LRU of at most WEATHER_LOCAL_CACHE_MAX_ENTRIES day series, each kept
+# locally for up to WEATHER_LOCAL_CACHE_TIMEOUT seconds.
+WEATHER_FORECAST_CACHE_ALIAS = "forecasts"
+WEATHER_LOCAL_CACHE_MAX_ENTRIES = 4096
+WEATHER_LOCAL_CACHE_TIMEOUT = 60
+
+# Number of forecast windows (start date and length) whose districts × hours matrix
+# is kept in memory for the ranking and travel endpoints.
+WEATHER_FORECAST_STORE_WINDOWS = 8
+
+# Archive districts and forecasts in the database so a restarted process can serve
+# them straight away, and while upstream is down. Rows are upserted in batches of
+# WEATHER_ARCHIVE_BATCH_SIZE.
+WEATHER_ARCHIVE = True
+WEATHER_ARCHIVE_BATCH_SIZE = 500
+
+# Opt-in warm-up: load the districts and the ranking forecasts when a worker starts,
+# the readiness endpoint answers 503 until it is done. Gives up after
+# WEATHER_WARMUP_TIMEOUT seconds, the next readiness probe retries.
+WEATHER_WARMUP = False
+WEATHER_WARMUP_TIMEOUT = 60
+
+# Opt-in profiling: with WEATHER_PROFILING on, a request sending the
+# X-Weather-Profile header or the `profile` query parameter (equal to
+# WEATHER_PROFILING_TOKEN when set) is profiled with cProfile. The stats and stage
+# timings are written to WEATHER_PROFILING_DIR.
+WEATHER_PROFILING = False
+WEATHER_PROFILING_TOKEN = None
+WEATHER_PROFILING_DIR = Path(tempfile.gettempdir()) / "weather-profiles"
+
+# Open top districts streams are sent the ranking again when it changed, checked
+# every WEATHER_RANKING_STREAM_INTERVAL seconds; idle streams get a keep-alive then.
+WEATHER_RANKING_STREAM_INTERVAL = 15
+
+# Upstream calls are retried WEATHER_UPSTREAM_RETRIES times on connection errors,
+# 429 and 5xx, after a random delay of up to WEATHER_UPSTREAM_RETRY_BACKOFF seconds
+# doubling per retry, capped at WEATHER_UPSTREAM_RETRY_BACKOFF_MAX.
+WEATHER_UPSTREAM_RETRIES = 2
+WEATHER_UPSTREAM_RETRY_BACKOFF = 0.2
+WEATHER_UPSTREAM_RETRY_BACKOFF_MAX = 2
+# After WEATHER_CIRCUIT_BREAKER_THRESHOLD consecutive failures a host isn't called
+# for WEATHER_CIRCUIT_BREAKER_RESET seconds, requests needing it fail fast.
+WEATHER_CIRCUIT_BREAKER_THRESHOLD = 5
+WEATHER_CIRCUIT_BREAKER_RESET = 30
+# Opt-in hedging: send a second request once the first one is slower than the
+# WEATHER_HEDGE_PERCENTILE latency of its host, measured over at least
+# WEATHER_HEDGE_MIN_SAMPLES requests. Costs extra upstream calls.
+WEATHER_HEDGE_REQUESTS = False
+WEATHER_HEDGE_PERCENTILE = 95
+WEATHER_HEDGE_MIN_SAMPLES = 20
+# Rank the districts whose forecast could be fetched when some upstream calls fail.
+# A partial ranking is cached for WEATHER_PARTIAL_RESULTS_CACHE_TIME seconds only.
+WEATHER_PARTIAL_RESULTS = True
+WEATHER_PARTIAL_RESULTS_CACHE_TIME = 60
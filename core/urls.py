@@ -24,6 +24,8 @@ from drf_spectacular.views import (
 )
 from rest_framework.settings import api_settings
 
+from weather.views import MetricsView
+
 V1 = "api/v1"
 
 urlpatterns = [
@@ -48,4 +50,6 @@ urlpatterns = [
         name="swagger-ui",
     ),
     path(f"{V1}/weather/", include("weather.urls")),
+    # Prometheus scrape endpoint
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
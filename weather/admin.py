@@ -1 +1,16 @@
-# Register your models here.
+from django.contrib import admin
+
+from weather.models import District, HourlyForecast
+
+
+@admin.register(District)
+class DistrictAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "lat", "long", "updated_at"]
+    search_fields = ["name", "bn_name"]
+
+
+@admin.register(HourlyForecast)
+class HourlyForecastAdmin(admin.ModelAdmin):
+    list_display = ["lat", "long", "day", "fetched_at"]
+    list_filter = ["day"]
+    exclude = ["temperatures"]
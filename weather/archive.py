@@ -0,0 +1,313 @@
+"""
+Persistent copy of the district list and the fetched forecasts.
+
+The caches are lost on every restart; the archive lets a fresh process serve the
+last known data straight away while it is refreshed from upstream, and keeps
+serving it while upstream is unavailable.
+"""
+
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from weather.cache import (
+    date_range,
+    decode_series,
+    encode_series,
+    forecast_cache,
+    max_staleness,
+    round_coordinates,
+    split_days,
+)
+from weather.models import District, HourlyForecast
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 500
+# A district's forecast window: the district, its first and its last day
+Window = Tuple[Dict, str, str]
+
+# Keeps a strong reference so pending writes aren't garbage collected
+_pending_writes: Set[asyncio.Task] = set()
+
+
+def archive_enabled() -> bool:
+    return getattr(settings, "WEATHER_ARCHIVE", True)
+
+
+def _batch_size() -> int:
+    return getattr(settings, "WEATHER_ARCHIVE_BATCH_SIZE", ARCHIVE_BATCH_SIZE)
+
+
+def save_districts(districts: Sequence[Dict]) -> int:
+    """
+    Inserts or updates the archived districts.
+
+    Parameters:
+    districts (Sequence[dict]): District data as returned by the districts API.
+
+    Returns:
+    int: The number of archived districts.
+    """
+    rows = [
+        District(
+            id=int(district["id"]),
+            division_id=district.get("division_id") or None,
+            name=district["name"],
+            bn_name=district.get("bn_name") or "",
+            lat=float(district["lat"]),
+            long=float(district["long"]),
+        )
+        for district in districts
+    ]
+    District.objects.bulk_create(
+        rows,
+        batch_size=_batch_size(),
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=["division_id", "name", "bn_name", "lat", "long", "updated_at"],
+    )
+    return len(rows)
+
+
+def load_districts() -> List[Dict]:
+    """
+    Reads the archived districts.
+
+    Returns:
+    List[dict]: The districts shaped like the districts API payload.
+    """
+    return [district.to_dict() for district in District.objects.all()]
+
+
+def save_forecasts(windows: Sequence[Window], series: Sequence[List[float]]) -> int:
+    """
+    Inserts or updates the archived day series of many forecast windows, and deletes
+    the days fetched longer than WEATHER_CACHE_MAX_STALENESS ago, which are never
+    served again.
+
+    Parameters:
+    windows (Sequence[Window]): The district and date range of every series.
+    series (Sequence[List[float]]): Hourly temperatures starting at each window's first day.
+
+    Returns:
+    int: The number of archived days.
+    """
+    fetched_at = timezone.now()
+    rows = {}
+    for (district, start_date, end_date), temperatures in zip(windows, series):
+        lat, long = round_coordinates(district)
+        for day, values in split_days(start_date, end_date, temperatures):
+            # Nearby districts share a location, only one row per location and day
+            rows[(lat, long, day)] = HourlyForecast(
+                lat=lat,
+                long=long,
+                day=date.fromisoformat(day),
+                temperatures=encode_series(values),
+                fetched_at=fetched_at,
+            )
+
+    HourlyForecast.objects.bulk_create(
+        rows.values(),
+        batch_size=_batch_size(),
+        update_conflicts=True,
+        unique_fields=["lat", "long", "day"],
+        update_fields=["temperatures", "fetched_at"],
+    )
+    HourlyForecast.objects.filter(
+        fetched_at__lt=fetched_at - timedelta(seconds=max_staleness())
+    ).delete()
+    return len(rows)
+
+
+def load_forecasts(windows: Sequence[Window]) -> List[Optional[List[float]]]:
+    """
+    Reads archived forecasts that are recent enough to be served while stale.
+
+    Parameters:
+    windows (Sequence[Window]): The district and date range to read.
+
+    Returns:
+    List[Optional[List[float]]]: The hourly temperatures of every window, or None
+        when any of its days is missing or older than WEATHER_CACHE_MAX_STALENESS.
+    """
+    if not windows:
+        return []
+
+    first_day = min(start_date for _, start_date, _ in windows)
+    last_day = max(end_date for _, _, end_date in windows)
+    locations = {round_coordinates(district) for district, _, _ in windows}
+    rows = HourlyForecast.objects.filter(
+        day__range=(first_day, last_day),
+        lat__in={lat for lat, _ in locations},
+        fetched_at__gte=timezone.now() - timedelta(seconds=max_staleness()),
+    ).values_list("lat", "long", "day", "temperatures")
+    days = {
+        (lat, long, day.isoformat()): bytes(temperatures)
+        for lat, long, day, temperatures in rows
+    }
+
+    results = []
+    for district, start_date, end_date in windows:
+        lat, long = round_coordinates(district)
+        payloads = [
+            days.get((lat, long, day)) for day in date_range(start_date, end_date)
+        ]
+        results.append(None if None in payloads else decode_series(payloads))
+    return results
+
+
+async def asave_districts(districts: Sequence[Dict]) -> int:
+    if not archive_enabled():
+        return 0
+    return await sync_to_async(save_districts)(districts)
+
+
+async def aload_districts() -> List[Dict]:
+    if not archive_enabled():
+        return []
+    return await sync_to_async(load_quietly)(load_districts, default=[])
+
+
+async def asave_forecasts(
+    windows: Sequence[Window], series: Sequence[List[float]]
+) -> int:
+    if not archive_enabled():
+        return 0
+    return await sync_to_async(save_forecasts)(windows, series)
+
+
+async def aload_forecasts(windows: Sequence[Window]) -> List[Optional[List[float]]]:
+    if not archive_enabled():
+        return [None] * len(windows)
+    return await sync_to_async(load_quietly)(
+        load_forecasts, windows, default=[None] * len(windows)
+    )
+
+
+def load_quietly(load: Callable[..., Any], *args: Any, default: Any) -> Any:
+    """
+    Reads the archive without failing the caller, which can still ask upstream.
+
+    Parameters:
+    load (Callable): `load_districts` or `load_forecasts`.
+    *args: Their arguments.
+    default: Returned when the archive is off or the read failed.
+
+    Returns:
+    Any: What `load` returned, or `default`.
+    """
+    if not archive_enabled():
+        return default
+    try:
+        return load(*args)
+    except DatabaseError:
+        # A missing table or a locked database only costs the fallback
+        logger.exception("Failed to read the archive with %s", load.__name__)
+        return default
+
+
+def save_quietly(save: Callable[..., int], *args: Any) -> int:
+    """
+    Archives data without failing the caller, which already has it from upstream.
+
+    Parameters:
+    save (Callable): `save_districts` or `save_forecasts`.
+    *args: Their arguments.
+
+    Returns:
+    int: The number of archived rows, 0 if the archive is off or the write failed.
+    """
+    if not archive_enabled():
+        return 0
+    try:
+        return save(*args)
+    except Exception:
+        # A missing table or a locked database only costs the copy, not the request
+        logger.exception("Failed to archive with %s", save.__name__)
+        return 0
+
+
+def save_in_background(save: Callable[..., int], *args: Any) -> Optional[asyncio.Task]:
+    """
+    Archives data from a task on the running event loop, so the request doesn't wait
+    for the upsert. Failures are logged, as with `save_quietly`.
+
+    Parameters:
+    save (Callable): `save_districts` or `save_forecasts`.
+    *args: Their arguments.
+
+    Returns:
+    Optional[asyncio.Task]: The write task, or None if the archive is off.
+    """
+    if not archive_enabled():
+        return None
+    task = asyncio.get_running_loop().create_task(
+        sync_to_async(save_quietly)(save, *args), name=f"archive:{save.__name__}"
+    )
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+    return task
+
+
+async def wait() -> None:
+    """Waits for the writes pending on the running event loop."""
+    loop = asyncio.get_running_loop()
+    pending = [task for task in _pending_writes if task.get_loop() is loop]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def warm_cache(days: int = 7) -> Tuple[int, int]:
+    """
+    Loads the archived districts and their forecast from today on into the caches.
+
+    Everything is cached as stale, so it is served right away and refreshed from
+    upstream on first use.
+
+    Parameters:
+    days (int): Number of days after today to load. Defaults to the ranking window.
+
+    Returns:
+    Tuple[int, int]: The number of districts and of district forecasts loaded.
+    """
+    # Imported here as the services import this module for their fallbacks
+    from weather.services import DistrictService
+
+    districts = load_districts()
+    if not districts:
+        return 0, 0
+    DistrictService().cache_districts(districts, timeout=0)
+
+    start_date = date.today()
+    windows = [
+        (
+            district,
+            start_date.isoformat(),
+            (start_date + timedelta(days=days)).isoformat(),
+        )
+        for district in districts
+    ]
+    restored = 0
+    for window, temperatures in zip(windows, load_forecasts(windows)):
+        if temperatures is not None:
+            forecast_cache.set(*window, temperatures, timeout=0)
+            restored += 1
+    return len(districts), restored
+
+
+async def awarm_cache(days: int = 7) -> Tuple[int, int]:
+    if not archive_enabled():
+        return 0, 0
+    try:
+        return await sync_to_async(warm_cache)(days)
+    except Exception:
+        # A missing or broken archive only means a cold start
+        logger.exception("Failed to warm the caches from the archive")
+        return 0, 0
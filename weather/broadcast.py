@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Optional, Set, Tuple
+
+from django.conf import settings
+
+from weather.cache import content_version
+from weather.ranking import TopDistrictRanking
+from weather.renderers import camelize, dumps
+
+logger = logging.getLogger(__name__)
+
+RANKING_STREAM_INTERVAL = 15
+
+# The event id and the JSON encoded ranking
+RankingEvent = Tuple[str, str]
+
+
+class RankingBroadcaster:
+    """
+    Pushes the top districts to every open stream of a worker.
+
+    One task per worker reads the cached ranking every WEATHER_RANKING_STREAM_INTERVAL
+    seconds while streams are open and only hands it to the streams when it changed,
+    so an open stream costs an idle connection instead of a poll.
+    """
+
+    def __init__(self, ranking: TopDistrictRanking = None, interval: float = None):
+        self.ranking = ranking or TopDistrictRanking()
+        self.interval = interval
+        self.latest: Optional[RankingEvent] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_interval(self) -> float:
+        if self.interval is not None:
+            return self.interval
+        return getattr(
+            settings, "WEATHER_RANKING_STREAM_INTERVAL", RANKING_STREAM_INTERVAL
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, ranking) -> bool:
+        """
+        Hands the ranking to every open stream, unless it is the one they already have.
+
+        Parameters:
+        ranking (list): The top districts.
+
+        Returns:
+        bool: True if the ranking changed.
+        """
+        payload = dumps(camelize(ranking))
+        event_id = content_version(payload)
+        if self.latest is not None and self.latest[0] == event_id:
+            return False
+
+        self.latest = (event_id, payload.decode())
+        for queue in self._subscribers:
+            # A slow stream skips to the newest ranking instead of queueing up
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(self.latest)
+        return True
+
+    async def poll(self) -> bool:
+        """
+        Reads the current ranking and publishes it.
+
+        Returns:
+        bool: True if the ranking changed.
+        """
+        return self.publish(await self.ranking.atop())
+
+    async def ensure_current(self) -> None:
+        """Reads the ranking now unless the poll loop is keeping it current."""
+        if self.latest is None or not self.running:
+            await self.poll()
+        self.start()
+
+    async def subscribe(
+        self, last_event_id: str = None
+    ) -> AsyncIterator[Optional[RankingEvent]]:
+        """
+        Yields the current ranking, then every change of it.
+
+        Parameters:
+        last_event_id (str): The id of the last event a reconnecting client got, it
+            isn't sent again.
+
+        Yields:
+        Optional[RankingEvent]: The event id and JSON ranking, or None once an
+            interval went by without a change so the caller can send a heartbeat.
+        """
+        await self.ensure_current()
+        # Registered only now, so the current ranking isn't queued a second time
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+        try:
+            if self.latest is not None and self.latest[0] != last_event_id:
+                yield self.latest
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), self._get_interval())
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and self._task is not None:
+                # Nobody is listening, stop reading the ranking
+                self._task.cancel()
+                self._task = None
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts the poll loop on the running event loop, unless it is already running.
+
+        Returns:
+        asyncio.Task: The background poll task.
+        """
+        loop = asyncio.get_running_loop()
+        if not self.running or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run(), name="top-districts-broadcaster")
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancels the poll loop and waits for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._get_interval())
+            try:
+                await self.poll()
+            except Exception:
+                # Streams keep the previous ranking until the next poll succeeds
+                logger.exception("Failed to poll the top districts ranking")
+
+
+ranking_broadcaster = RankingBroadcaster()
@@ -0,0 +1,495 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+
+from weather.parsers import HOURS_PER_DAY
+
+FORECAST_UPDATE_INTERVAL = 60 * 60
+COORDINATE_PRECISION = 2
+CACHE_MAX_STALENESS = 60 * 60 * 6
+LOCAL_CACHE_MAX_ENTRIES = 4096
+LOCAL_CACHE_TIMEOUT = 60
+SERIES_DTYPE = np.float32
+
+
+def forecast_cache_timeout(now: float = None) -> int:
+    """
+    Calculates how long a forecast may be cached, aligned to the upstream model update cadence.
+
+    Parameters:
+    now (float): Current UNIX timestamp. Defaults to the current time.
+
+    Returns:
+    int: Seconds left until the next WEATHER_FORECAST_UPDATE_INTERVAL boundary.
+    """
+    interval = getattr(
+        settings, "WEATHER_FORECAST_UPDATE_INTERVAL", FORECAST_UPDATE_INTERVAL
+    )
+    now = time.time() if now is None else now
+    return max(1, int(interval - now % interval))
+
+
+def max_staleness() -> int:
+    """Seconds an expired entry may still be served while it is being refreshed."""
+    return getattr(settings, "WEATHER_CACHE_MAX_STALENESS", CACHE_MAX_STALENESS)
+
+
+def fresh_until_key(key: str) -> str:
+    return f"{key}:fresh_until"
+
+
+class FreshEntry(NamedTuple):
+    """A cached value and the UNIX timestamp it stops being fresh at."""
+
+    value: Any
+    fresh_until: float
+
+
+def set_many_with_staleness(
+    entries: Dict[str, Any], timeout: int, now: float = None, backend=None
+) -> None:
+    """
+    Caches entries that stay fresh for `timeout` seconds and stale for `max_staleness()` more.
+
+    Every entry is stored next to a timestamp of when it stops being fresh, the
+    cache backend itself only evicts it once the staleness budget is used up too.
+
+    Parameters:
+    entries (Dict[str, Any]): The values to cache by key.
+    timeout (int): Seconds the entries are fresh.
+    now (float): Current UNIX timestamp. Defaults to the current time.
+    backend: The cache to write to. Defaults to the default Django cache.
+    """
+    fresh_until = (time.time() if now is None else now) + timeout
+    payload = dict(entries)
+    for key in entries:
+        payload[fresh_until_key(key)] = fresh_until
+    (backend or cache).set_many(payload, timeout=timeout + max_staleness())
+
+
+def get_many_with_staleness(
+    keys: Iterable[str], now: float = None, backend=None
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Reads entries written by `set_many_with_staleness`.
+
+    Entries without a freshness timestamp, such as those written with a plain
+    `cache.set`, count as fresh until the backend evicts them.
+
+    Parameters:
+    keys (Iterable[str]): The keys to read.
+    now (float): Current UNIX timestamp. Defaults to the current time.
+    backend: The cache to read from. Defaults to the default Django cache.
+
+    Returns:
+    Tuple[Dict[str, Any], bool]: The cached values by key, and whether any of them is stale.
+    """
+    keys = list(keys)
+    now = time.time() if now is None else now
+    found = (backend or cache).get_many(keys + [fresh_until_key(key) for key in keys])
+    values = {key: found[key] for key in keys if key in found}
+    stale = any(found.get(fresh_until_key(key), float("inf")) <= now for key in values)
+    return values, stale
+
+
+def content_version(payload: bytes) -> str:
+    """Hashes a serialized payload into a short version string."""
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def version_key(key: str) -> str:
+    return f"{key}:version"
+
+
+def set_version(
+    key: str, data: Any, timeout: int, now: float = None, backend=None
+) -> Dict[str, Any]:
+    """
+    Stores the content version of the data cached under `key`, for HTTP validators.
+
+    Parameters:
+    key (str): The key the data is cached under.
+    data (Any): The JSON serializable data.
+    timeout (int): Seconds to keep the version, as long as the data itself.
+    now (float): Current UNIX timestamp. Defaults to the current time.
+    backend: The cache to write to. Defaults to the default Django cache.
+
+    Returns:
+    Dict[str, Any]: The content `version`, when it last changed (`modified_at`) and
+        when the data was last refreshed (`refreshed_at`).
+    """
+    now = time.time() if now is None else now
+    backend = backend or cache
+    version = content_version(json.dumps(data, separators=(",", ":")).encode())
+    previous = backend.get(version_key(key))
+    # Refreshing to the same content doesn't make it modified
+    unchanged = previous is not None and previous["version"] == version
+    stamp = {
+        "version": version,
+        "modified_at": previous["modified_at"] if unchanged else now,
+        "refreshed_at": now,
+    }
+    backend.set(version_key(key), stamp, timeout=timeout)
+    return stamp
+
+
+def get_version(key: str, backend=None) -> Optional[Dict[str, Any]]:
+    """
+    Reads the content version stored by `set_version`.
+
+    Returns:
+    Optional[Dict[str, Any]]: The version stamp, or None if the data has none.
+    """
+    return (backend or cache).get(version_key(key))
+
+
+def encode_series(temperatures) -> bytes:
+    """Packs a temperature series into float32 bytes, 4 bytes per hour."""
+    return np.asarray(temperatures, dtype=SERIES_DTYPE).tobytes()
+
+
+def decode_series(payloads: List[bytes]) -> List[float]:
+    """Unpacks and concatenates series packed by `encode_series`."""
+    return (
+        np.concatenate(
+            [np.frombuffer(payload, dtype=SERIES_DTYPE) for payload in payloads]
+        )
+        .astype(np.float64)
+        .tolist()
+    )
+
+
+def round_coordinates(district: Dict) -> Tuple[float, float]:
+    """Rounds a district's coordinates so nearby locations share forecasts."""
+    return (
+        round(float(district["lat"]), COORDINATE_PRECISION),
+        round(float(district["long"]), COORDINATE_PRECISION),
+    )
+
+
+def split_days(
+    start_date: str, end_date: str, temperatures: List[float]
+) -> Iterator[Tuple[str, List[float]]]:
+    """
+    Splits an hourly series into its days.
+
+    Parameters:
+    start_date (str): First day in "YYYY-MM-DD" format.
+    end_date (str): Last day in "YYYY-MM-DD" format.
+    temperatures (List[float]): Hourly temperatures starting at midnight of `start_date`.
+
+    Yields:
+    Tuple[str, List[float]]: The day and its 24 temperatures. A partial day would shift
+        every hour lookup, so only complete days are yielded.
+    """
+    for offset, day in enumerate(date_range(start_date, end_date)):
+        series = temperatures[offset * HOURS_PER_DAY : (offset + 1) * HOURS_PER_DAY]
+        if len(series) == HOURS_PER_DAY:
+            yield day, series
+
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded in-process cache with per-entry expiry.
+
+    Implements the `get_many` / `set_many` / `clear` subset of the Django cache API.
+    Once `max_entries` is reached the least recently used entries are evicted.
+    """
+
+    def __init__(self, max_entries: int = None) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_max_entries(self) -> int:
+        if self.max_entries is not None:
+            return self.max_entries
+        return getattr(
+            settings, "WEATHER_LOCAL_CACHE_MAX_ENTRIES", LOCAL_CACHE_MAX_ENTRIES
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, entries: Dict[str, Any], timeout: float) -> None:
+        expires_at = time.monotonic() + timeout
+        max_entries = self._get_max_entries()
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    """
+    An in-process LRU in front of a Django cache shared between workers.
+
+    Reads try the LRU first and only go to the shared backend for the keys it misses,
+    which are then kept locally for at most WEATHER_LOCAL_CACHE_TIMEOUT seconds so
+    refreshes by other workers are picked up quickly. Writes go to both tiers.
+
+    The async methods keep the LRU on the event loop and do the shared backend I/O on
+    a worker thread, as a file-based backend scans its directory on every write.
+    """
+
+    def __init__(self, alias: str = None, max_entries: int = None) -> None:
+        self.alias = alias
+        self.local = LRUCache(max_entries)
+
+    @property
+    def shared(self):
+        alias = self.alias or getattr(
+            settings, "WEATHER_FORECAST_CACHE_ALIAS", DEFAULT_CACHE_ALIAS
+        )
+        return caches[alias]
+
+    def _local_timeout(self, timeout: float) -> float:
+        return min(
+            timeout,
+            getattr(settings, "WEATHER_LOCAL_CACHE_TIMEOUT", LOCAL_CACHE_TIMEOUT),
+        )
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing)
+            if shared:
+                self.local.set_many(shared, timeout=self._local_timeout(float("inf")))
+                found.update(shared)
+        return found
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = await sync_to_async(self.shared.get_many, thread_sensitive=False)(
+                missing
+            )
+            if shared:
+                self.local.set_many(shared, timeout=self._local_timeout(float("inf")))
+                found.update(shared)
+        return found
+
+    def set_many(self, entries: Dict[str, Any], timeout: float) -> None:
+        self.shared.set_many(entries, timeout=timeout)
+        self.local.set_many(entries, timeout=self._local_timeout(timeout))
+
+    async def aset_many(self, entries: Dict[str, Any], timeout: float) -> None:
+        await sync_to_async(self.shared.set_many, thread_sensitive=False)(
+            entries, timeout=timeout
+        )
+        self.local.set_many(entries, timeout=self._local_timeout(timeout))
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.shared.clear()
+
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    """
+    Lists every day between two dates, both inclusive.
+
+    Parameters:
+    start_date (str): First day in "YYYY-MM-DD" format.
+    end_date (str): Last day in "YYYY-MM-DD" format.
+
+    Returns:
+    List[str]: The days in "YYYY-MM-DD" format.
+    """
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    return [
+        (start + timedelta(days=offset)).isoformat()
+        for offset in range((end - start).days + 1)
+    ]
+
+
+class ForecastCache:
+    """
+    Stores the hourly `temperature_2m` series of a location, one entry per day.
+
+    Entries are keyed by rounded coordinates so nearby lookups share them, and by day
+    so a single-day lookup can be served from a multi-day fetch. Each day is packed as
+    24 float32 values, stored with its freshness timestamp as one `FreshEntry`, and
+    kept in a `TwoTierCache`.
+    """
+
+    key_prefix = "forecast"
+
+    def __init__(self, backend: TwoTierCache = None) -> None:
+        self.backend = backend or TwoTierCache()
+
+    def make_key(self, district: Dict, day: str) -> str:
+        lat, long = round_coordinates(district)
+        return f"{self.key_prefix}:{lat}:{long}:{day}"
+
+    def get(
+        self, district: Dict, start_date: str, end_date: str
+    ) -> Optional[List[float]]:
+        """
+        Reads the hourly temperatures of a location for a date range.
+
+        Parameters:
+        district (dict): A dictionary containing the district latitude and longitude.
+        start_date (str): First day in "YYYY-MM-DD" format.
+        end_date (str): Last day in "YYYY-MM-DD" format.
+
+        Returns:
+        Optional[List[float]]: 24 temperatures per day, or None if any day is missing.
+        """
+        return self.lookup(district, start_date, end_date)[0]
+
+    def lookup(
+        self, district: Dict, start_date: str, end_date: str
+    ) -> Tuple[Optional[List[float]], bool]:
+        """
+        Reads the hourly temperatures of a location and whether they should be refreshed.
+
+        Parameters:
+        district (dict): A dictionary containing the district latitude and longitude.
+        start_date (str): First day in "YYYY-MM-DD" format.
+        end_date (str): Last day in "YYYY-MM-DD" format.
+
+        Returns:
+        Tuple[Optional[List[float]], bool]: 24 temperatures per day, or None if any day
+            is missing, and whether any day is past its freshness.
+        """
+        keys = self._window_keys(district, start_date, end_date)
+        return self._read_window(self.backend.get_many(keys), keys)
+
+    async def alookup_many(
+        self, windows: Sequence[Tuple[Dict, str, str]]
+    ) -> List[Tuple[Optional[List[float]], bool]]:
+        """
+        Reads many windows with a single shared cache read, off the event loop.
+
+        Parameters:
+        windows (Sequence[Tuple[dict, str, str]]): The district, first and last day of
+            every window.
+
+        Returns:
+        List[Tuple[Optional[List[float]], bool]]: What `lookup` returns, per window.
+        """
+        keys = [self._window_keys(*window) for window in windows]
+        entries = await self.backend.aget_many(
+            [key for window_keys in keys for key in window_keys]
+        )
+        return [self._read_window(entries, window_keys) for window_keys in keys]
+
+    def _window_keys(self, district: Dict, start_date: str, end_date: str) -> List[str]:
+        return [
+            self.make_key(district, day) for day in date_range(start_date, end_date)
+        ]
+
+    def _read_window(
+        self, entries: Dict[str, FreshEntry], keys: List[str]
+    ) -> Tuple[Optional[List[float]], bool]:
+        if any(key not in entries for key in keys):
+            return None, False
+
+        now = time.time()
+        stale = any(entries[key].fresh_until <= now for key in keys)
+        return decode_series([entries[key].value for key in keys]), stale
+
+    def set(
+        self,
+        district: Dict,
+        start_date: str,
+        end_date: str,
+        temperatures: List[float],
+        timeout: int = None,
+    ) -> None:
+        """
+        Stores the hourly temperatures of a location for a date range.
+
+        Parameters:
+        district (dict): A dictionary containing the district latitude and longitude.
+        start_date (str): First day in "YYYY-MM-DD" format.
+        end_date (str): Last day in "YYYY-MM-DD" format.
+        temperatures (List[float]): Hourly temperatures starting at midnight of `start_date`.
+        timeout (int): Seconds the entries are fresh. Defaults to the next forecast update.
+        """
+        timeout = forecast_cache_timeout() if timeout is None else timeout
+        entries = self._entries(
+            [(district, start_date, end_date)], [temperatures], timeout
+        )
+        self.backend.set_many(entries, timeout=timeout + max_staleness())
+
+    async def aset_many(
+        self,
+        windows: Sequence[Tuple[Dict, str, str]],
+        series: Sequence[List[float]],
+        timeout: int = None,
+    ) -> None:
+        """
+        Stores many windows with a single shared cache write, off the event loop.
+
+        Parameters:
+        windows (Sequence[Tuple[dict, str, str]]): The district, first and last day of
+            every window.
+        series (Sequence[List[float]]): Hourly temperatures starting at each window's first day.
+        timeout (int): Seconds the entries are fresh. Defaults to the next forecast update.
+        """
+        timeout = forecast_cache_timeout() if timeout is None else timeout
+        entries = self._entries(windows, series, timeout)
+        if entries:
+            await self.backend.aset_many(entries, timeout=timeout + max_staleness())
+
+    def _entries(self, windows, series, timeout: int) -> Dict[str, FreshEntry]:
+        # The freshness travels inside the entry, so a day is a single cache entry
+        fresh_until = time.time() + timeout
+        return {
+            self.make_key(district, day): FreshEntry(encode_series(values), fresh_until)
+            for (district, start_date, end_date), temperatures in zip(windows, series)
+            for day, values in split_days(start_date, end_date, temperatures)
+        }
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,109 @@
+"""
+HTTP validators for responses built from versioned cached data.
+
+The ETag is the content version stored next to the data by
+`weather.cache.set_version`, combined with the request parameters that select a
+part of it, so a matching If-None-Match is answered before any work is done.
+"""
+
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from weather.cache import content_version
+
+
+def make_etag(version: str, *variant: Any) -> str:
+    """
+    Builds a strong ETag from a content version and the parameters selecting a part of it.
+
+    Parameters:
+    version (str): The content version.
+    *variant: Request parameters the response depends on.
+
+    Returns:
+    str: The quoted ETag.
+    """
+    if variant:
+        digest = hashlib.sha1(repr(variant).encode()).hexdigest()[:8]
+        version = f"{version}-{digest}"
+    return quote_etag(version)
+
+
+def max_age(stamp: Dict[str, Any], lifetime: int) -> int:
+    """Seconds left until data refreshed at `stamp["refreshed_at"]` is refreshed again."""
+    return max(0, int(stamp["refreshed_at"] + lifetime - time.time()))
+
+
+def not_modified(
+    request: HttpRequest, stamp: Optional[Dict[str, Any]], *variant: Any
+) -> Optional[HttpResponse]:
+    """
+    Answers a conditional GET whose validators match the current data version.
+
+    Parameters:
+    request (HttpRequest): The request, with If-None-Match or If-Modified-Since.
+    stamp (Optional[Dict[str, Any]]): The version stamp of the data, if any.
+    *variant: Request parameters the response depends on.
+
+    Returns:
+    Optional[HttpResponse]: A 304 response, or None if the response has to be built.
+    """
+    if stamp is None:
+        return None
+    return get_conditional_response(
+        request,
+        etag=make_etag(stamp["version"], *variant),
+        last_modified=int(stamp["modified_at"]),
+    )
+
+
+def add_validators(
+    response: HttpResponse,
+    stamp: Optional[Dict[str, Any]],
+    lifetime: int,
+    *variant: Any,
+) -> HttpResponse:
+    """
+    Sets ETag, Last-Modified and Cache-Control from the data version.
+
+    Parameters:
+    response (HttpResponse): The response to update, a 200 or a 304.
+    stamp (Optional[Dict[str, Any]]): The version stamp of the data, if any.
+    lifetime (int): Seconds the data is served between refreshes.
+    *variant: Request parameters the response depends on.
+
+    Returns:
+    HttpResponse: The same response.
+    """
+    if stamp is None:
+        return response
+    response["ETag"] = make_etag(stamp["version"], *variant)
+    response["Last-Modified"] = http_date(stamp["modified_at"])
+    patch_cache_control(response, public=True, max_age=max_age(stamp, lifetime))
+    return response
+
+
+def validate_content(
+    request: HttpRequest, response: HttpResponse, max_age: int
+) -> HttpResponse:
+    """
+    Sets an ETag hashed from the rendered body, for responses without a stored version.
+
+    Only saves the transfer, the response has already been built.
+
+    Parameters:
+    request (HttpRequest): The request, with If-None-Match.
+    response (HttpResponse): The rendered response.
+    max_age (int): Seconds clients and caches may reuse the response.
+
+    Returns:
+    HttpResponse: The response, or a 304 if the client already has it.
+    """
+    response["ETag"] = quote_etag(content_version(response.content))
+    patch_cache_control(response, public=True, max_age=max_age)
+    return get_conditional_response(request, etag=response["ETag"], response=response)
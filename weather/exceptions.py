@@ -5,3 +5,21 @@ from rest_framework.exceptions import APIException
 class RemoteCallException(APIException):
     default_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     default_detail = "remote server returned non 200 response"
+
+
+class DistrictNotFoundException(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+    default_code = "district_not_found"
+    default_detail = "district not found"
+
+
+class UpstreamUnavailableException(RemoteCallException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_code = "upstream_unavailable"
+    default_detail = "upstream service unavailable, try again later"
+
+
+class UpstreamRejectedException(RemoteCallException):
+    status_code = status.HTTP_502_BAD_GATEWAY
+    default_code = "upstream_rejected"
+    default_detail = "upstream service rejected the request"
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+
+from weather.profiling import stage
+
+PARSE_EXECUTOR = "thread"
+PARSE_WORKERS = None
+
+
+class ParseExecutor:
+    """
+    Runs CPU-bound forecast parsing off the event loop.
+
+    The pool kind comes from the WEATHER_PARSE_EXECUTOR setting: "thread", "process",
+    or None to run inline on the calling thread. Functions sent to a process pool
+    must be picklable and must not touch the per-process cache.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def get_executor(self) -> Optional[Executor]:
+        kind = getattr(settings, "WEATHER_PARSE_EXECUTOR", PARSE_EXECUTOR)
+        if kind is None:
+            return None
+
+        with self._lock:
+            if self._executor is None:
+                workers = getattr(settings, "WEATHER_PARSE_WORKERS", PARSE_WORKERS)
+                if kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=workers)
+                elif kind == "thread":
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix="weather-parse"
+                    )
+                else:
+                    raise ValueError(f"Unknown parse executor: {kind}")
+            return self._executor
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Runs `fn(*args)` on the parse pool and waits for it without blocking the loop.
+
+        Parameters:
+        fn (Callable): The parsing function.
+        *args: Positional arguments for `fn`.
+
+        Returns:
+        Any: The return value of `fn`.
+        """
+        executor = self.get_executor()
+        with stage("parse"):
+            if executor is None:
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, partial(fn, *args)
+            )
+
+    def shutdown(self) -> None:
+        """Shuts the pool down, a new one is created on the next use."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+parse_executor = ParseExecutor()
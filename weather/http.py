@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import threading
+from typing import Optional, Set
+
+import httpx
+from django.conf import settings
+
+from weather.metrics import time_upstream
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = 10
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30
+
+
+def _get_timeout() -> float:
+    return getattr(settings, "WEATHER_HTTP_TIMEOUT", HTTP_TIMEOUT)
+
+
+def _transport_options() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=getattr(
+                settings, "WEATHER_HTTP_MAX_CONNECTIONS", HTTP_MAX_CONNECTIONS
+            ),
+            max_keepalive_connections=getattr(
+                settings,
+                "WEATHER_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+                HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            keepalive_expiry=getattr(
+                settings, "WEATHER_HTTP_KEEPALIVE_EXPIRY", HTTP_KEEPALIVE_EXPIRY
+            ),
+        ),
+        # HTTP/2 needs the optional `h2` package, installed with `httpx[http2]`
+        "http2": getattr(settings, "WEATHER_HTTP2", False),
+    }
+
+
+class MeteredTransport(httpx.BaseTransport):
+    """Records the latency and status of every upstream request, per host."""
+
+    def __init__(self, transport: httpx.BaseTransport) -> None:
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with time_upstream(request.url.host) as outcome:
+            response = self.transport.handle_request(request)
+            outcome["status"] = str(response.status_code)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncMeteredTransport(httpx.AsyncBaseTransport):
+    """Records the latency and status of every upstream request, per host."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with time_upstream(request.url.host) as outcome:
+            response = await self.transport.handle_async_request(request)
+            outcome["status"] = str(response.status_code)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HttpClients:
+    """
+    Process-wide pooled HTTP clients for the upstream APIs.
+
+    Connections to GitHub and Open-Meteo are kept alive and reused across requests
+    instead of paying TCP and TLS setup on every call.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport = None) -> None:
+        self.transport = transport
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Keeps a strong reference so pending closes aren't garbage collected
+        self._closing: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def get_client(self) -> httpx.Client:
+        """
+        Returns the shared synchronous client, creating it on first use.
+
+        Returns:
+        httpx.Client: The pooled client.
+        """
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                transport = self.transport or httpx.HTTPTransport(
+                    **_transport_options()
+                )
+                self._client = httpx.Client(
+                    transport=MeteredTransport(transport), timeout=_get_timeout()
+                )
+            return self._client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """
+        Returns the shared asynchronous client of the running event loop.
+
+        Pooled connections belong to the loop that opened them, so a new client is
+        created whenever the running loop changes, and the previous one is closed.
+
+        Returns:
+        httpx.AsyncClient: The pooled client.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_client is None
+            or self._async_client.is_closed
+            or self._async_loop is not loop
+        ):
+            if self._async_client is not None and not self._async_client.is_closed:
+                self._retire(self._async_client, self._async_loop)
+            transport = self.transport or httpx.AsyncHTTPTransport(
+                **_transport_options()
+            )
+            self._async_client = httpx.AsyncClient(
+                transport=AsyncMeteredTransport(transport), timeout=_get_timeout()
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    def _retire(
+        self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        """Closes a client replaced by one for another loop, without waiting for it."""
+        if loop.is_running() and loop is not asyncio.get_running_loop():
+            # Still serving in another thread, its connections are closed over there
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        # The loop is gone, close what can still be closed from this one
+        task = asyncio.get_running_loop().create_task(self._aclose_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _aclose_quietly(self, client: httpx.AsyncClient) -> None:
+        try:
+            await client.aclose()
+        except Exception:
+            # Connections of a closed loop can't be shut down cleanly anymore
+            logger.debug("Failed to close a client of a finished loop", exc_info=True)
+
+    def use_transport(self, transport: Optional[httpx.BaseTransport]) -> None:
+        """
+        Sends every upstream request through `transport`, such as an `httpx.MockTransport`.
+
+        The shared clients are dropped and recreated on their next use. Pass None to
+        go back to the network.
+
+        Parameters:
+        transport (httpx.BaseTransport): The transport used by new clients.
+        """
+        self.close()
+        self.transport = transport
+        self._async_client = None
+        self._async_loop = None
+
+    def close(self) -> None:
+        """Closes the shared synchronous client."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        """Closes both shared clients, and waits for replaced ones to be closed."""
+        self.close()
+        loop = asyncio.get_running_loop()
+        closing = [task for task in self._closing if task.get_loop() is loop]
+        if closing:
+            await asyncio.gather(*closing)
+        if self._async_client is not None:
+            # A client opened on another loop can't be awaited from this one
+            if self._async_loop is asyncio.get_running_loop():
+                await self._async_client.aclose()
+            self._async_client = None
+            self._async_loop = None
+
+
+http_clients = HttpClients()
@@ -0,0 +1,63 @@
+from django.conf import settings
+
+from weather import archive
+from weather.archive import awarm_cache
+from weather.broadcast import ranking_broadcaster
+from weather.executor import parse_executor
+from weather.http import http_clients
+from weather.monitoring import loop_lag_monitor
+from weather.ranking import ranking_refresher
+from weather.revalidation import revalidator
+from weather.warmup import warmup
+
+
+async def startup() -> None:
+    """Starts the weather background tasks when the ASGI server boots."""
+    if settings.WEATHER_LOOP_MONITOR:
+        loop_lag_monitor.start()
+    if settings.WEATHER_WARMUP:
+        # Loads districts and forecasts while the readiness probe reports not ready
+        warmup.start()
+        if settings.WEATHER_RANKING_BACKGROUND_REFRESH:
+            ranking_refresher.start(immediate=False)
+        return
+
+    # Serve the last archived data until upstream has been asked again
+    await awarm_cache()
+    if settings.WEATHER_RANKING_BACKGROUND_REFRESH:
+        ranking_refresher.start()
+
+
+async def shutdown() -> None:
+    """Stops the weather background tasks and closes pooled connections before the ASGI server exits."""
+    await warmup.stop()
+    await ranking_refresher.stop()
+    await ranking_broadcaster.stop()
+    await loop_lag_monitor.stop()
+    await revalidator.cancel()
+    # Let the last archive writes land, the next start serves from them
+    await archive.wait()
+    await http_clients.aclose()
+    parse_executor.shutdown()
+
+
+async def lifespan(scope, receive, send) -> None:
+    """
+    Handles the ASGI lifespan protocol for servers that support it.
+
+    Django's ASGI handler only accepts HTTP connections, so `core.asgi` routes
+    lifespan scopes here instead.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await startup()
+            except Exception as exc:
+                await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
@@ -0,0 +1,32 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from weather.ranking import RankingRefresher, TopDistrictRanking
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the top districts ranking and stores it in the cache. "
+        "Only useful for other processes when a shared cache backend is configured."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and refresh every WEATHER_RANKING_REFRESH_INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        if options["loop"]:
+            asyncio.run(self._run_forever())
+            return
+
+        ranking = asyncio.run(TopDistrictRanking().refresh())
+        self.stdout.write(
+            self.style.SUCCESS(f"Ranked {len(ranking)} districts by temperature")
+        )
+
+    async def _run_forever(self):
+        await RankingRefresher().start()
@@ -0,0 +1,300 @@
+"""
+Minimal Prometheus-style metrics, rendered in the text exposition format.
+
+Only counters, gauges and histograms are supported, which is all the weather app
+needs, so no client library is required.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from weather.monitoring import loop_lag_monitor
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def _snapshot(self) -> List[Tuple[Tuple[str, ...], object]]:
+        # Scrapes run on a worker thread while the loop thread adds label sets
+        with self._lock:
+            return sorted(self._values.items())
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        for key, value in self._snapshot():
+            yield f"{self.name}_total", self._labels(key), value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Counts the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        for key, value in self._snapshot():
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def _snapshot(self):
+        # observe() updates the bucket counts in place
+        with self._lock:
+            return [
+                (key, (list(counts), total))
+                for key, (counts, total) in sorted(self._values.items())
+            ]
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def samples(self):
+        for key, (counts, total) in self._snapshot():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    {**labels, "le": _format_value(bound)},
+                    cumulative,
+                )
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """Collects metrics, and callbacks refreshing them, for one exposition."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Registers a callback run before every render, to set gauges from other state."""
+        self._collectors.append(collector)
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(
+    Histogram(
+        "weather_request_duration_seconds",
+        "Time spent serving a request, per view.",
+        ["view", "method", "status"],
+    )
+)
+requests_in_flight = registry.register(
+    Gauge(
+        "weather_requests_in_flight",
+        "Requests currently being served, per view.",
+        ["view"],
+    )
+)
+upstream_duration = registry.register(
+    Histogram(
+        "weather_upstream_request_duration_seconds",
+        "Time until an upstream API answered, per host and status.",
+        ["host", "status"],
+    )
+)
+upstream_in_flight = registry.register(
+    Gauge(
+        "weather_upstream_requests_in_flight",
+        "Upstream requests currently waiting for an answer, per host.",
+        ["host"],
+    )
+)
+cache_lookups = registry.register(
+    Counter(
+        "weather_cache_lookups",
+        "Cache lookups per cache and result: hit, stale (expired but served) or miss.",
+        ["cache", "result"],
+    )
+)
+upstream_retries = registry.register(
+    Counter(
+        "weather_upstream_retries",
+        "Upstream requests sent again after a failure, per host.",
+        ["host"],
+    )
+)
+upstream_hedges = registry.register(
+    Counter(
+        "weather_upstream_hedged_requests",
+        "Duplicate upstream requests sent because the first one was slow, per host.",
+        ["host"],
+    )
+)
+upstream_rejected = registry.register(
+    Counter(
+        "weather_upstream_rejected",
+        "Upstream requests not sent because the host's circuit breaker is open.",
+        ["host"],
+    )
+)
+loop_blocked = registry.register(
+    Gauge(
+        "weather_event_loop_blocked_seconds",
+        "Time the event loop was blocked since the process started.",
+    )
+)
+loop_max_blocked = registry.register(
+    Gauge(
+        "weather_event_loop_max_blocked_seconds",
+        "Longest single event loop block since the process started.",
+    )
+)
+
+
+def _collect_loop_lag() -> None:
+    snapshot = loop_lag_monitor.snapshot()
+    loop_blocked.set(snapshot["blocked_seconds"])
+    loop_max_blocked.set(snapshot["max_blocked_seconds"])
+
+
+registry.add_collector(_collect_loop_lag)
+
+
+def record_cache_lookup(cache: str, found: bool, stale: bool = False) -> None:
+    result = "miss" if not found else "stale" if stale else "hit"
+    cache_lookups.inc(cache=cache, result=result)
+
+
+@contextmanager
+def time_upstream(host: str):
+    """Times an upstream request and counts it in flight, the status is set on the yielded dict."""
+    outcome = {"status": "error"}
+    started = time.perf_counter()
+    with upstream_in_flight.track_inprogress(host=host):
+        try:
+            yield outcome
+        finally:
+            upstream_duration.observe(
+                time.perf_counter() - started, host=host, status=outcome["status"]
+            )
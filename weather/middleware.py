@@ -0,0 +1,133 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpRequest, HttpResponse
+
+from weather.metrics import request_duration, requests_in_flight
+from weather.profiling import (
+    PROFILE_HEADER,
+    RequestProfile,
+    profiler_lock,
+    wants_profile,
+)
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_VIEW = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records the latency and status of every request, and the requests in flight, per view.
+
+    Works in both the sync and async request cycles, so async views are not run
+    through a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, started)
+        return response
+
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs):
+        # The view is only known once the URL is resolved
+        request.metrics_view = request.resolver_match.view_name
+        requests_in_flight.inc(view=request.metrics_view)
+
+    def _record(self, request: HttpRequest, response: HttpResponse, started: float):
+        view = getattr(request, "metrics_view", None)
+        if view is None:
+            view = UNMATCHED_VIEW
+        else:
+            requests_in_flight.dec(view=view)
+        request_duration.observe(
+            time.perf_counter() - started,
+            view=view,
+            method=request.method,
+            status=str(response.status_code),
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests that ask for it while WEATHER_PROFILING is on, see
+    `weather.profiling.wants_profile`.
+
+    The response carries the stage timings in a Server-Timing header and the
+    profile name in X-Weather-Profile-Id. cProfile follows the whole thread, so on
+    an event loop the profile also holds whatever other requests ran meanwhile.
+    Only one request is profiled at a time, the others run as usual.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not wants_profile(request) or not profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profile = RequestProfile()
+            profile.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.stop()
+            self._save(profile, request, response)
+        finally:
+            profiler_lock.release()
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not wants_profile(request) or not profiler_lock.acquire(blocking=False):
+            return await self.get_response(request)
+
+        try:
+            profile = RequestProfile()
+            profile.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profile.stop()
+            # Keep the file writes off the event loop
+            await sync_to_async(self._save)(profile, request, response)
+        finally:
+            profiler_lock.release()
+        return response
+
+    def _save(self, profile: RequestProfile, request, response) -> None:
+        response["Server-Timing"] = profile.server_timing()
+        try:
+            profile.save(request, response)
+        except OSError:
+            # A profile that can't be saved must not fail the request
+            logger.exception("Failed to save the request profile")
+            return
+        response[f"{PROFILE_HEADER}-Id"] = profile.id
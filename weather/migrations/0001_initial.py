@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="District",
+            fields=[
+                ("id", models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ("division_id", models.PositiveIntegerField(blank=True, null=True)),
+                ("name", models.CharField(max_length=64)),
+                ("bn_name", models.CharField(blank=True, default="", max_length=64)),
+                ("lat", models.FloatField()),
+                ("long", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="HourlyForecast",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("lat", models.FloatField()),
+                ("long", models.FloatField()),
+                ("day", models.DateField()),
+                ("temperatures", models.BinaryField()),
+                ("fetched_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["day"], name="weather_hou_day_465d8e_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="hourlyforecast",
+            constraint=models.UniqueConstraint(
+                fields=("lat", "long", "day"), name="unique_hourly_forecast_day"
+            ),
+        ),
+    ]
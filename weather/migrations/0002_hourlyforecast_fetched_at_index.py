@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="hourlyforecast",
+            index=models.Index(
+                fields=["fetched_at"], name="weather_hou_fetched_f626c0_idx"
+            ),
+        ),
+    ]
@@ -1 +1,57 @@
-# Create your models here.
+from django.db import models
+
+
+class District(models.Model):
+    """A district as published by the districts API, archived for cold starts."""
+
+    id = models.PositiveIntegerField(primary_key=True)
+    division_id = models.PositiveIntegerField(null=True, blank=True)
+    name = models.CharField(max_length=64)
+    bn_name = models.CharField(max_length=64, blank=True, default="")
+    lat = models.FloatField()
+    long = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return self.name
+
+    def to_dict(self):
+        """Returns the district shaped like the districts API payload."""
+        return {
+            "id": str(self.id),
+            "division_id": None if self.division_id is None else str(self.division_id),
+            "name": self.name,
+            "bn_name": self.bn_name,
+            "lat": str(self.lat),
+            "long": str(self.long),
+        }
+
+
+class HourlyForecast(models.Model):
+    """
+    The 24 hourly `temperature_2m` values of one location and day.
+
+    Locations use the rounded coordinates of the forecast cache keys, and the
+    temperatures are packed as float32 like the cached day series. Days older than
+    WEATHER_CACHE_MAX_STALENESS are deleted on the next write.
+    """
+
+    lat = models.FloatField()
+    long = models.FloatField()
+    day = models.DateField()
+    temperatures = models.BinaryField()
+    fetched_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["lat", "long", "day"], name="unique_hourly_forecast_day"
+            )
+        ]
+        indexes = [models.Index(fields=["day"]), models.Index(fields=["fetched_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.lat},{self.long} {self.day}"
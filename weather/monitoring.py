@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_INTERVAL = 0.1
+LOOP_BLOCKING_WARNING = 0.1
+
+
+class LoopLagMonitor:
+    """
+    Measures how long the event loop is blocked.
+
+    A probe task sleeps for a fixed interval; any time it wakes up late is time the
+    loop spent running something else without yielding, such as synchronous parsing.
+    """
+
+    def __init__(self, interval: float = None) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.samples = 0
+        self.blocked_seconds = 0.0
+        self.max_blocked_seconds = 0.0
+
+    def _get_interval(self) -> float:
+        if self.interval is not None:
+            return self.interval
+        return getattr(settings, "WEATHER_LOOP_MONITOR_INTERVAL", LOOP_MONITOR_INTERVAL)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts the probe on the running event loop, unless it is already running.
+
+        Returns:
+        asyncio.Task: The probe task.
+        """
+        loop = asyncio.get_running_loop()
+        if not self.running or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run(), name="event-loop-lag-monitor")
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancels the probe and waits for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def record(self, lag: float) -> None:
+        self.samples += 1
+        self.blocked_seconds += lag
+        self.max_blocked_seconds = max(self.max_blocked_seconds, lag)
+        if lag >= getattr(
+            settings, "WEATHER_LOOP_BLOCKING_WARNING", LOOP_BLOCKING_WARNING
+        ):
+            logger.warning("Event loop was blocked for %.3f seconds", lag)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns the blocking statistics collected since the last reset.
+
+        Returns:
+        Dict[str, float]: Probe samples, total and maximum blocked seconds.
+        """
+        return {
+            "samples": self.samples,
+            "blocked_seconds": round(self.blocked_seconds, 6),
+            "max_blocked_seconds": round(self.max_blocked_seconds, 6),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            interval = self._get_interval()
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.record(max(0.0, time.perf_counter() - started - interval))
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,98 @@
+"""
+Pandas-free parsing of Open-Meteo hourly forecasts.
+
+Open-Meteo returns one row per hour starting at midnight of `start_date`, so the
+rows for a given hour of the day are found by index arithmetic instead of parsing
+and filtering timestamps.
+"""
+
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+
+HOURS_PER_DAY = 24
+CSV_HEADER_ROW = 3
+TEMPERATURE_COLUMN = "temperature_2m"
+
+
+def parse_csv_temperatures(csv_data: str) -> np.ndarray:
+    """
+    Extracts the hourly temperatures from an Open-Meteo CSV response.
+
+    Parameters:
+    csv_data (str): The CSV data, including the location metadata rows.
+
+    Returns:
+    numpy.ndarray: Hourly temperatures, missing values as NaN.
+    """
+    lines = csv_data.splitlines()
+    header = lines[CSV_HEADER_ROW].split(",")
+    column = next(
+        idx for idx, name in enumerate(header) if name.startswith(TEMPERATURE_COLUMN)
+    )
+    values = [
+        line.split(",")[column] or "nan" for line in lines[CSV_HEADER_ROW + 1 :] if line
+    ]
+    return np.array(values, dtype=np.float64)
+
+
+def parse_json_temperatures(payload: Dict[str, Any]) -> np.ndarray:
+    """
+    Extracts the hourly temperatures from an Open-Meteo JSON location object.
+
+    Parameters:
+    payload (dict): A single location object from the Open-Meteo JSON response.
+
+    Returns:
+    numpy.ndarray: Hourly temperatures, missing values as NaN.
+    """
+    return np.array(payload["hourly"][TEMPERATURE_COLUMN], dtype=np.float64)
+
+
+def parse_json_locations(content: bytes) -> List[List[float]]:
+    """
+    Extracts the hourly temperatures of every location in a multi-location JSON response.
+
+    Parameters:
+    content (bytes): The raw Open-Meteo JSON response body.
+
+    Returns:
+    List[List[float]]: One hourly temperature series per location, in request order.
+    """
+    payloads = json.loads(content)
+    # Open-Meteo returns a bare object instead of a list for a single location
+    if isinstance(payloads, dict):
+        payloads = [payloads]
+    return [parse_json_temperatures(payload).tolist() for payload in payloads]
+
+
+def values_at_hour(temperatures, hour: int, days: int = None) -> np.ndarray:
+    """
+    Selects the temperature at `hour` o'clock of every day.
+
+    Parameters:
+    temperatures (array-like): Hourly temperatures starting at midnight.
+    hour (int): Hour of the day, 0-23.
+    days (int): Only keep the first `days` days. Defaults to all of them.
+
+    Returns:
+    numpy.ndarray: One temperature per day.
+    """
+    values = np.asarray(temperatures, dtype=np.float64)[hour::HOURS_PER_DAY]
+    return values if days is None else values[:days]
+
+
+def average_at_hour(temperatures, hour: int, days: int = None) -> float:
+    """
+    Averages the temperature at `hour` o'clock over the first `days` days.
+
+    Parameters:
+    temperatures (array-like): Hourly temperatures starting at midnight.
+    hour (int): Hour of the day, 0-23.
+    days (int): Number of days to average. Defaults to all of them.
+
+    Returns:
+    float: The average temperature rounded to two decimal places.
+    """
+    return round(float(np.nanmean(values_at_hour(temperatures, hour, days))), 2)
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional
+
+from django.conf import settings
+
+FETCH_CONCURRENCY = 8
+# Room for an upstream request timing out and being retried twice
+FETCH_TIMEOUT = 35
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class FetchPipeline:
+    def __init__(
+        self, concurrency: Optional[int] = None, timeout: Optional[float] = None
+    ) -> None:
+        """
+        Initializes the FetchPipeline which runs upstream jobs with bounded concurrency.
+
+        Parameters:
+        concurrency (int): Maximum number of jobs running at the same time. Defaults to
+            the WEATHER_FETCH_CONCURRENCY setting.
+        timeout (float): Seconds a single job may run once it has started. Defaults to
+            the WEATHER_FETCH_TIMEOUT setting; setting it to None disables the timeout.
+        """
+        if concurrency is None:
+            concurrency = getattr(
+                settings, "WEATHER_FETCH_CONCURRENCY", FETCH_CONCURRENCY
+            )
+        if concurrency < 1:
+            raise ValueError("Concurrency must be a positive integer")
+        if timeout is None:
+            timeout = getattr(settings, "WEATHER_FETCH_TIMEOUT", FETCH_TIMEOUT)
+
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def _run_job(self, semaphore: asyncio.Semaphore, job: Job) -> Any:
+        async with semaphore:
+            # The timeout only starts once the job holds a slot
+            return await asyncio.wait_for(job(), self.timeout)
+
+    def _start(self, jobs: Iterable[Job]) -> List[asyncio.Task]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return [asyncio.ensure_future(self._run_job(semaphore, job)) for job in jobs]
+
+    async def stream(
+        self, jobs: Iterable[Job], return_exceptions: bool = False
+    ) -> AsyncIterator[Any]:
+        """
+        Runs the jobs and yields each result as soon as it finishes.
+
+        Parameters:
+        jobs (Iterable[Job]): Zero-argument callables returning an awaitable.
+        return_exceptions (bool): Yield the exception of a failed job instead of
+            raising it, so the other jobs keep running.
+
+        Yields:
+        Any: Job results in completion order.
+
+        Raises:
+        TimeoutError: If a job runs longer than the configured timeout.
+        """
+        tasks = self._start(jobs)
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    yield await next_done
+                except Exception as exc:
+                    if not return_exceptions:
+                        raise
+                    yield exc
+        finally:
+            # Don't leave jobs running when the consumer stops early or a job fails
+            for task in tasks:
+                task.cancel()
+
+    async def run(
+        self, jobs: Iterable[Job], return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Runs the jobs and returns all results in the order the jobs were given.
+
+        Parameters:
+        jobs (Iterable[Job]): Zero-argument callables returning an awaitable.
+        return_exceptions (bool): Return the exception of a failed job in its place
+            instead of raising it, so the other jobs keep running.
+
+        Returns:
+        List[Any]: Job results in input order.
+
+        Raises:
+        TimeoutError: If a job runs longer than the configured timeout.
+        """
+        tasks = self._start(jobs)
+        try:
+            return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        finally:
+            for task in tasks:
+                task.cancel()
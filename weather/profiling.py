@@ -0,0 +1,142 @@
+"""
+Opt-in profiling of single requests.
+
+`weather.middleware.ProfilingMiddleware` profiles a request with cProfile when
+WEATHER_PROFILING is on and the request asks for it, and `stage` records the wall
+time of the steps the request goes through. Outside a profiled request `stage`
+only reads a context variable.
+"""
+
+import cProfile
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+PROFILING_DIR = os.path.join(tempfile.gettempdir(), "weather-profiles")
+PROFILE_HEADER = "X-Weather-Profile"
+PROFILE_QUERY_PARAM = "profile"
+
+# Stage name to seconds, only set while a profiled request is running
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "weather_profile_stages", default=None
+)
+# cProfile can only follow one request at a time
+profiler_lock = threading.Lock()
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Adds the wall time of the block to the `name` stage of the profiled request.
+
+    Stages run by concurrent tasks of the same request add up, so they may exceed
+    the request's total time.
+
+    Parameters:
+    name (str): The stage, such as "districts", "fetch", "parse", "rank" or "render".
+    """
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def wants_profile(request: HttpRequest) -> bool:
+    """
+    Tells whether profiling is on and the request asks for it, with the
+    X-Weather-Profile header or the `profile` query parameter. When
+    WEATHER_PROFILING_TOKEN is set the header or parameter must carry it.
+
+    Parameters:
+    request (HttpRequest): The incoming request.
+
+    Returns:
+    bool: True if the request should be profiled.
+    """
+    if not getattr(settings, "WEATHER_PROFILING", False):
+        return False
+    value = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_QUERY_PARAM)
+    if not value:
+        return False
+    token = getattr(settings, "WEATHER_PROFILING_TOKEN", None)
+    return not token or value == token
+
+
+class RequestProfile:
+    """cProfile stats and stage timings of one request."""
+
+    def __init__(self) -> None:
+        self.id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.stages: Dict[str, float] = {}
+        self.total = 0.0
+        self._profiler = cProfile.Profile()
+        self._token = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._token = _stages.set(self.stages)
+        self._started = time.perf_counter()
+        self._profiler.enable()
+
+    def stop(self) -> None:
+        self._profiler.disable()
+        self.total = time.perf_counter() - self._started
+        _stages.reset(self._token)
+
+    def server_timing(self) -> str:
+        """
+        Formats the stage timings as a Server-Timing header value.
+
+        Returns:
+        str: Every stage and the total, in milliseconds.
+        """
+        entries = [
+            f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()
+        ]
+        entries.append(f"total;dur={self.total * 1000:.3f}")
+        return ", ".join(entries)
+
+    def save(self, request: HttpRequest, response: HttpResponse) -> str:
+        """
+        Writes the cProfile stats (.prof) and the stage timings (.json) to
+        WEATHER_PROFILING_DIR.
+
+        Parameters:
+        request (HttpRequest): The profiled request.
+        response (HttpResponse): Its response.
+
+        Returns:
+        str: The path of the stats file, readable with `python -m pstats`.
+
+        Raises:
+        OSError: If the files can't be written.
+        """
+        directory = getattr(settings, "WEATHER_PROFILING_DIR", PROFILING_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.id}.prof")
+        self._profiler.dump_stats(path)
+        summary = {
+            "id": self.id,
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "total_seconds": round(self.total, 6),
+            "stages": {name: round(value, 6) for name, value in self.stages.items()},
+        }
+        with open(os.path.join(directory, f"{self.id}.json"), "w") as file:
+            json.dump(summary, file, indent=2)
+        return path
@@ -0,0 +1,288 @@
+import asyncio
+import logging
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from weather.cache import get_version, set_version
+from weather.http import http_clients
+from weather.pipeline import FetchPipeline
+from weather.profiling import stage
+from weather.services import (
+    TWO_HOUR_CACHE_TIME,
+    DistrictService,
+    WeatherForecast,
+)
+from weather.store import Aggregate, forecast_store
+
+logger = logging.getLogger(__name__)
+
+TOP_DISTRICTS_CACHE_KEY = "top_districts_ranking"
+RANKING_REFRESH_INTERVAL = 60 * 30
+RANKING_HOUR = 14
+RANKING_DAYS = 7
+TOP_DISTRICTS_LIMIT = 10
+TOP_DISTRICTS_MAX_LIMIT = 100
+PARTIAL_RESULTS_CACHE_TIME = 60
+
+
+def partial_results_enabled() -> bool:
+    return getattr(settings, "WEATHER_PARTIAL_RESULTS", True)
+
+
+class TopDistrictRanking:
+    """Ranks every district by its average 2 PM temperature, coolest first."""
+
+    cache_key = TOP_DISTRICTS_CACHE_KEY
+    # Districts left out of the last computed ranking because their forecast failed
+    missing = 0
+
+    async def compute(self) -> List[Dict[str, Any]]:
+        """
+        Fetches the forecast of every district from upstream and ranks them.
+
+        With WEATHER_PARTIAL_RESULTS on, districts whose forecast couldn't be fetched
+        are left out instead of failing the whole ranking, and counted in `missing`.
+
+        Returns:
+        List[Dict[str, Any]]: Every district result sorted by average temperature.
+        """
+        ds = DistrictService()
+        allow_partial = partial_results_enabled()
+
+        with stage("districts"):
+            districts = await ds.aget()
+
+        if settings.WEATHER_FORECAST_BATCH_SIZE:
+            # Load every district into one matrix and rank it in a single pass
+            with stage("fetch"):
+                matrix = await forecast_store.aget(
+                    districts, days=RANKING_DAYS, allow_partial=allow_partial
+                )
+            self.missing = matrix.missing
+            with stage("rank"):
+                return matrix.rank_by_mean(RANKING_HOUR, days=RANKING_DAYS)
+
+        results, errors = [], []
+
+        # Reuse the process-wide pooled client instead of opening a new one
+        session = http_clients.get_async_client()
+        jobs = self._forecast_jobs(districts, session)
+
+        # Collect results as each upstream call finishes instead of waiting per round
+        with stage("fetch"):
+            async for job_results in FetchPipeline().stream(
+                jobs, return_exceptions=allow_partial
+            ):
+                if isinstance(job_results, Exception):
+                    errors.append(job_results)
+                else:
+                    results.extend(job_results)
+        if errors:
+            if not results:
+                raise errors[0]
+            logger.warning(
+                "%d of %d district forecasts failed, ranking the others",
+                len(errors),
+                len(districts),
+                exc_info=errors[0],
+            )
+
+        self.missing = len(errors)
+        with stage("rank"):
+            results.sort(key=lambda x: x["average_temperature"])
+        return results
+
+    def _forecast_jobs(self, districts, session):
+        return [
+            partial(self._fetch_district, WeatherForecast(district), session)
+            for district in districts
+        ]
+
+    async def _fetch_district(self, forecast, session):
+        return [await forecast.fetch_and_process(session)]
+
+    async def refresh(self) -> List[Dict[str, Any]]:
+        """
+        Recomputes the ranking and stores it in the cache, ready to be served.
+
+        A partial ranking doesn't replace a complete one that is still cached, and is
+        only cached for WEATHER_PARTIAL_RESULTS_CACHE_TIME seconds otherwise, so the
+        missing districts are fetched again soon.
+
+        Returns:
+        List[Dict[str, Any]]: The freshly computed ranking.
+        """
+        self.missing = 0
+        ranking = await self.compute()
+        # Keep the payload well past the refresh interval so a failed refresh keeps serving
+        timeout = TWO_HOUR_CACHE_TIME
+        if self.missing:
+            cached = self.get_cached()
+            if cached is not None:
+                return cached
+            timeout = getattr(
+                settings,
+                "WEATHER_PARTIAL_RESULTS_CACHE_TIME",
+                PARTIAL_RESULTS_CACHE_TIME,
+            )
+        cache.set(self.cache_key, ranking, timeout=timeout)
+        set_version(self.cache_key, ranking, timeout=timeout)
+        return ranking
+
+    def get_version(self) -> Optional[Dict[str, Any]]:
+        """
+        Reads the content version of the precomputed ranking.
+
+        Returns:
+        Optional[Dict[str, Any]]: The version stamp, or None if it hasn't been computed yet.
+        """
+        return get_version(self.cache_key)
+
+    def lifetime(self) -> int:
+        """
+        Seconds a computed ranking is served before it is computed again.
+
+        Returns:
+        int: The refresh interval with the background refresh on, the cache timeout
+            otherwise.
+        """
+        if settings.WEATHER_RANKING_BACKGROUND_REFRESH:
+            return getattr(
+                settings, "WEATHER_RANKING_REFRESH_INTERVAL", RANKING_REFRESH_INTERVAL
+            )
+        return TWO_HOUR_CACHE_TIME
+
+    def get_cached(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Reads the precomputed ranking from the cache.
+
+        Returns:
+        Optional[List[Dict[str, Any]]]: The ranking, or None if it hasn't been computed yet.
+        """
+        return cache.get(self.cache_key)
+
+    async def aget(self) -> List[Dict[str, Any]]:
+        """
+        Returns the precomputed ranking, computing it inline when the cache is cold.
+
+        Returns:
+        List[Dict[str, Any]]: Every district result sorted by average temperature.
+        """
+        ranking = self.get_cached()
+        if ranking is not None:
+            return ranking
+        return await self.refresh()
+
+    @staticmethod
+    def precomputed(hour: int, days: int, aggregate: str) -> bool:
+        """Tells whether a variant is served from the precomputed ranking."""
+        return (hour, days, aggregate) == (RANKING_HOUR, RANKING_DAYS, Aggregate.MEAN)
+
+    async def atop(
+        self,
+        hour: int = RANKING_HOUR,
+        days: int = RANKING_DAYS,
+        aggregate: str = Aggregate.MEAN,
+        limit: int = TOP_DISTRICTS_LIMIT,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the `limit` coolest districts by an aggregate of the temperature at `hour`.
+
+        The default ranking is served from its precomputed copy. Any other variant is
+        computed from the forecast matrix of the ranking window, so it never costs
+        more upstream calls than the default one.
+
+        Parameters:
+        hour (int): Hour of the day, 0-23. Defaults to 2 PM.
+        days (int): Number of days to aggregate, at most RANKING_DAYS.
+        aggregate (str): One of "mean", "median", "min" or "max".
+        limit (int): Number of districts to return. Defaults to 10.
+
+        Returns:
+        List[Dict[str, Any]]: The district name and its aggregated temperature, coolest first.
+        """
+        if self.precomputed(hour, days, aggregate):
+            ranking = await self.aget()
+            return ranking[:limit]
+
+        with stage("districts"):
+            districts = await DistrictService().aget()
+        with stage("fetch"):
+            matrix = await forecast_store.aget(
+                districts, days=RANKING_DAYS, allow_partial=partial_results_enabled()
+            )
+        with stage("rank"):
+            return matrix.top(hour, days=days, aggregate=aggregate, limit=limit)
+
+
+class RankingRefresher:
+    def __init__(self, ranking: TopDistrictRanking = None, interval: int = None):
+        """
+        Initializes the RankingRefresher which keeps the cached ranking fresh from a
+        background asyncio task.
+
+        Parameters:
+        ranking (TopDistrictRanking): The ranking to refresh. Defaults to a new instance.
+        interval (int): Seconds between refreshes. Defaults to the
+            WEATHER_RANKING_REFRESH_INTERVAL setting.
+        """
+        self.ranking = ranking or TopDistrictRanking()
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_interval(self) -> int:
+        if self.interval is not None:
+            return self.interval
+        return getattr(
+            settings, "WEATHER_RANKING_REFRESH_INTERVAL", RANKING_REFRESH_INTERVAL
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, immediate: bool = True) -> asyncio.Task:
+        """
+        Starts the refresh loop on the running event loop, unless it is already running.
+
+        Parameters:
+        immediate (bool): Refresh right away instead of waiting for the first interval.
+
+        Returns:
+        asyncio.Task: The background refresh task.
+        """
+        loop = asyncio.get_running_loop()
+        # A task left behind by a closed loop can never run again, so replace it too
+        if not self.running or self._task.get_loop() is not loop:
+            self._task = loop.create_task(
+                self._run(immediate), name="top-districts-refresher"
+            )
+        return self._task
+
+    async def stop(self) -> None:
+        """Cancels the refresh loop and waits for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, immediate: bool) -> None:
+        if not immediate:
+            await asyncio.sleep(self._get_interval())
+        while True:
+            try:
+                await self.ranking.refresh()
+            except Exception:
+                # Keep serving the previous ranking and try again on the next tick
+                logger.exception("Failed to refresh the top districts ranking")
+            await asyncio.sleep(self._get_interval())
+
+
+ranking_refresher = RankingRefresher()
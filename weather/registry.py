@@ -0,0 +1,204 @@
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from weather.services import TWO_HOUR_CACHE_TIME, DistrictService
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vector(lat: float, long: float) -> np.ndarray:
+    """
+    Projects a coordinate onto the unit sphere.
+
+    The straight-line distance between two projected points grows with their
+    great-circle distance, so the nearest point in 3-d is also the nearest on Earth.
+    """
+    phi, lam = math.radians(lat), math.radians(long)
+    return np.array(
+        [math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)]
+    )
+
+
+def chord_to_km(chord: float) -> float:
+    return 2 * math.asin(min(1.0, chord / 2)) * EARTH_RADIUS_KM
+
+
+class KDTree:
+    """A static 3-d tree for nearest neighbour lookups."""
+
+    def __init__(self, points: np.ndarray) -> None:
+        self.points = points
+        self._root = self._build(np.arange(len(points)), depth=0)
+
+    def _build(self, indices: np.ndarray, depth: int):
+        if len(indices) == 0:
+            return None
+        axis = depth % 3
+        ordered = indices[np.argsort(self.points[indices, axis], kind="stable")]
+        mid = len(ordered) // 2
+        return (
+            int(ordered[mid]),
+            axis,
+            self._build(ordered[:mid], depth + 1),
+            self._build(ordered[mid + 1 :], depth + 1),
+        )
+
+    def nearest(self, point: np.ndarray) -> Tuple[int, float]:
+        """
+        Finds the stored point closest to `point`.
+
+        Parameters:
+        point (numpy.ndarray): The query point.
+
+        Returns:
+        Tuple[int, float]: The index of the closest point and its Euclidean distance.
+        """
+        best_index, best_distance = -1, math.inf
+
+        def visit(node) -> None:
+            nonlocal best_index, best_distance
+            if node is None:
+                return
+            index, axis, left, right = node
+            distance = float(np.sum((self.points[index] - point) ** 2))
+            if distance < best_distance:
+                best_index, best_distance = index, distance
+
+            diff = point[axis] - self.points[index, axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            # Only cross the splitting plane when it is closer than the best match
+            if diff * diff < best_distance:
+                visit(far)
+
+        visit(self._root)
+        return best_index, math.sqrt(best_distance)
+
+
+class DistrictRegistry:
+    def __init__(self, districts: List[Dict[str, str]]) -> None:
+        """
+        Initializes the DistrictRegistry with constant time lookups by id and name
+        and a spatial index over the district coordinates.
+
+        Parameters:
+        districts (List[Dict[str, str]]): District data as returned by DistrictService.
+        """
+        self.districts = districts
+        self._by_id = {int(district["id"]): district for district in districts}
+        self._by_name = {
+            district["name"].casefold(): district for district in districts
+        }
+        self._tree = (
+            KDTree(
+                np.array(
+                    [
+                        to_unit_vector(float(district["lat"]), float(district["long"]))
+                        for district in districts
+                    ]
+                )
+            )
+            if districts
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.districts)
+
+    def get(self, district_id) -> Optional[Dict[str, str]]:
+        """
+        Looks a district up by id.
+
+        Parameters:
+        district_id (int | str): The district id.
+
+        Returns:
+        Optional[Dict[str, str]]: The district, or None if it doesn't exist.
+        """
+        return self._by_id.get(int(district_id))
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, str]]:
+        """
+        Looks a district up by its English name, ignoring case.
+
+        Parameters:
+        name (str): The district name.
+
+        Returns:
+        Optional[Dict[str, str]]: The district, or None if it doesn't exist.
+        """
+        return self._by_name.get(name.casefold())
+
+    def nearest(self, lat: float, long: float) -> Tuple[Dict[str, str], float]:
+        """
+        Finds the district closest to a coordinate.
+
+        Parameters:
+        lat (float): Latitude in degrees.
+        long (float): Longitude in degrees.
+
+        Returns:
+        Tuple[Dict[str, str], float]: The district and its great-circle distance in km.
+
+        Raises:
+        LookupError: If the registry has no districts.
+        """
+        if self._tree is None:
+            raise LookupError("No districts available")
+        index, chord = self._tree.nearest(to_unit_vector(lat, long))
+        return self.districts[index], chord_to_km(chord)
+
+
+class _RegistryHolder:
+    """Keeps one registry per process and rebuilds it when the district data expires."""
+
+    def __init__(self) -> None:
+        self._registry: Optional[DistrictRegistry] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._registry is not None and time.monotonic() < self._expires_at
+
+    def _store(self, districts: List[Dict[str, str]]) -> DistrictRegistry:
+        with self._lock:
+            self._registry = DistrictRegistry(districts)
+            self._expires_at = time.monotonic() + TWO_HOUR_CACHE_TIME
+            return self._registry
+
+    def get(self) -> DistrictRegistry:
+        if self._is_fresh():
+            return self._registry
+        return self._store(DistrictService().get())
+
+    async def aget(self) -> DistrictRegistry:
+        if self._is_fresh():
+            return self._registry
+        return self._store(await DistrictService().aget())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._registry = None
+            self._expires_at = 0.0
+
+
+_holder = _RegistryHolder()
+
+
+def get_registry() -> DistrictRegistry:
+    """Returns the process-wide district registry, building it on first use."""
+    return _holder.get()
+
+
+async def aget_registry() -> DistrictRegistry:
+    """Returns the process-wide district registry, building it on first use Async Way."""
+    return await _holder.aget()
+
+
+def reset_registry() -> None:
+    """Drops the process-wide district registry so the next lookup rebuilds it."""
+    _holder.reset()
@@ -0,0 +1,132 @@
+"""
+Fast JSON rendering for the weather endpoints.
+
+`FastJSONRenderer` produces the same camelCase JSON as
+`djangorestframework_camel_case`'s renderer, but converts every key once and keeps
+the result, and encodes with `orjson`. Payloads that are already JSON are written
+out as they are.
+"""
+
+from typing import Any, Dict, Optional
+
+import orjson
+from djangorestframework_camel_case.util import camelize_re, underscore_to_camel
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from weather.cache import LRUCache
+
+JSON_CONTENT_TYPE = "application/json"
+# Keys seen in responses are few, but error payloads may echo arbitrary input
+CAMEL_KEYS_MAX_ENTRIES = 4096
+RENDERED_RESPONSES_MAX_ENTRIES = 64
+
+_camel_keys: Dict[str, str] = {}
+_encoder = JSONEncoder()
+
+
+class RenderedJSON(bytes):
+    """A payload that is already encoded JSON, such as a cached response body."""
+
+
+def camel_key(key: str) -> str:
+    """
+    Converts a snake_case key to camelCase, like `djangorestframework_camel_case`.
+
+    Parameters:
+    key (str): The key.
+
+    Returns:
+    str: The camelCase key.
+    """
+    try:
+        return _camel_keys[key]
+    except KeyError:
+        pass
+    converted = camelize_re.sub(underscore_to_camel, key) if "_" in key else key
+    if len(_camel_keys) < CAMEL_KEYS_MAX_ENTRIES:
+        _camel_keys[key] = converted
+    return converted
+
+
+def precompute_camel_keys(*serializer_classes) -> None:
+    """
+    Converts the field names of response serializers, nested ones included, up front.
+
+    Parameters:
+    *serializer_classes: The serializer classes.
+    """
+    pending = [serializer_class() for serializer_class in serializer_classes]
+    while pending:
+        serializer = pending.pop()
+        # List serializers carry the item serializer as their child
+        serializer = getattr(serializer, "child", serializer)
+        for name, field in getattr(serializer, "fields", {}).items():
+            camel_key(name)
+            pending.append(field)
+
+
+def camelize(data: Any) -> Any:
+    """Re-keys dictionaries, nested ones included, to camelCase."""
+    if isinstance(data, dict):
+        return {
+            camel_key(key) if isinstance(key, str) else key: camelize(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [camelize(item) for item in data]
+    return data
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encodes data as compact UTF-8 JSON.
+
+    Types JSON has no notion of, such as decimals or lazy strings, are encoded like
+    Django REST framework does.
+
+    Parameters:
+    data (Any): The data.
+
+    Returns:
+    bytes: The JSON document.
+    """
+    return orjson.dumps(
+        data,
+        default=_encoder.default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+class RenderedResponses:
+    """
+    Response bodies rendered from versioned data, by ETag.
+
+    As the ETag changes with the data, a hit can be written out without rendering.
+    """
+
+    def __init__(self, max_entries: int = RENDERED_RESPONSES_MAX_ENTRIES) -> None:
+        self._cache = LRUCache(max_entries=max_entries)
+
+    def get(self, etag: str) -> Optional[RenderedJSON]:
+        return self._cache.get_many([etag]).get(etag)
+
+    def set(self, etag: str, body: bytes, timeout: float) -> None:
+        self._cache.set_many({etag: RenderedJSON(body)}, timeout=timeout)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+rendered_responses = RenderedResponses()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """camelCase JSON renderer for the weather endpoints."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+        if isinstance(data, RenderedJSON):
+            return bytes(data)
+        return dumps(camelize(data))
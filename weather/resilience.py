@@ -0,0 +1,313 @@
+"""
+Retries, circuit breaking and hedging for upstream GET requests.
+
+`upstream.aget(session, url)` and `upstream.get(session, url)` replace a plain
+`session.get(url)`:
+
+- transport errors and retryable statuses (429 and 5xx) are retried with full
+  jitter exponential backoff, up to WEATHER_UPSTREAM_RETRIES times;
+- every host has a circuit breaker which opens after
+  WEATHER_CIRCUIT_BREAKER_THRESHOLD consecutive failures, so calls fail fast with
+  `UpstreamUnavailableException` until a trial call succeeds
+  WEATHER_CIRCUIT_BREAKER_RESET seconds later;
+- with WEATHER_HEDGE_REQUESTS on, a duplicate request is sent once the first one
+  took longer than the WEATHER_HEDGE_PERCENTILE latency of its host, and the first
+  good answer wins.
+
+Once the retries are used up the last response is returned, so callers keep their
+own status handling.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+import numpy as np
+from django.conf import settings
+
+from weather import metrics
+from weather.exceptions import UpstreamUnavailableException
+
+UPSTREAM_RETRIES = 2
+UPSTREAM_RETRY_BACKOFF = 0.2
+UPSTREAM_RETRY_BACKOFF_MAX = 2.0
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET = 30
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 256
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def is_retryable(response: httpx.Response) -> bool:
+    return response.status_code in RETRYABLE_STATUSES
+
+
+def backoff(attempt: int) -> float:
+    """
+    Seconds to wait before retry number `attempt`, with full jitter.
+
+    Parameters:
+    attempt (int): The retry, starting at 0.
+
+    Returns:
+    float: A random delay up to the exponential backoff of this retry.
+    """
+    base = _setting("WEATHER_UPSTREAM_RETRY_BACKOFF", UPSTREAM_RETRY_BACKOFF)
+    ceiling = _setting("WEATHER_UPSTREAM_RETRY_BACKOFF_MAX", UPSTREAM_RETRY_BACKOFF_MAX)
+    return random.uniform(0, min(ceiling, base * 2**attempt))
+
+
+class CircuitBreaker:
+    """
+    Stops calling a host after consecutive failures.
+
+    Closed, calls go through. After `threshold` consecutive failures it opens and
+    calls fail fast. `reset_timeout` seconds later one trial call is let through,
+    its success closes the breaker again and its failure reopens it.
+    """
+
+    def __init__(self, threshold: int = None, reset_timeout: float = None) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _get_threshold(self) -> int:
+        if self.threshold is not None:
+            return self.threshold
+        return _setting("WEATHER_CIRCUIT_BREAKER_THRESHOLD", CIRCUIT_BREAKER_THRESHOLD)
+
+    def _get_reset_timeout(self) -> float:
+        if self.reset_timeout is not None:
+            return self.reset_timeout
+        return _setting("WEATHER_CIRCUIT_BREAKER_RESET", CIRCUIT_BREAKER_RESET)
+
+    @property
+    def open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """
+        Tells whether a call may go through, letting one trial call pass once open
+        long enough.
+
+        Returns:
+        bool: False while the breaker is open.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial_running:
+                return False
+            if time.monotonic() - self.opened_at < self._get_reset_timeout():
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self) -> None:
+        """Lets another trial call through after one ended without an answer."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self._get_threshold():
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class Upstream:
+    """Sends upstream GET requests with retries, per-host circuit breakers and hedging."""
+
+    def __init__(self) -> None:
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """
+        Seconds after which a duplicate request is sent to `host`.
+
+        Returns:
+        Optional[float]: The WEATHER_HEDGE_PERCENTILE latency of the host, or None
+            with hedging off or too few latencies recorded yet.
+        """
+        if not _setting("WEATHER_HEDGE_REQUESTS", False):
+            return None
+        latencies = self._latencies.get(host)
+        if not latencies or len(latencies) < _setting(
+            "WEATHER_HEDGE_MIN_SAMPLES", HEDGE_MIN_SAMPLES
+        ):
+            return None
+        percentile = _setting("WEATHER_HEDGE_PERCENTILE", HEDGE_PERCENTILE)
+        return float(np.percentile(latencies, percentile))
+
+    def _record_latency(self, host: str, seconds: float) -> None:
+        with self._lock:
+            if host not in self._latencies:
+                self._latencies[host] = deque(maxlen=LATENCY_WINDOW)
+            self._latencies[host].append(seconds)
+
+    def _check(self, host: str) -> CircuitBreaker:
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            metrics.upstream_rejected.inc(host=host)
+            raise UpstreamUnavailableException(f"{host} is failing, not calling it")
+        return breaker
+
+    def _record(self, host: str, breaker: CircuitBreaker, response, started) -> None:
+        if is_retryable(response):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+            self._record_latency(host, time.perf_counter() - started)
+
+    def _give_up(self, host: str, attempt: int, retries: int) -> bool:
+        # No retry left, or the failure just opened the breaker
+        return attempt >= retries or self.breaker(host).open
+
+    async def _send(self, session: httpx.AsyncClient, url: str) -> httpx.Response:
+        host = httpx.URL(url).host
+        breaker = self._check(host)
+        started = time.perf_counter()
+        try:
+            response = await session.get(url)
+        except httpx.TransportError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled by a timeout, a hedge or a disconnect, the host didn't fail
+            breaker.release()
+            raise
+        self._record(host, breaker, response, started)
+        return response
+
+    async def _hedged(
+        self, send: Callable[[], Awaitable[httpx.Response]], host: str
+    ) -> httpx.Response:
+        delay = self.hedge_delay(host)
+        if delay is None:
+            return await send()
+
+        pending = {asyncio.ensure_future(send())}
+        result = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return done.pop().result()
+
+            metrics.upstream_hedges.inc(host=host)
+            pending.add(asyncio.ensure_future(send()))
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None and not is_retryable(task.result()):
+                        return task.result()
+                    result = task
+            # Neither answer was good, report the last one like a single request
+            return result.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aget(self, session: httpx.AsyncClient, url: str) -> httpx.Response:
+        """
+        Sends a GET request with retries, circuit breaking and hedging.
+
+        Parameters:
+        session (httpx.AsyncClient): The HTTP client session used for making requests.
+        url (str): The URL.
+
+        Returns:
+        httpx.Response: The first good response, or the last one once the retries
+            are used up.
+
+        Raises:
+        UpstreamUnavailableException: If the host's circuit breaker is open.
+        httpx.TransportError: If the last attempt could not reach the host.
+        """
+        host = httpx.URL(url).host
+        retries = _setting("WEATHER_UPSTREAM_RETRIES", UPSTREAM_RETRIES)
+        for attempt in range(retries + 1):
+            try:
+                response = await self._hedged(lambda: self._send(session, url), host)
+            except httpx.TransportError:
+                if self._give_up(host, attempt, retries):
+                    raise
+            else:
+                if not is_retryable(response) or self._give_up(host, attempt, retries):
+                    return response
+            metrics.upstream_retries.inc(host=host)
+            await asyncio.sleep(backoff(attempt))
+
+    def get(self, session: httpx.Client, url: str) -> httpx.Response:
+        """
+        Sends a GET request with retries and circuit breaking, without hedging.
+
+        Parameters:
+        session (httpx.Client): The HTTP client session used for making requests.
+        url (str): The URL.
+
+        Returns:
+        httpx.Response: The first good response, or the last one once the retries
+            are used up.
+
+        Raises:
+        UpstreamUnavailableException: If the host's circuit breaker is open.
+        httpx.TransportError: If the last attempt could not reach the host.
+        """
+        host = httpx.URL(url).host
+        retries = _setting("WEATHER_UPSTREAM_RETRIES", UPSTREAM_RETRIES)
+        for attempt in range(retries + 1):
+            breaker = self._check(host)
+            started = time.perf_counter()
+            try:
+                response = session.get(url)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if self._give_up(host, attempt, retries):
+                    raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                self._record(host, breaker, response, started)
+                if not is_retryable(response) or self._give_up(host, attempt, retries):
+                    return response
+            metrics.upstream_retries.inc(host=host)
+            time.sleep(backoff(attempt))
+
+    def reset(self) -> None:
+        """Closes every circuit breaker and forgets the recorded latencies."""
+        with self._lock:
+            self._breakers.clear()
+            self._latencies.clear()
+
+
+upstream = Upstream()
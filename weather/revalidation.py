@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from django.conf import settings
+
+from weather.singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+REVALIDATE_RETRY_BACKOFF = 30
+
+
+class Revalidator:
+    """
+    Refreshes stale cache entries in the background.
+
+    Callers serve the stale value straight away and hand the reload to this class.
+    Refreshes go through `single_flight` under the same key as foreground loads, so
+    a stale entry is only ever reloaded once at a time. Failures are logged and the
+    stale value keeps being served until the cache evicts it.
+
+    A key already being refreshed isn't scheduled again, and after a failed refresh
+    it isn't retried for WEATHER_REVALIDATE_RETRY_BACKOFF seconds, so stale hits
+    don't pile up tasks, threads or upstream calls while upstream is down.
+    """
+
+    def __init__(self) -> None:
+        # Keeps a strong reference so pending refreshes aren't garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+        self._running: Set[Hashable] = set()
+        self._failed_at: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def _claim(self, key: Hashable) -> bool:
+        backoff = getattr(
+            settings, "WEATHER_REVALIDATE_RETRY_BACKOFF", REVALIDATE_RETRY_BACKOFF
+        )
+        with self._lock:
+            if key in self._running:
+                return False
+            failed_at = self._failed_at.get(key)
+            if failed_at is not None and time.monotonic() - failed_at < backoff:
+                return False
+            self._running.add(key)
+            return True
+
+    def _release(self, key: Hashable, failed: bool) -> None:
+        with self._lock:
+            self._running.discard(key)
+            if failed:
+                self._failed_at[key] = time.monotonic()
+            else:
+                self._failed_at.pop(key, None)
+
+    def schedule(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Optional[asyncio.Task]:
+        """
+        Refreshes `key` on the running event loop without waiting for it.
+
+        Parameters:
+        key (Hashable): Identifies the upstream resource being reloaded.
+        fn (Callable): Zero-argument callable returning an awaitable that reloads and caches it.
+
+        Returns:
+        Optional[asyncio.Task]: The refresh task, or None if `key` is already being
+            refreshed or its last refresh failed too recently.
+        """
+        if not self._claim(key):
+            return None
+        task = asyncio.get_running_loop().create_task(
+            self._arefresh(key, fn), name=f"revalidate:{key}"
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def schedule_sync(
+        self, key: Hashable, fn: Callable[[], Any]
+    ) -> Optional[threading.Thread]:
+        """
+        Refreshes `key` on a daemon thread without waiting for it.
+
+        Parameters:
+        key (Hashable): Identifies the upstream resource being reloaded.
+        fn (Callable): Zero-argument callable that reloads and caches it.
+
+        Returns:
+        Optional[threading.Thread]: The refresh thread, or None if `key` is already
+            being refreshed or its last refresh failed too recently.
+        """
+        if not self._claim(key):
+            return None
+        thread = threading.Thread(
+            target=self._refresh, args=(key, fn), name=f"revalidate:{key}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    async def _arefresh(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> None:
+        failed = True
+        try:
+            await single_flight.ado(key, fn)
+            failed = False
+        except Exception:
+            logger.exception("Failed to refresh stale entry %s", key)
+        finally:
+            self._release(key, failed)
+
+    def _refresh(self, key: Hashable, fn: Callable[[], Any]) -> None:
+        failed = True
+        try:
+            single_flight.do(key, fn)
+            failed = False
+        except Exception:
+            logger.exception("Failed to refresh stale entry %s", key)
+        finally:
+            self._release(key, failed)
+
+    async def wait(self) -> None:
+        """Waits for the refreshes pending on the running event loop."""
+        loop = asyncio.get_running_loop()
+        pending = [task for task in self._tasks if task.get_loop() is loop]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def cancel(self) -> None:
+        """Cancels the refreshes pending on the running event loop."""
+        loop = asyncio.get_running_loop()
+        pending = [task for task in self._tasks if task.get_loop() is loop]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def reset(self) -> None:
+        """Forgets the failed refreshes, so every key may be refreshed right away."""
+        with self._lock:
+            self._failed_at.clear()
+
+
+revalidator = Revalidator()
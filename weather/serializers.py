@@ -1,12 +1,31 @@
+from django.conf import settings
 from django.db.models import TextChoices
 from rest_framework import serializers as sz
 
+from weather.ranking import (
+    RANKING_DAYS,
+    RANKING_HOUR,
+    TOP_DISTRICTS_LIMIT,
+    TOP_DISTRICTS_MAX_LIMIT,
+)
+from weather.renderers import precompute_camel_keys
+from weather.store import Aggregate
+
 
 class TravelDecisionEnum(TextChoices):
     YES = "Can Visit"
     NO = "Shouldn't visit"
 
 
+class TopDistrictQuerySerializer(sz.Serializer):
+    hour = sz.IntegerField(default=RANKING_HOUR, min_value=0, max_value=23)
+    days = sz.IntegerField(default=RANKING_DAYS, min_value=1, max_value=RANKING_DAYS)
+    aggregate = sz.ChoiceField(choices=list(Aggregate), default=Aggregate.MEAN)
+    limit = sz.IntegerField(
+        default=TOP_DISTRICTS_LIMIT, min_value=1, max_value=TOP_DISTRICTS_MAX_LIMIT
+    )
+
+
 class TravelDecisionInSerializer(sz.Serializer):
     current_district_id = sz.IntegerField(required=True)
     dest_district_id = sz.IntegerField(required=True)
@@ -16,3 +35,64 @@ class TravelDecisionInSerializer(sz.Serializer):
 class TravelDecisionOutSerializer(sz.Serializer):
     travel_date = sz.DateField()
     decisition = sz.ChoiceField(choices=TravelDecisionEnum.choices)
+
+
+class TravelDecisionBulkInSerializer(sz.Serializer):
+    items = TravelDecisionInSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.WEATHER_TRAVEL_BULK_MAX_ITEMS,
+    )
+
+
+class TravelDecisionBulkItemSerializer(sz.Serializer):
+    current_district_id = sz.IntegerField()
+    dest_district_id = sz.IntegerField()
+    travel_date = sz.DateField()
+    decision = sz.ChoiceField(choices=TravelDecisionEnum.choices)
+
+
+class TravelDecisionBulkOutSerializer(sz.Serializer):
+    results = TravelDecisionBulkItemSerializer(many=True)
+
+
+class TravelDecisionMatrixInSerializer(sz.Serializer):
+    travel_date = sz.DateField(required=True)
+    current_district_id = sz.IntegerField(required=False)
+
+
+class TravelDecisionMatrixOutSerializer(sz.Serializer):
+    travel_date = sz.DateField()
+    district_ids = sz.ListField(child=sz.IntegerField())
+    temperatures = sz.ListField(child=sz.FloatField())
+    origins = sz.ListField(child=sz.IntegerField())
+    rows = sz.ListField(
+        child=sz.CharField(),
+        help_text="One string per origin, character j is 1 when district_ids[j] can be visited.",
+    )
+
+
+class NearestDistrictInSerializer(sz.Serializer):
+    lat = sz.FloatField(required=True, min_value=-90, max_value=90)
+    long = sz.FloatField(required=True, min_value=-180, max_value=180)
+
+
+class DistrictSerializer(sz.Serializer):
+    id = sz.IntegerField()
+    name = sz.CharField()
+    lat = sz.FloatField()
+    long = sz.FloatField()
+
+
+class NearestDistrictOutSerializer(sz.Serializer):
+    district = DistrictSerializer()
+    distance_km = sz.FloatField()
+
+
+# Convert the response keys to camelCase once, instead of on every response
+precompute_camel_keys(
+    TravelDecisionOutSerializer,
+    TravelDecisionBulkOutSerializer,
+    TravelDecisionMatrixOutSerializer,
+    NearestDistrictOutSerializer,
+)
@@ -1,16 +1,62 @@
+import json
+import logging
 from datetime import datetime, timedelta
+from functools import partial
 from io import StringIO
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import httpx
-import pandas as pd
-from django.core.cache import cache
+from django.conf import settings
 from rest_framework import status
 
-from weather.exceptions import RemoteCallException
+from weather import archive, metrics
+from weather.cache import (
+    forecast_cache,
+    get_many_with_staleness,
+    get_version,
+    max_staleness,
+    set_many_with_staleness,
+    set_version,
+)
+from weather.exceptions import (
+    RemoteCallException,
+    UpstreamRejectedException,
+    UpstreamUnavailableException,
+)
+from weather.executor import parse_executor
+from weather.http import http_clients
+from weather.parsers import (
+    average_at_hour,
+    parse_csv_temperatures,
+    parse_json_locations,
+)
+from weather.pipeline import FetchPipeline
+from weather.resilience import is_retryable, upstream
+from weather.revalidation import revalidator
+from weather.singleflight import single_flight
+
+logger = logging.getLogger(__name__)
 
 DISTRICT_CALL_URL = "https://raw.githubusercontent.com/strativ-dev/technical-screening-test/main/bd-districts.json"
+FORECAST_API_URL = "https://api.open-meteo.com/v1/forecast"
 TWO_HOUR_CACHE_TIME = 60 * 60 * 2
+DISTRICTS_CACHE_KEY = "districts_data"
+FORECAST_BATCH_SIZE = 50
+PARSER_ENGINE = "numpy"
+
+
+def districts_error(response: httpx.Response) -> RemoteCallException:
+    """
+    Maps a failed districts API response to the error reported to the client.
+
+    Returns:
+    RemoteCallException: `UpstreamUnavailableException` (503) when the failure is
+        retryable, `UpstreamRejectedException` (502) otherwise.
+    """
+    detail = "Couldn't Fetch Data for Districts API"
+    if is_retryable(response):
+        return UpstreamUnavailableException(detail)
+    return UpstreamRejectedException(detail)
 
 
 class DistrictService:
@@ -36,24 +82,42 @@ class DistrictService:
         RemoteCallException: If the API call fails to fetch the district data.
         """
         # Check if the district data is available in the cache
-        cached_districts = cache.get("districts_data")
+        cached_districts, stale = self._get_cached()
         if cached_districts is not None:
+            if stale:
+                # Serve the expired copy now and reload it in the background
+                revalidator.schedule(DISTRICTS_CACHE_KEY, self._afetch)
             return cached_districts
 
-        # If not cached, fetch the data from the remote API
-        async with httpx.AsyncClient() as session:
-            response = await session.get(self.url)
+        # Concurrent misses share one download instead of all hitting the remote API
+        return await single_flight.ado(DISTRICTS_CACHE_KEY, self._afetch)
 
-            if response.status_code != status.HTTP_200_OK:
-                raise RemoteCallException("Couldn't Fetch Data for Districts API")
-            # Parse the response JSON to extract district data
-            districts_data = response.json().get("districts", [])
+    async def _afetch(self) -> List[Dict[str, str]]:
+        try:
+            districts_data = await self._adownload()
+        except (RemoteCallException, httpx.HTTPError):
+            # Serve the archived copy while upstream is unavailable
+            districts_data = await archive.aload_districts()
+            if not districts_data:
+                raise
+            self.cache_districts(districts_data, timeout=0)
+            return districts_data
 
-        # Cache the fetched district data for 2 hours
-        cache.set("districts_data", districts_data, timeout=TWO_HOUR_CACHE_TIME)
+        self.cache_districts(districts_data)
+        archive.save_in_background(archive.save_districts, districts_data)
 
         return districts_data
 
+    async def _adownload(self) -> List[Dict[str, str]]:
+        # Fetch the data from the remote API over the shared connection pool
+        session = http_clients.get_async_client()
+        response = await upstream.aget(session, self.url)
+
+        if response.status_code != status.HTTP_200_OK:
+            raise districts_error(response)
+        # Parse the response JSON to extract district data
+        return response.json().get("districts", [])
+
     def get(self) -> List[Dict[str, str]]:
         """
         Fetches the list of districts from the API or cache.
@@ -65,47 +129,108 @@ class DistrictService:
         RemoteCallException: If the API call fails to fetch the district data.
         """
         # Check if the district data is available in the cache
-        cached_districts = cache.get("districts_data")
+        cached_districts, stale = self._get_cached()
         if cached_districts is not None:
+            if stale:
+                # Serve the expired copy now and reload it in the background
+                revalidator.schedule_sync(DISTRICTS_CACHE_KEY, self._fetch)
             return cached_districts
 
-        # If not cached, fetch the data from the remote API
-        with httpx.Client() as session:
-            response = session.get(self.url)
+        # Concurrent misses share one download instead of all hitting the remote API
+        return single_flight.do(DISTRICTS_CACHE_KEY, self._fetch)
 
-            if response.status_code != status.HTTP_200_OK:
-                raise RemoteCallException("Couldn't Fetch Data for Districts API")
-            # Parse the response JSON to extract district data
-            districts_data = response.json().get("districts", [])
+    def _fetch(self) -> List[Dict[str, str]]:
+        try:
+            districts_data = self._download()
+        except (RemoteCallException, httpx.HTTPError):
+            # Serve the archived copy while upstream is unavailable
+            districts_data = archive.load_quietly(archive.load_districts, default=[])
+            if not districts_data:
+                raise
+            self.cache_districts(districts_data, timeout=0)
+            return districts_data
 
-        # Cache the fetched district data for 2 hours
-        cache.set("districts_data", districts_data, timeout=TWO_HOUR_CACHE_TIME)
+        self.cache_districts(districts_data)
+        archive.save_quietly(archive.save_districts, districts_data)
 
         return districts_data
 
+    def _download(self) -> List[Dict[str, str]]:
+        # Fetch the data from the remote API over the shared connection pool
+        session = http_clients.get_client()
+        response = upstream.get(session, self.url)
+
+        if response.status_code != status.HTTP_200_OK:
+            raise districts_error(response)
+        # Parse the response JSON to extract district data
+        return response.json().get("districts", [])
+
+    def _get_cached(self):
+        entries, stale = get_many_with_staleness([DISTRICTS_CACHE_KEY])
+        districts = entries.get(DISTRICTS_CACHE_KEY)
+        metrics.record_cache_lookup("districts", districts is not None, stale)
+        return districts, stale
+
+    def cache_districts(
+        self, districts_data: List[Dict[str, str]], timeout: int = TWO_HOUR_CACHE_TIME
+    ) -> None:
+        """
+        Stores the district list in the cache.
+
+        Parameters:
+        districts_data (List[Dict[str, str]]): The district data.
+        timeout (int): Seconds it is fresh before being served stale while it is
+            refreshed. Defaults to 2 hours, 0 caches it as already stale.
+        """
+        set_many_with_staleness({DISTRICTS_CACHE_KEY: districts_data}, timeout=timeout)
+        set_version(
+            DISTRICTS_CACHE_KEY, districts_data, timeout=timeout + max_staleness()
+        )
+
+    def get_version(self) -> Optional[Dict[str, Any]]:
+        """
+        Reads the content version of the cached district list.
+
+        Returns:
+        Optional[Dict[str, Any]]: The version stamp, or None if nothing is cached.
+        """
+        return get_version(DISTRICTS_CACHE_KEY)
+
 
 class WeatherForecast:
-    def __init__(self, district, days=7, mode="csv"):
+    def __init__(self, district, days=7, mode="csv", engine=None, start_date=None):
         """
         Initializes the WeatherForecast instance with district data and constructs the API URL.
 
         Parameters:
         district (dict): A dictionary containing district information including latitude and longitude.
+        engine (str): Forecast parsing engine, "numpy" or "pandas". Defaults to the
+            WEATHER_PARSER_ENGINE setting.
+        start_date (str | date): First forecast day. Defaults to today.
         """
         self.district = district
         self.days = days
         self.mode = mode
+        self.engine = engine or getattr(
+            settings, "WEATHER_PARSER_ENGINE", PARSER_ENGINE
+        )
         # Calculate the start and end dates for the weather forecast (7-day period)
-        start_day = datetime.today()
+        if start_date is None:
+            start_day = datetime.today()
+        elif isinstance(start_date, str):
+            start_day = datetime.strptime(start_date, "%Y-%m-%d")
+        else:
+            start_day = start_date
         end_day = start_day + timedelta(days=self.days)
-        start_day_str = start_day.strftime("%Y-%m-%d")
-        end_day_str = end_day.strftime("%Y-%m-%d")
+        self._set_period(start_day.strftime("%Y-%m-%d"), end_day.strftime("%Y-%m-%d"))
+
+    def _set_period(self, start_day_str, end_day_str):
+        self.start_day_str = start_day_str
+        self.end_day_str = end_day_str
 
         # Construct the API URL with the required parameters for the specified date range and location
-        self.api_url = (
-            f"https://api.open-meteo.com/v1/forecast?latitude={self.district['lat']}"
-            f"&longitude={self.district['long']}&start_date={start_day_str}"
-            f"&end_date={end_day_str}&hourly=temperature_2m&timezone=Asia/Dhaka&format={self.mode}"
+        self.api_url = build_forecast_url(
+            [self.district], self.start_day_str, self.end_day_str, self.mode
         )
 
     async def _download_csv_data(self, session):
@@ -118,25 +243,43 @@ class WeatherForecast:
         Returns:
         str: The CSV data as a string.
         """
-        response = await session.get(self.api_url)
+        response = await upstream.aget(session, self.api_url)
         response.raise_for_status()
         return response.text
 
-    def _get_2pm_rows(self, csv_data):
+    def _read_csv(self, csv_data):
         """
-        Filters the CSV data to extract rows corresponding to 2 PM.
+        Parses the CSV data into a DataFrame with a datetime `time` column.
 
         Parameters:
         csv_data (str): The CSV data as a string.
 
         Returns:
-        pandas.DataFrame: A DataFrame containing only the rows for 2 PM.
+        pandas.DataFrame: A DataFrame containing every hourly row.
         """
-        two_pm_digit = 14
+        # pandas is only imported by processes that use the pandas engine
+        import pandas as pd
+
         df = pd.read_csv(StringIO(csv_data), skiprows=3)
         df["time"] = pd.to_datetime(df["time"])
+        return df
+
+    def _filter_2pm_rows(self, df):
+        two_pm_digit = 14
         return df[df["time"].dt.hour == two_pm_digit]
 
+    def _get_2pm_rows_from_json(self, payload):
+        """
+        Filters a JSON forecast payload to extract rows corresponding to 2 PM.
+
+        Parameters:
+        payload (dict): A single location object from the Open-Meteo JSON response.
+
+        Returns:
+        pandas.DataFrame: A DataFrame shaped like the CSV one, containing only the rows for 2 PM.
+        """
+        return self._filter_2pm_rows(read_json_location(payload))
+
     def _get_avg_forcast(self, _data):
         """
         Calculates the average temperature at 2 PM over the next 7 days.
@@ -160,37 +303,351 @@ class WeatherForecast:
         Returns:
         dict: A dictionary containing the district name and the average temperature at 2 PM.
         """
+        [(temperatures, stale)] = await alookup_temperatures([self])
+        if temperatures is None:
+            # Concurrent misses for the same location share one upstream call
+            temperatures = await single_flight.ado(
+                self.api_url, partial(self._download_temperatures, session)
+            )
+        elif stale:
+            revalidator.schedule(
+                self.api_url, partial(self._download_temperatures, session)
+            )
+        # Aggregate on the parse pool so the event loop only waits on I/O
+        return await parse_executor.run(self.process_temperatures, temperatures)
+
+    async def _download_temperatures(self, session):
         csv_data = await self._download_csv_data(session)
-        _data = self._get_2pm_rows(csv_data)
-        avg_temp = self._get_avg_forcast(_data)
+        temperatures = await parse_executor.run(self._parse_csv, csv_data)
+        await acache_temperatures([self], [temperatures])
+        archive.save_in_background(
+            archive.save_forecasts, [self.window], [temperatures]
+        )
+        return temperatures
+
+    def _parse_csv(self, csv_data):
+        if self.engine == "pandas":
+            return self._read_csv(csv_data)["temperature_2m (°C)"].tolist()
+        return parse_csv_temperatures(csv_data).tolist()
+
+    def process_temperatures(self, temperatures):
+        """
+        Processes a cached hourly temperature series for this district.
+
+        Parameters:
+        temperatures (List[float]): Hourly temperatures starting at midnight of the first day.
+
+        Returns:
+        dict: A dictionary containing the district name and the average temperature at 2 PM.
+        """
+        two_pm_digit = 14
+
+        if self.engine == "pandas":
+            import pandas as pd
+
+            times = pd.date_range(
+                start=self.start_day_str, periods=len(temperatures), freq="h"
+            )
+            payload = {
+                "hourly": {
+                    "time": times.strftime("%Y-%m-%dT%H:%M").tolist(),
+                    "temperature_2m": temperatures,
+                }
+            }
+            _data = self._get_2pm_rows_from_json(payload)
+            return self._build_result(self._get_avg_forcast(_data))
+
+        # Rows start at midnight, so 2 PM is every 24th value from index 14
+        avg_temp = average_at_hour(temperatures, hour=two_pm_digit, days=7)
+        return self._build_result(avg_temp)
+
+    @property
+    def window(self):
+        """The district and date range of this forecast, as archived."""
+        return self.district, self.start_day_str, self.end_day_str
+
+    def _build_result(self, avg_temp):
         return {
             "district": self.district["name"],
-            "averageTemperature": avg_temp,
+            "average_temperature": avg_temp,
         }
 
-    def fetch_temperature_for_day(self, date: str, session: httpx.Client):
+
+class BatchWeatherForecast:
+    def __init__(
+        self, districts, days=7, batch_size=None, start_date=None, engine=None
+    ):
         """
-        Fetches the temperature at a specific time of day (18:00) for the given date
-        using the provided HTTP session.
+        Initializes the BatchWeatherForecast instance which fetches the forecast of many
+        districts with a single Open-Meteo request per batch.
 
-        Args:
-        - date (str): The date for which to fetch the temperature in "YYYY-MM-DD" format.
-        - session (httpx.Client): An HTTP client session to use for making the API request.
+        Parameters:
+        districts (list): A list of district dictionaries including latitude and longitude.
+        days (int): Number of days to forecast. Defaults to 7.
+        batch_size (int): Maximum number of locations per upstream request. Defaults to
+            the WEATHER_FORECAST_BATCH_SIZE setting, one location per request when
+            that is None.
+        start_date (str | date): First forecast day. Defaults to today.
+        engine (str): Forecast parsing engine, "numpy" or "pandas". Defaults to the
+            WEATHER_PARSER_ENGINE setting.
+        """
+        if batch_size is None:
+            batch_size = (
+                getattr(settings, "WEATHER_FORECAST_BATCH_SIZE", FORECAST_BATCH_SIZE)
+                or 1
+            )
+        if not batch_size or batch_size < 1:
+            raise ValueError("Batch size must be a positive integer")
+
+        self.batch_size = batch_size
+        self.engine = engine or getattr(
+            settings, "WEATHER_PARSER_ENGINE", PARSER_ENGINE
+        )
+        self.forecasts = [
+            WeatherForecast(district, days=days, mode="json", start_date=start_date)
+            for district in districts
+        ]
+
+    def batches(self) -> List[List[WeatherForecast]]:
+        """
+        Splits the district forecasts into batches of at most `batch_size` locations.
 
         Returns:
-        - float: The temperature at 18:00 for the specified date, in degrees Celsius.
+        List[List[WeatherForecast]]: The forecasts grouped per upstream request.
+        """
+        return [
+            self.forecasts[i : i + self.batch_size]
+            for i in range(0, len(self.forecasts), self.batch_size)
+        ]
+
+    async def _download_batch(self, session, batch) -> List[List[float]]:
+        """
+        Downloads the JSON forecast of every location in the batch with one request.
+
+        Parameters:
+        session (httpx.AsyncClient): The HTTP client session used for making requests.
+        batch (List[WeatherForecast]): The forecasts to download together.
+
+        Returns:
+        List[List[float]]: One hourly temperature series per forecast, in batch order.
 
         Raises:
-        - HTTPStatusError: If the API request fails or returns an error status code.
-        - KeyError: If the expected temperature data is not found in the API response.
+        UpstreamRejectedException: If upstream returns a different number of locations.
         """
-        self.start_day_str = date
-        self.end_day_str = date
-        response = session.get(self.api_url)
+        url = self._batch_url(batch)
+        # Identical concurrent batches share one upstream call
+        series = await single_flight.ado(url, partial(self._request, session, url))
+        if len(series) != len(batch):
+            raise UpstreamRejectedException(
+                "Forecast API returned an unexpected number of locations"
+            )
+        return series
+
+    def _batch_url(self, batch) -> str:
+        head = batch[0]
+        return build_forecast_url(
+            [forecast.district for forecast in batch],
+            head.start_day_str,
+            head.end_day_str,
+            "json",
+        )
+
+    async def _request(self, session, url) -> List[List[float]]:
+        response = await upstream.aget(session, url)
         response.raise_for_status()
 
-        data = response.json()
+        # Decoding a multi-location response is the heaviest step, keep it off the loop
+        parse = read_json_locations if self.engine == "pandas" else parse_json_locations
+        return await parse_executor.run(parse, response.content)
+
+    async def _load_batch(self, session, batch) -> List[List[float]]:
+        lookups = await alookup_temperatures(batch)
+        temperatures = [series for series, _ in lookups]
+
+        stale = [
+            forecast
+            for forecast, (series, is_stale) in zip(batch, lookups)
+            if series is not None and is_stale
+        ]
+
+        missing = [idx for idx, series in enumerate(temperatures) if series is None]
+        if missing:
+            # After a restart the archive still has recent forecasts, serve them as stale
+            archived = await archive.aload_forecasts(
+                [batch[idx].window for idx in missing]
+            )
+            restored = [
+                idx for idx, series in zip(missing, archived) if series is not None
+            ]
+            for idx, series in zip(missing, archived):
+                temperatures[idx] = series
+            if restored:
+                forecasts = [batch[idx] for idx in restored]
+                await acache_temperatures(
+                    forecasts, [temperatures[idx] for idx in restored], timeout=0
+                )
+                stale.extend(forecasts)
+
+        if stale:
+            # Serve the expired series now and reload them with one background request
+            key = ("revalidate", self._batch_url(stale))
+            revalidator.schedule(key, partial(self._refresh_batch, session, stale))
+
+        # Only locations missing from both the cache and the archive go upstream
+        missing = [idx for idx, series in enumerate(temperatures) if series is None]
+        if missing:
+            downloaded = await self._refresh_batch(
+                session, [batch[idx] for idx in missing]
+            )
+            for idx, series in zip(missing, downloaded):
+                temperatures[idx] = series
+        return temperatures
+
+    async def _refresh_batch(self, session, batch) -> List[List[float]]:
+        downloaded = await self._download_batch(session, batch)
+        await acache_temperatures(batch, downloaded)
+        archive.save_in_background(
+            archive.save_forecasts, [forecast.window for forecast in batch], downloaded
+        )
+        return downloaded
+
+    async def fetch_temperatures(
+        self, session, pipeline: FetchPipeline = None, allow_partial: bool = False
+    ) -> List[Optional[List[float]]]:
+        """
+        Fetches the hourly temperatures of every district, from the cache where possible.
+
+        Parameters:
+        session (httpx.AsyncClient): The HTTP client session used for making requests.
+        pipeline (FetchPipeline): Runs the batch requests. Defaults to a pipeline built
+            from the fetch settings.
+        allow_partial (bool): Return None for the districts of failed batches instead
+            of failing, as long as one batch succeeded.
+
+        Returns:
+        List[Optional[List[float]]]: One hourly temperature series per district, in
+            district order.
+        """
+        pipeline = pipeline or FetchPipeline()
+        batch_series = await pipeline.run(
+            self.temperature_jobs(session), return_exceptions=allow_partial
+        )
+        errors = [result for result in batch_series if isinstance(result, Exception)]
+        if errors:
+            if len(errors) == len(batch_series):
+                raise errors[0]
+            logger.warning(
+                "%d of %d forecast batches failed, returning partial results",
+                len(errors),
+                len(batch_series),
+                exc_info=errors[0],
+            )
+
+        temperatures = []
+        for batch, series in zip(self.batches(), batch_series):
+            if isinstance(series, Exception):
+                temperatures.extend([None] * len(batch))
+            else:
+                temperatures.extend(series)
+        return temperatures
+
+    def temperature_jobs(self, session) -> List[Callable]:
+        """
+        Builds one pipeline job per batch, each resolving to that batch's hourly temperatures.
+
+        Parameters:
+        session (httpx.AsyncClient): The HTTP client session used for making requests.
+
+        Returns:
+        List[Callable]: Zero-argument callables suitable for `FetchPipeline`.
+        """
+        return [partial(self._load_batch, session, batch) for batch in self.batches()]
 
-        temperature = data["hourly"]["temperature_2m"][18]
 
-        return temperature
+async def alookup_temperatures(forecasts) -> List[Tuple[Optional[List[float]], bool]]:
+    """
+    Reads the cached hourly temperatures of many forecasts with one cache lookup.
+
+    Parameters:
+    forecasts (Sequence[WeatherForecast]): The forecasts to read.
+
+    Returns:
+    List[Tuple[Optional[List[float]], bool]]: Per forecast, the hourly temperatures
+        or None on a cache miss, and whether they should be refreshed.
+    """
+    lookups = await forecast_cache.alookup_many(
+        [forecast.window for forecast in forecasts]
+    )
+    for temperatures, stale in lookups:
+        metrics.record_cache_lookup("forecasts", temperatures is not None, stale)
+    return lookups
+
+
+async def acache_temperatures(forecasts, series, timeout=None) -> None:
+    """Caches the hourly temperatures of many forecasts with one cache write."""
+    await forecast_cache.aset_many(
+        [forecast.window for forecast in forecasts], series, timeout=timeout
+    )
+
+
+def read_json_location(payload):
+    """
+    Parses a JSON forecast location object into a DataFrame shaped like the CSV one.
+
+    Parameters:
+    payload (dict): A single location object from the Open-Meteo JSON response.
+
+    Returns:
+    pandas.DataFrame: A DataFrame with a datetime `time` column, one row per hour.
+    """
+    # pandas is only imported by processes that use the pandas engine
+    import pandas as pd
+
+    hourly = payload["hourly"]
+    return pd.DataFrame(
+        {
+            "time": pd.to_datetime(hourly["time"]),
+            "temperature_2m (°C)": pd.to_numeric(hourly["temperature_2m"]),
+        }
+    )
+
+
+def read_json_locations(content: bytes) -> List[List[float]]:
+    """
+    Pandas engine counterpart of `parse_json_locations`, ordering each location's
+    hourly rows by their timestamps.
+
+    Kept at module level so it can be sent to a process pool.
+    """
+    payloads = json.loads(content)
+    # Open-Meteo returns a bare object instead of a list for a single location
+    if isinstance(payloads, dict):
+        payloads = [payloads]
+    return [
+        read_json_location(payload)
+        .sort_values("time", kind="stable")["temperature_2m (°C)"]
+        .tolist()
+        for payload in payloads
+    ]
+
+
+def build_forecast_url(districts, start_date: str, end_date: str, mode: str) -> str:
+    """
+    Builds the Open-Meteo forecast URL for one or more districts.
+
+    Parameters:
+    districts (list): District dictionaries including latitude and longitude.
+    start_date (str): First forecast day in "YYYY-MM-DD" format.
+    end_date (str): Last forecast day in "YYYY-MM-DD" format.
+    mode (str): Response format, either "csv" or "json".
+
+    Returns:
+    str: The forecast URL using comma separated coordinate lists.
+    """
+    latitudes = ",".join(str(district["lat"]) for district in districts)
+    longitudes = ",".join(str(district["long"]) for district in districts)
+    return (
+        f"{FORECAST_API_URL}?latitude={latitudes}"
+        f"&longitude={longitudes}&start_date={start_date}"
+        f"&end_date={end_date}&hourly=temperature_2m&timezone=Asia/Dhaka&format={mode}"
+    )
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key runs the function, every caller arriving while it is
+    still running waits for and shares that result (or exception). Nothing is
+    remembered once the call finishes, caching stays the job of the caller.
+    """
+
+    def __init__(self) -> None:
+        # Async calls are tasks of a specific event loop, so they are tracked per loop
+        self._async_calls = weakref.WeakKeyDictionary()
+        self._sync_calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs `fn` unless a call for `key` is already in flight on this event loop.
+
+        Parameters:
+        key (Hashable): Identifies the upstream resource being loaded.
+        fn (Callable): Zero-argument callable returning an awaitable.
+
+        Returns:
+        Any: The result of the shared call.
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+
+        task = calls.get(key)
+        if task is None:
+            task = loop.create_task(fn())
+            calls[key] = task
+
+            def forget(finished: asyncio.Task) -> None:
+                if calls.get(key) is finished:
+                    del calls[key]
+
+            task.add_done_callback(forget)
+
+        # A cancelled waiter must not cancel the call the other waiters share
+        return await asyncio.shield(task)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs `fn` unless a call for `key` is already in flight on another thread.
+
+        Parameters:
+        key (Hashable): Identifies the upstream resource being loaded.
+        fn (Callable): Zero-argument callable.
+
+        Returns:
+        Any: The result of the shared call.
+        """
+        with self._lock:
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._sync_calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._sync_calls[key]
+            call.done.set()
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,367 @@
+import time
+import warnings
+from collections import OrderedDict
+from datetime import date
+from enum import StrEnum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from weather.cache import forecast_cache_timeout
+from weather.http import http_clients
+from weather.parsers import HOURS_PER_DAY
+from weather.services import BatchWeatherForecast
+from weather.singleflight import single_flight
+
+FORECAST_STORE_WINDOWS = 8
+
+
+class Aggregate(StrEnum):
+    MEAN = "mean"
+    MEDIAN = "median"
+    MIN = "min"
+    MAX = "max"
+
+
+# Result key of every aggregate, the mean keeps the original ranking shape
+AGGREGATE_RESULT_KEYS = {
+    Aggregate.MEAN: "average_temperature",
+    Aggregate.MEDIAN: "median_temperature",
+    Aggregate.MIN: "min_temperature",
+    Aggregate.MAX: "max_temperature",
+}
+_NAN_REDUCERS = {
+    Aggregate.MEDIAN: np.nanmedian,
+    Aggregate.MIN: np.nanmin,
+    Aggregate.MAX: np.nanmax,
+}
+
+
+def district_id(index: int, district: Dict[str, Any]) -> int:
+    # Districts without an id are identified by their position
+    return int(district["id"]) if "id" in district else index
+
+
+class DistrictRecord:
+    """A district row of a `ForecastMatrix`."""
+
+    __slots__ = ("index", "id", "name", "lat", "long")
+
+    def __init__(self, index: int, id: int, name: str, lat: float, long: float):
+        self.index = index
+        self.id = id
+        self.name = name
+        self.lat = lat
+        self.long = long
+
+    @classmethod
+    def from_district(cls, index: int, district: Dict[str, Any]) -> "DistrictRecord":
+        return cls(
+            index,
+            district_id(index, district),
+            district["name"],
+            float(district["lat"]),
+            float(district["long"]),
+        )
+
+
+class ForecastMatrix:
+    """
+    The hourly `temperature_2m` forecast of many districts as one districts × hours array.
+
+    Row `i` belongs to `records[i]` and column `h` is hour `h` counted from midnight of
+    `start_date`, so every aggregation is a single vectorised operation over the array.
+    """
+
+    __slots__ = ("records", "start_date", "temperatures", "_index_by_id")
+
+    def __init__(
+        self, records: List[DistrictRecord], start_date: str, temperatures: np.ndarray
+    ) -> None:
+        if temperatures.shape[0] != len(records):
+            raise ValueError("Expected one temperature row per district")
+        self.records = records
+        self.start_date = start_date
+        self.temperatures = temperatures
+        self._index_by_id = {record.id: record.index for record in records}
+
+    @classmethod
+    def from_series(
+        cls,
+        districts: Sequence[Dict[str, Any]],
+        start_date: str,
+        series: Sequence[Sequence[float]],
+    ) -> "ForecastMatrix":
+        """
+        Builds a matrix from one hourly series per district.
+
+        Parameters:
+        districts (Sequence[dict]): District dictionaries as returned by DistrictService.
+        start_date (str): The day the series start at, in "YYYY-MM-DD" format.
+        series (Sequence[Optional[Sequence[float]]]): Hourly temperatures, one series
+            per district, None for a district whose forecast couldn't be fetched.
+
+        Returns:
+        ForecastMatrix: The matrix, shorter and missing series padded with NaN.
+        """
+        hours = max(
+            (len(temperatures) for temperatures in series if temperatures is not None),
+            default=0,
+        )
+        temperatures = np.full((len(series), hours), np.nan, dtype=np.float32)
+        for row, values in enumerate(series):
+            if values is not None:
+                temperatures[row, : len(values)] = values
+        records = [
+            DistrictRecord.from_district(index, district)
+            for index, district in enumerate(districts)
+        ]
+        return cls(records, start_date, temperatures)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def district_ids(self) -> Tuple[int, ...]:
+        return tuple(record.id for record in self.records)
+
+    @property
+    def missing(self) -> int:
+        """The number of districts without any forecast."""
+        return int(np.all(np.isnan(self.temperatures), axis=1).sum())
+
+    def index_of(self, district_id: int) -> int:
+        """
+        Finds the row of a district.
+
+        Raises:
+        KeyError: If the district isn't part of the matrix.
+        """
+        return self._index_by_id[int(district_id)]
+
+    def row(self, district_id: int) -> np.ndarray:
+        """Returns the hourly temperatures of one district."""
+        return self.temperatures[self.index_of(district_id)]
+
+    def values_at_hour(self, hour: int, days: int = None) -> np.ndarray:
+        """
+        Selects the temperature at `hour` o'clock of every day for every district.
+
+        Parameters:
+        hour (int): Hour of the day, 0-23.
+        days (int): Only keep the first `days` days. Defaults to all of them.
+
+        Returns:
+        numpy.ndarray: A districts × days view of the matrix.
+        """
+        values = self.temperatures[:, hour::HOURS_PER_DAY]
+        return values if days is None else values[:, :days]
+
+    def mean_at_hour(self, hour: int, days: int = None) -> np.ndarray:
+        """
+        Averages the temperature at `hour` o'clock over the first `days` days.
+
+        Returns:
+        numpy.ndarray: One average per district, NaN where a district has no data.
+        """
+        values = self.values_at_hour(hour, days)
+        counts = np.sum(~np.isnan(values), axis=1)
+        totals = np.nansum(values, axis=1, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return totals / counts
+
+    def aggregate_at_hour(
+        self, hour: int, days: int = None, aggregate: str = Aggregate.MEAN
+    ) -> np.ndarray:
+        """
+        Reduces the temperature at `hour` o'clock over the first `days` days.
+
+        Parameters:
+        hour (int): Hour of the day, 0-23.
+        days (int): Only use the first `days` days. Defaults to all of them.
+        aggregate (str): One of "mean", "median", "min" or "max".
+
+        Returns:
+        numpy.ndarray: One value per district, NaN where a district has no data.
+        """
+        aggregate = Aggregate(aggregate)
+        if aggregate == Aggregate.MEAN:
+            return self.mean_at_hour(hour, days)
+        with warnings.catch_warnings():
+            # Districts without data are expected to come out as NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return _NAN_REDUCERS[aggregate](
+                self.values_at_hour(hour, days), axis=1
+            ).astype(np.float64)
+
+    def top(
+        self,
+        hour: int,
+        days: int = None,
+        aggregate: str = Aggregate.MEAN,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        Picks the `limit` coolest districts by an aggregate of the temperature at `hour`.
+
+        Only the selected districts are sorted, the rest are split off with a
+        partial selection in linear time. Ties keep registry order, as in
+        `rank_by_mean`, and districts without data are left out.
+
+        Parameters:
+        hour (int): Hour of the day, 0-23.
+        days (int): Only use the first `days` days. Defaults to all of them.
+        aggregate (str): One of "mean", "median", "min" or "max".
+        limit (int): Number of districts to return.
+
+        Returns:
+        List[Dict[str, Any]]: The district name and its aggregated temperature, coolest first.
+        """
+        values = np.round(self.aggregate_at_hour(hour, days, aggregate), 2)
+        limit = min(limit, int(np.count_nonzero(~np.isnan(values))))
+        if limit <= 0:
+            return []
+
+        keys = np.where(np.isnan(values), np.inf, values)
+        cutoff = np.partition(keys, limit - 1)[limit - 1]
+        below = np.flatnonzero(keys < cutoff)
+        # Fill up with the first districts tied at the cutoff, like a stable sort
+        tied = np.flatnonzero(keys == cutoff)[: limit - len(below)]
+        chosen = np.concatenate([below, tied])
+        order = chosen[np.lexsort((chosen, keys[chosen]))]
+
+        result_key = AGGREGATE_RESULT_KEYS[Aggregate(aggregate)]
+        return [
+            {"district": self.records[index].name, result_key: float(values[index])}
+            for index in order
+        ]
+
+    def rank_by_mean(self, hour: int, days: int = None) -> List[Dict[str, Any]]:
+        """
+        Ranks every district by its average temperature at `hour` o'clock, coolest first.
+
+        Districts without data are left out.
+
+        Returns:
+        List[Dict[str, Any]]: Results shaped like `WeatherForecast.fetch_and_process`.
+        """
+        averages = np.round(self.mean_at_hour(hour, days), 2)
+        # A stable sort keeps districts with equal averages in registry order
+        order = np.argsort(averages, kind="stable")
+        # NaN sorts last, so the districts without data are the tail
+        order = order[: np.count_nonzero(~np.isnan(averages))]
+        return [
+            {
+                "district": self.records[index].name,
+                "average_temperature": float(averages[index]),
+            }
+            for index in order
+        ]
+
+
+class ForecastStore:
+    """
+    Keeps the latest `ForecastMatrix` of the most recently used forecast windows.
+
+    A matrix is rebuilt from the forecast cache once upstream has published a new
+    model run, or when the district list changed. At most
+    WEATHER_FORECAST_STORE_WINDOWS windows are kept, so memory stays flat.
+    """
+
+    def __init__(self, max_windows: int = None) -> None:
+        self.max_windows = max_windows
+        self._matrices: "OrderedDict[Tuple[str, int], Tuple[float, ForecastMatrix]]" = (
+            OrderedDict()
+        )
+
+    def _get_max_windows(self) -> int:
+        if self.max_windows is not None:
+            return self.max_windows
+        return getattr(
+            settings, "WEATHER_FORECAST_STORE_WINDOWS", FORECAST_STORE_WINDOWS
+        )
+
+    def get(
+        self, start_date: str, days: int, district_ids: Tuple[int, ...] = None
+    ) -> Optional[ForecastMatrix]:
+        """
+        Returns the stored matrix of a forecast window, if it is still current.
+
+        Parameters:
+        start_date (str): First forecast day in "YYYY-MM-DD" format.
+        days (int): Number of days after `start_date` in the window.
+        district_ids (Tuple[int, ...]): Only return a matrix covering exactly these districts.
+
+        Returns:
+        Optional[ForecastMatrix]: The matrix, or None if it has to be (re)loaded.
+        """
+        entry = self._matrices.get((start_date, days))
+        if entry is None:
+            return None
+        expires_at, matrix = entry
+        if expires_at <= time.time():
+            return None
+        if district_ids is not None and matrix.district_ids != district_ids:
+            return None
+        self._matrices.move_to_end((start_date, days))
+        return matrix
+
+    def put(self, days: int, matrix: ForecastMatrix) -> None:
+        key = (matrix.start_date, days)
+        self._matrices[key] = (time.time() + forecast_cache_timeout(), matrix)
+        self._matrices.move_to_end(key)
+        while len(self._matrices) > self._get_max_windows():
+            self._matrices.popitem(last=False)
+
+    async def aget(
+        self,
+        districts: Sequence[Dict[str, Any]],
+        start_date=None,
+        days: int = 7,
+        allow_partial: bool = False,
+    ) -> ForecastMatrix:
+        """
+        Returns the matrix of every district for a forecast window, loading it when needed.
+
+        Parameters:
+        districts (Sequence[dict]): District dictionaries as returned by DistrictService.
+        start_date (str | date): First forecast day. Defaults to today.
+        days (int): Number of days after `start_date` in the window. Defaults to 7.
+        allow_partial (bool): Leave the rows of districts whose forecast couldn't be
+            fetched empty instead of failing. Such a matrix isn't stored.
+
+        Returns:
+        ForecastMatrix: The districts × hours forecast.
+        """
+        start_date = str(start_date or date.today().isoformat())
+        district_ids = tuple(
+            district_id(index, district) for index, district in enumerate(districts)
+        )
+        matrix = self.get(start_date, days, district_ids)
+        if matrix is not None:
+            return matrix
+
+        key = ("forecast-matrix", start_date, days, district_ids, allow_partial)
+        return await single_flight.ado(
+            key, lambda: self._load(districts, start_date, days, allow_partial)
+        )
+
+    async def _load(
+        self, districts, start_date: str, days: int, allow_partial: bool = False
+    ) -> ForecastMatrix:
+        session = http_clients.get_async_client()
+        series = await BatchWeatherForecast(
+            districts, days=days, start_date=start_date
+        ).fetch_temperatures(session, allow_partial=allow_partial)
+        matrix = ForecastMatrix.from_series(districts, start_date, series)
+        if not any(values is None for values in series):
+            # The missing rows are fetched again on the next request
+            self.put(days, matrix)
+        return matrix
+
+    def clear(self) -> None:
+        self._matrices.clear()
+
+
+forecast_store = ForecastStore()
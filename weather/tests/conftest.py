@@ -0,0 +1,39 @@
+import pytest
+from django.core.cache import cache
+
+from weather.cache import forecast_cache
+from weather.metrics import registry as metrics_registry
+from weather.registry import reset_registry
+from weather.renderers import rendered_responses
+from weather.resilience import upstream
+from weather.revalidation import revalidator
+from weather.store import forecast_store
+
+
+@pytest.fixture(autouse=True)
+def isolated_weather_state(settings):
+    # Every test starts cold and without background refreshers
+    settings.WEATHER_RANKING_BACKGROUND_REFRESH = False
+    settings.WEATHER_LOOP_MONITOR = False
+    # Keep forecasts in the per-process test cache instead of the shared file cache
+    settings.WEATHER_FORECAST_CACHE_ALIAS = "default"
+    settings.WEATHER_ARCHIVE = False
+    settings.WEATHER_WARMUP = False
+    # Retry failed upstream calls without waiting
+    settings.WEATHER_UPSTREAM_RETRY_BACKOFF = 0
+    cache.clear()
+    forecast_cache.clear()
+    forecast_store.clear()
+    reset_registry()
+    rendered_responses.clear()
+    upstream.reset()
+    revalidator.reset()
+    metrics_registry.reset()
+    yield
+    cache.clear()
+    forecast_cache.clear()
+    forecast_store.clear()
+    reset_registry()
+    rendered_responses.clear()
+    upstream.reset()
+    revalidator.reset()
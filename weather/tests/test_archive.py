@@ -0,0 +1,199 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import pytest
+from asgiref.sync import sync_to_async
+from django.db import OperationalError
+from django.utils import timezone
+
+from weather import archive
+from weather.cache import forecast_cache
+from weather.models import District, HourlyForecast
+from weather.services import BatchWeatherForecast, DistrictService
+
+districts = [
+    {
+        "id": "1",
+        "division_id": "3",
+        "name": "Dhaka",
+        "bn_name": "ঢাকা",
+        "lat": "23.7115253",
+        "long": "90.4111451",
+    },
+    {
+        "id": "2",
+        "division_id": "1",
+        "name": "Chittagong",
+        "bn_name": "চট্টগ্রাম",
+        "lat": "22.335109",
+        "long": "91.834073",
+    },
+]
+
+
+@pytest.fixture
+def archive_enabled(settings, db):
+    settings.WEATHER_ARCHIVE = True
+
+
+def test_districts_round_trip_and_upsert(archive_enabled):
+    archive.save_districts(districts)
+    archive.save_districts([{**districts[0], "name": "Dhaka City"}])
+
+    assert District.objects.count() == 2
+    assert archive.load_districts() == [
+        {**districts[0], "name": "Dhaka City"},
+        districts[1],
+    ]
+
+
+def test_forecasts_round_trip_by_day(archive_enabled):
+    window = (districts[0], "2024-07-10", "2024-07-11")
+    archive.save_forecasts([window], [[float(hour) for hour in range(48)]])
+    archive.save_forecasts([window], [[1.0] * 48])
+
+    assert HourlyForecast.objects.count() == 2
+    assert archive.load_forecasts(
+        [
+            (districts[0], "2024-07-11", "2024-07-11"),
+            (districts[1], "2024-07-11", "2024-07-11"),
+        ]
+    ) == [[1.0] * 24, None]
+
+
+def test_old_forecasts_are_not_served(archive_enabled, settings):
+    settings.WEATHER_CACHE_MAX_STALENESS = 60
+    window = (districts[0], "2024-07-10", "2024-07-10")
+    archive.save_forecasts([window], [[1.0] * 24])
+    HourlyForecast.objects.update(fetched_at=timezone.now() - timedelta(minutes=5))
+
+    assert archive.load_forecasts([window]) == [None]
+
+
+def test_writes_prune_forecasts_past_the_staleness_budget(archive_enabled, settings):
+    settings.WEATHER_CACHE_MAX_STALENESS = 60
+    archive.save_forecasts([(districts[0], "2024-07-10", "2024-07-10")], [[1.0] * 24])
+    HourlyForecast.objects.update(fetched_at=timezone.now() - timedelta(minutes=5))
+
+    archive.save_forecasts([(districts[1], "2024-07-11", "2024-07-11")], [[2.0] * 24])
+
+    assert list(HourlyForecast.objects.values_list("day", flat=True)) == [
+        date(2024, 7, 11)
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_districts_fall_back_to_archive(archive_enabled):
+    await archive.asave_districts(districts)
+
+    async def mock_get(*args, **kwargs):
+        raise httpx.ConnectError("upstream down")
+
+    with patch("httpx.AsyncClient.get", new=mock_get):
+        assert await DistrictService().aget() == districts
+
+
+@pytest.mark.asyncio
+async def test_archive_failures_dont_fail_the_request(settings, monkeypatch):
+    settings.WEATHER_ARCHIVE = True
+    saved = []
+
+    def save_districts(rows):
+        saved.append(rows)
+        raise RuntimeError("no such table: weather_district")
+
+    async def mock_get(*args, **kwargs):
+        return httpx.Response(200, json={"districts": districts})
+
+    monkeypatch.setattr(archive, "save_districts", save_districts)
+    with patch("httpx.AsyncClient.get", new=mock_get):
+        assert await DistrictService().aget() == districts
+        await archive.wait()
+
+    assert saved == [districts]
+
+
+def failing_read(*args):
+    raise OperationalError("no such table: weather_hourlyforecast")
+
+
+@pytest.mark.asyncio
+async def test_archive_read_failures_fall_through_to_upstream(settings, monkeypatch):
+    settings.WEATHER_ARCHIVE = True
+    monkeypatch.setattr(archive, "load_forecasts", failing_read)
+    monkeypatch.setattr(archive, "save_forecasts", lambda *args: 0)
+
+    def handler(request):
+        return httpx.Response(
+            200, json=[{"hourly": {"temperature_2m": [30.0] * 24}}] * len(districts)
+        )
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        series = await BatchWeatherForecast(
+            districts, days=0, start_date="2024-07-10"
+        ).fetch_temperatures(client)
+        await archive.wait()
+
+    assert series == [[30.0] * 24] * 2
+
+
+@pytest.mark.asyncio
+async def test_archive_read_failures_keep_the_upstream_error(settings, monkeypatch):
+    settings.WEATHER_ARCHIVE = True
+    settings.WEATHER_UPSTREAM_RETRIES = 0
+    monkeypatch.setattr(archive, "load_districts", failing_read)
+
+    async def mock_get(*args, **kwargs):
+        raise httpx.ConnectError("upstream down")
+
+    def mock_sync_get(*args, **kwargs):
+        raise httpx.ConnectError("upstream down")
+
+    with (
+        patch("httpx.AsyncClient.get", new=mock_get),
+        patch("httpx.Client.get", new=mock_sync_get),
+    ):
+        with pytest.raises(httpx.ConnectError):
+            await DistrictService().aget()
+        with pytest.raises(httpx.ConnectError):
+            await sync_to_async(DistrictService().get)()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_batch_serves_archived_forecasts(archive_enabled):
+    requested = []
+
+    def handler(request):
+        requested.append(request.url)
+        return httpx.Response(
+            200, json=[{"hourly": {"temperature_2m": [30.0] * 24}}] * len(districts)
+        )
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        await BatchWeatherForecast(
+            districts, days=0, start_date="2024-07-10"
+        ).fetch_temperatures(client)
+        await archive.wait()
+        # A restarted process starts with an empty cache
+        forecast_cache.clear()
+        with patch("weather.revalidation.Revalidator.schedule") as schedule:
+            series = await BatchWeatherForecast(
+                districts, days=0, start_date="2024-07-10"
+            ).fetch_temperatures(client)
+
+    assert series == [[30.0] * 24] * 2
+    assert len(requested) == 1
+    schedule.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_warm_cache_loads_archive_as_stale(archive_enabled):
+    archive.save_districts(districts)
+    today = timezone.localdate().isoformat()
+    archive.save_forecasts([(districts[0], today, today)], [[25.0] * 24])
+
+    assert archive.warm_cache(days=0) == (2, 1)
+    assert forecast_cache.lookup(districts[0], today, today) == ([25.0] * 24, True)
@@ -0,0 +1,95 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+
+from weather.broadcast import RankingBroadcaster, ranking_broadcaster
+from weather.ranking import TOP_DISTRICTS_CACHE_KEY
+from weather.renderers import camelize
+from weather.views import TopDistrictStreamView
+
+cool = [{"district": "Sylhet", "average_temperature": 25.0}]
+warm = [{"district": "Dhaka", "average_temperature": 31.0}]
+
+
+def make_broadcaster(*rankings):
+    ranking = AsyncMock()
+    ranking.atop.side_effect = list(rankings)
+    return RankingBroadcaster(ranking=ranking, interval=0.01)
+
+
+def test_publish_only_reports_changes():
+    broadcaster = RankingBroadcaster()
+
+    assert broadcaster.publish(cool)
+    assert not broadcaster.publish(list(cool))
+    assert broadcaster.publish(warm)
+    assert json.loads(broadcaster.latest[1]) == [
+        {"district": "Dhaka", "averageTemperature": 31.0}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_subscribers_get_the_ranking_then_only_changes():
+    broadcaster = make_broadcaster(cool, cool, cool, warm, *[warm] * 10)
+    events = broadcaster.subscribe()
+
+    first = await anext(events)
+    # Polls returning the same ranking only produce heartbeats
+    changed = None
+    while changed is None:
+        changed = await anext(events)
+    await events.aclose()
+
+    assert json.loads(first[1]) == camelize(cool)
+    assert json.loads(changed[1]) == camelize(warm)
+    assert first[0] != changed[0]
+
+
+@pytest.mark.asyncio
+async def test_reconnect_skips_the_ranking_already_sent():
+    broadcaster = make_broadcaster(cool, cool, cool)
+    broadcaster.publish(cool)
+    events = broadcaster.subscribe(last_event_id=broadcaster.latest[0])
+
+    assert await anext(events) is None
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_polling_stops_with_the_last_subscriber():
+    broadcaster = make_broadcaster(*[cool] * 10)
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+    await anext(first)
+    await anext(second)
+
+    await first.aclose()
+    assert broadcaster.running
+    await second.aclose()
+
+    assert not broadcaster.running
+    assert broadcaster.subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_view_sends_ranking_events():
+    cache.set(TOP_DISTRICTS_CACHE_KEY, cool)
+    request = RequestFactory().get("/api/top-districts/stream/")
+
+    response = await TopDistrictStreamView.as_view()(request)
+    content = response.streaming_content
+    try:
+        chunk = await anext(content)
+    finally:
+        await content.aclose()
+        await ranking_broadcaster.stop()
+        ranking_broadcaster.latest = None
+
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["Cache-Control"] == "no-cache"
+    event_id, event, data = chunk.decode().strip().split("\n")
+    assert event_id.startswith("id: ")
+    assert event == "event: ranking"
+    assert json.loads(data.removeprefix("data: ")) == camelize(cool)
@@ -0,0 +1,104 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from weather.cache import get_version, set_version
+from weather.ranking import TOP_DISTRICTS_CACHE_KEY
+from weather.services import DistrictService
+
+ranking = [
+    {"district": f"District {i}", "average_temperature": 25.0 + i} for i in range(12)
+]
+districts_data = [
+    {"id": "1", "name": "Dhaka", "lat": "23.7115253", "long": "90.4111451"},
+    {"id": "3", "name": "Sylhet", "lat": "24.8897956", "long": "91.8697894"},
+]
+
+
+def test_version_only_changes_with_the_content():
+    first = set_version("key", ranking, timeout=60, now=1000.0)
+    refreshed = set_version("key", list(ranking), timeout=60, now=2000.0)
+    changed = set_version("key", ranking[:1], timeout=60, now=3000.0)
+
+    assert refreshed["version"] == first["version"]
+    assert refreshed["modified_at"] == 1000.0
+    assert refreshed["refreshed_at"] == 2000.0
+    assert changed["version"] != first["version"]
+    assert changed["modified_at"] == 3000.0
+    assert get_version("key") == changed
+
+
+@pytest.mark.asyncio
+async def test_top_districts_answers_if_none_match_before_ranking(async_client):
+    cache.set(TOP_DISTRICTS_CACHE_KEY, ranking)
+    set_version(TOP_DISTRICTS_CACHE_KEY, ranking, timeout=60)
+    url = reverse("top-districts")
+
+    response = await async_client.get(url)
+    etag = response["ETag"]
+
+    assert response.status_code == 200
+    assert "Last-Modified" in response
+    assert "public" in response["Cache-Control"]
+    assert "max-age=" in response["Cache-Control"]
+
+    with patch(
+        "weather.views.TopDistrictRanking.atop", return_value=ranking[:5]
+    ) as atop:
+        cached = await async_client.get(url, headers={"If-None-Match": etag})
+        other_limit = await async_client.get(
+            url, {"limit": 5}, headers={"If-None-Match": etag}
+        )
+
+    assert cached.status_code == 304
+    assert cached["ETag"] == etag
+    atop.assert_called_once()
+    assert other_limit["ETag"] != etag
+
+
+@pytest.mark.asyncio
+@patch("weather.ranking.DistrictService")
+@patch("weather.store.BatchWeatherForecast")
+async def test_top_districts_variants_are_validated_by_content(
+    mock_batch_forecast, mock_district_service, settings, async_client
+):
+    settings.WEATHER_FORECAST_BATCH_SIZE = 50
+    mock_district_service.return_value.aget = AsyncMock(
+        return_value=[{"name": "Dhaka", "lat": 23.8, "long": 90.4}]
+    )
+    mock_batch_forecast.return_value.fetch_temperatures = AsyncMock(
+        return_value=[[30.0] * 24 * 8]
+    )
+    url = reverse("top-districts")
+
+    response = await async_client.get(url, {"hour": 8})
+    repeated = await async_client.get(
+        url, {"hour": 8}, headers={"If-None-Match": response["ETag"]}
+    )
+
+    assert response.status_code == 200
+    assert repeated.status_code == 304
+
+
+@patch("weather.registry.DistrictService.get")
+def test_nearest_district_answers_if_none_match(mock_districts_get):
+    mock_districts_get.return_value = districts_data
+    DistrictService().cache_districts(districts_data)
+    client = APIClient()
+    url = reverse("nearest-district")
+
+    response = client.get(url, {"lat": 24.9, "long": 91.87})
+    repeated = client.get(
+        url, {"lat": 24.9, "long": 91.87}, HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    elsewhere = client.get(
+        url, {"lat": 23.7, "long": 90.4}, HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+
+    assert response.status_code == 200
+    assert repeated.status_code == 304
+    assert elsewhere.status_code == 200
+    assert elsewhere.data["district"]["name"] == "Dhaka"
@@ -1,4 +1,6 @@
 # Create your tests here.
+import threading
+import time
 from unittest.mock import patch
 
 import httpx
@@ -6,7 +8,9 @@ import pytest
 from django.core.cache import cache
 from rest_framework import status
 
+from weather.cache import set_many_with_staleness
 from weather.exceptions import RemoteCallException
+from weather.revalidation import revalidator
 from weather.services import DistrictService
 
 DISTRICT_CALL_URL = "http://example.com/api/districts"
@@ -71,3 +75,71 @@ async def test_get_districts_api_failure(district_service):
 def test_district_service_no_url():
     with pytest.raises(ValueError, match="URL is required to fetch districts"):
         DistrictService(None)
+
+
+def set_stale_districts(districts):
+    # Written three hours ago, so already past its two hour freshness
+    set_many_with_staleness(
+        {"districts_data": districts},
+        timeout=TWO_HOUR_CACHE_TIME,
+        now=time.time() - 60 * 60 * 3,
+    )
+
+
+@pytest.mark.asyncio
+async def test_stale_districts_served_while_refreshing(district_service):
+    stale_data = [{"name": "Stale District", "lat": "12.34", "long": "56.78"}]
+    fresh_data = [{"name": "Fresh District", "lat": "12.34", "long": "56.78"}]
+    set_stale_districts(stale_data)
+
+    async def mock_get(*args, **kwargs):
+        return httpx.Response(status_code=200, json={"districts": fresh_data})
+
+    with patch("httpx.AsyncClient.get", new=mock_get):
+        assert await district_service.aget() == stale_data
+        await revalidator.wait()
+        assert await district_service.aget() == fresh_data
+
+
+@pytest.mark.asyncio
+async def test_stale_districts_survive_upstream_failure(district_service):
+    stale_data = [{"name": "Stale District", "lat": "12.34", "long": "56.78"}]
+    set_stale_districts(stale_data)
+
+    async def mock_get(*args, **kwargs):
+        return httpx.Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    with patch("httpx.AsyncClient.get", new=mock_get):
+        assert await district_service.aget() == stale_data
+        await revalidator.wait()
+        assert await district_service.aget() == stale_data
+
+
+def wait_for_refreshes():
+    for thread in threading.enumerate():
+        if thread.name.startswith("revalidate:"):
+            thread.join(5)
+
+
+def test_stale_sync_hits_start_one_refresh(district_service, settings):
+    settings.WEATHER_UPSTREAM_RETRIES = 0
+    stale_data = [{"name": "Stale District", "lat": "12.34", "long": "56.78"}]
+    set_stale_districts(stale_data)
+    calls = []
+    release = threading.Event()
+
+    def mock_get(*args, **kwargs):
+        calls.append(args)
+        release.wait(5)
+        return httpx.Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    with patch("httpx.Client.get", new=mock_get):
+        assert district_service.get() == stale_data
+        assert district_service.get() == stale_data
+        release.set()
+        wait_for_refreshes()
+        # The failed refresh isn't retried until the backoff passed
+        assert district_service.get() == stale_data
+        wait_for_refreshes()
+
+    assert len(calls) == 1
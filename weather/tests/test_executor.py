@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from weather.executor import ParseExecutor
+from weather.monitoring import LoopLagMonitor
+from weather.parsers import average_at_hour
+
+
+@pytest.mark.asyncio
+async def test_thread_executor_runs_off_the_loop_thread(settings):
+    settings.WEATHER_PARSE_EXECUTOR = "thread"
+    executor = ParseExecutor()
+
+    thread_name = await executor.run(lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("weather-parse")
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_executor_runs_parsers(settings):
+    settings.WEATHER_PARSE_EXECUTOR = "process"
+    settings.WEATHER_PARSE_WORKERS = 1
+    executor = ParseExecutor()
+
+    result = await executor.run(average_at_hour, list(range(48)), 14)
+
+    assert result == 26.0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_inline_executor(settings):
+    settings.WEATHER_PARSE_EXECUTOR = None
+    executor = ParseExecutor()
+
+    thread_name = await executor.run(lambda: threading.current_thread().name)
+
+    assert thread_name == threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_measures_blocking():
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+
+    # Block the loop the way synchronous parsing would
+    time.sleep(0.1)
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["samples"] >= 2
+    assert snapshot["max_blocked_seconds"] >= 0.05
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+
+from weather.cache import (
+    ForecastCache,
+    LRUCache,
+    TwoTierCache,
+    date_range,
+    forecast_cache_timeout,
+    get_many_with_staleness,
+    set_many_with_staleness,
+)
+
+dhaka = {"name": "Dhaka", "lat": "23.8103", "long": "90.4125"}
+nearby = {"name": "Dhaka Cantonment", "lat": "23.8141", "long": "90.4099"}
+
+
+def test_date_range_is_inclusive():
+    assert date_range("2024-07-10", "2024-07-12") == [
+        "2024-07-10",
+        "2024-07-11",
+        "2024-07-12",
+    ]
+
+
+def test_single_day_served_from_multi_day_entry():
+    forecast_cache = ForecastCache()
+    temperatures = [float(hour) for hour in range(24 * 3)]
+    forecast_cache.set(dhaka, "2024-07-10", "2024-07-12", temperatures)
+
+    assert forecast_cache.get(dhaka, "2024-07-11", "2024-07-11") == temperatures[24:48]
+    assert forecast_cache.get(dhaka, "2024-07-10", "2024-07-12") == temperatures
+
+
+def test_missing_day_is_a_miss():
+    forecast_cache = ForecastCache()
+    forecast_cache.set(dhaka, "2024-07-10", "2024-07-10", [1.0] * 24)
+
+    assert forecast_cache.get(dhaka, "2024-07-10", "2024-07-11") is None
+
+
+def test_partial_day_is_not_cached():
+    forecast_cache = ForecastCache()
+    forecast_cache.set(dhaka, "2024-07-10", "2024-07-11", [1.0] * 30)
+
+    assert forecast_cache.get(dhaka, "2024-07-10", "2024-07-10") == [1.0] * 24
+    assert forecast_cache.get(dhaka, "2024-07-11", "2024-07-11") is None
+
+
+def test_keys_use_rounded_coordinates():
+    forecast_cache = ForecastCache()
+
+    assert forecast_cache.make_key(dhaka, "2024-07-10") == forecast_cache.make_key(
+        nearby, "2024-07-10"
+    )
+
+
+def test_timeout_follows_update_interval(settings):
+    settings.WEATHER_FORECAST_UPDATE_INTERVAL = 3600
+
+    assert forecast_cache_timeout(now=7200) == 3600
+    assert forecast_cache_timeout(now=7200 + 3000) == 600
+
+
+def test_entries_turn_stale_before_they_are_evicted(settings):
+    settings.WEATHER_CACHE_MAX_STALENESS = 600
+    now = time.time()
+    set_many_with_staleness({"key": "value"}, timeout=60, now=now)
+
+    assert get_many_with_staleness(["key"], now=now) == ({"key": "value"}, False)
+    assert get_many_with_staleness(["key"], now=now + 120) == ({"key": "value"}, True)
+
+
+def test_entries_without_freshness_count_as_fresh():
+    cache.set("key", "value")
+
+    assert get_many_with_staleness(["key", "other"]) == ({"key": "value"}, False)
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.set_many({"a": 1, "b": 2}, timeout=60)
+    lru.get_many(["a"])
+    lru.set_many({"c": 3}, timeout=60)
+
+    assert lru.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+
+def test_lru_drops_expired_entries():
+    lru = LRUCache()
+    lru.set_many({"a": 1}, timeout=0)
+
+    assert lru.get_many(["a"]) == {}
+    assert len(lru) == 0
+
+
+def test_two_tier_reads_through_to_the_shared_cache():
+    writer, reader = TwoTierCache(alias="default"), TwoTierCache(alias="default")
+    writer.set_many({"a": 1}, timeout=60)
+
+    assert reader.get_many(["a", "b"]) == {"a": 1}
+    cache.delete("a")
+    # Served from the reader's own LRU once the shared entry is gone
+    assert reader.get_many(["a"]) == {"a": 1}
+
+
+def test_days_are_stored_as_float32():
+    forecast_cache = ForecastCache()
+    forecast_cache.set(dhaka, "2024-07-10", "2024-07-10", [21.5] * 24)
+
+    assert cache.get(forecast_cache.make_key(dhaka, "2024-07-10")).value == (
+        np.full(24, 21.5, dtype=np.float32).tobytes()
+    )
+
+
+def test_ranking_windows_survive_the_shared_file_cache(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        "forecasts": {**settings.CACHES["forecasts"], "LOCATION": str(tmp_path)},
+    }
+    districts = [
+        {"name": f"District {i}", "lat": 20.0 + i / 10, "long": 90.0} for i in range(64)
+    ]
+    temperatures = [20.0] * 24 * 8
+    writer = ForecastCache(TwoTierCache(alias="forecasts"))
+    for district in districts:
+        writer.set(district, "2024-07-10", "2024-07-17", temperatures)
+
+    # Another worker has nothing in its own LRU and reads from the files
+    reader = ForecastCache(TwoTierCache(alias="forecasts"))
+    assert all(
+        reader.get(district, "2024-07-10", "2024-07-17") == temperatures
+        for district in districts
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_forecast_cache_keeps_shared_io_off_the_loop(monkeypatch):
+    shared_threads = []
+    get_many, set_many = LocMemCache.get_many, LocMemCache.set_many
+
+    def recording_get_many(self, *args, **kwargs):
+        shared_threads.append(threading.get_ident())
+        return get_many(self, *args, **kwargs)
+
+    def recording_set_many(self, *args, **kwargs):
+        shared_threads.append(threading.get_ident())
+        return set_many(self, *args, **kwargs)
+
+    monkeypatch.setattr(LocMemCache, "get_many", recording_get_many)
+    monkeypatch.setattr(LocMemCache, "set_many", recording_set_many)
+    forecast_cache = ForecastCache(TwoTierCache(alias="default"))
+    windows = [
+        (dhaka, "2024-07-10", "2024-07-11"),
+        (nearby, "2024-07-12", "2024-07-12"),
+    ]
+
+    await forecast_cache.aset_many(windows, [[1.0] * 48, [2.0] * 24], timeout=60)
+    forecast_cache.backend.local.clear()
+    lookups = await forecast_cache.alookup_many(windows)
+
+    assert lookups == [([1.0] * 48, False), ([2.0] * 24, False)]
+    # One write and one read for the whole batch, both on a worker thread
+    assert len(shared_threads) == 2
+    assert threading.get_ident() not in shared_threads
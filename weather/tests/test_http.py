@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import pytest
+
+from weather.http import HttpClients
+
+
+def test_sync_client_is_shared(settings):
+    settings.WEATHER_HTTP_MAX_CONNECTIONS = 5
+    clients = HttpClients()
+
+    client = clients.get_client()
+
+    assert clients.get_client() is client
+    clients.close()
+    assert client.is_closed
+    assert clients.get_client() is not client
+    clients.close()
+
+
+@pytest.mark.asyncio
+async def test_async_client_is_shared_within_a_loop():
+    clients = HttpClients()
+
+    client = clients.get_async_client()
+
+    assert clients.get_async_client() is client
+    await clients.aclose()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_clients_use_the_configured_transport():
+    clients = HttpClients()
+    clients.get_client()
+    clients.use_transport(httpx.MockTransport(lambda request: httpx.Response(204)))
+
+    response = await clients.get_async_client().get("https://example.com")
+
+    assert response.status_code == 204
+    assert clients.get_client().get("https://example.com").status_code == 204
+    await clients.aclose()
+
+
+def test_async_client_of_a_previous_loop_is_closed():
+    clients = HttpClients()
+
+    async def get_client():
+        return clients.get_async_client()
+
+    async def replace_client():
+        client = clients.get_async_client()
+        await clients.aclose()
+        return client
+
+    first = asyncio.run(get_client())
+    second = asyncio.run(replace_client())
+
+    assert second is not first
+    assert first.is_closed
+    assert second.is_closed
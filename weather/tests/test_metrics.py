@@ -0,0 +1,127 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+from django.urls import reverse
+
+from weather.http import HttpClients
+from weather.metrics import (
+    Counter,
+    Histogram,
+    cache_lookups,
+    registry,
+    request_duration,
+    requests_in_flight,
+    upstream_duration,
+    upstream_in_flight,
+)
+from weather.services import DistrictService
+
+
+def test_counter_renders_labels_in_exposition_format():
+    counter = Counter("demo", 'Help with "quotes"', ["name"])
+    counter.inc(name='a"b')
+    counter.inc(2, name='a"b')
+
+    assert counter.render() == [
+        '# HELP demo Help with \\"quotes\\"',
+        "# TYPE demo counter",
+        'demo_total{name="a\\"b"} 3.0',
+    ]
+
+
+def test_counter_rejects_unknown_labels():
+    with pytest.raises(ValueError):
+        Counter("demo", "Demo", ["name"]).inc(other="x")
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+
+    lines = histogram.render()
+
+    assert 'latency_bucket{le="0.1"} 1.0' in lines
+    assert 'latency_bucket{le="1.0"} 3.0' in lines
+    assert 'latency_bucket{le="+Inf"} 4.0' in lines
+    assert "latency_sum 4.25" in lines
+    assert "latency_count 4.0" in lines
+
+
+def test_histogram_samples_are_a_snapshot():
+    histogram = Histogram("latency", "Latency", buckets=(0.1,))
+    histogram.observe(0.05)
+    samples = histogram.samples()
+
+    next(samples)
+    # Observed mid-scrape, so it only shows up in the next scrape
+    histogram.observe(3.0)
+
+    assert list(samples)[-1] == ("latency_count", {}, 1)
+
+
+def test_district_cache_lookups_are_counted():
+    service = DistrictService()
+    with patch.object(service, "_download", return_value=[{"id": "1"}]):
+        service.get()
+        service.get()
+
+    assert cache_lookups.value(cache="districts", result="miss") == 1
+    assert cache_lookups.value(cache="districts", result="hit") == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_requests_are_timed_per_host_and_status():
+    clients = HttpClients(httpx.MockTransport(lambda request: httpx.Response(503)))
+
+    await clients.get_async_client().get("https://upstream.test/a")
+    clients.get_client().get("https://upstream.test/b")
+    await clients.aclose()
+
+    assert upstream_duration.count(host="upstream.test", status="503") == 2
+    assert upstream_in_flight.value(host="upstream.test") == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_upstream_requests_are_timed_as_errors():
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    clients = HttpClients(httpx.MockTransport(refuse))
+
+    with pytest.raises(httpx.ConnectError):
+        await clients.get_async_client().get("https://upstream.test/")
+    await clients.aclose()
+
+    assert upstream_duration.count(host="upstream.test", status="error") == 1
+    assert upstream_in_flight.value(host="upstream.test") == 0
+
+
+def test_requests_are_timed_per_view(client):
+    client.get(reverse("ready"))
+    client.get("/no-such-page")
+
+    assert request_duration.count(view="ready", method="GET", status="200") == 1
+    assert request_duration.count(view="unmatched", method="GET", status="404") == 1
+    assert requests_in_flight.value(view="ready") == 0
+
+
+def test_metrics_endpoint_serves_the_registry(client):
+    client.get(reverse("ready"))
+
+    response = client.get(reverse("metrics"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.content.decode()
+    assert "# TYPE weather_request_duration_seconds histogram" in body
+    assert (
+        'weather_request_duration_seconds_count{view="ready",method="GET",status="200"} 1.0'
+        in body
+    )
+    assert "weather_event_loop_blocked_seconds " in body
+
+
+def test_render_ends_with_a_newline():
+    assert registry.render().endswith("\n")
@@ -0,0 +1,74 @@
+import numpy as np
+import orjson
+import pytest
+
+from weather.parsers import (
+    average_at_hour,
+    parse_csv_temperatures,
+    parse_json_locations,
+    parse_json_temperatures,
+    values_at_hour,
+)
+from weather.services import WeatherForecast, read_json_locations
+
+mock_district = {"name": "Mock District", "lat": 23.8103, "long": 90.4125}
+
+
+def generate_open_meteo_csv(temperatures):
+    rows = [
+        "latitude,longitude,elevation,utc_offset_seconds,timezone,timezone_abbreviation",
+        "23.8,90.4,10.0,21600,Asia/Dhaka,+06",
+        "",
+        "time,temperature_2m (°C)",
+    ]
+    for hour, temperature in enumerate(temperatures):
+        rows.append(f"2024-07-{10 + hour // 24}T{hour % 24:02d}:00,{temperature}")
+    return "\n".join(rows) + "\n"
+
+
+def test_parse_csv_temperatures():
+    temperatures = parse_csv_temperatures(generate_open_meteo_csv([25.5, "", 27.0]))
+
+    assert temperatures[0] == 25.5
+    assert np.isnan(temperatures[1])
+    assert temperatures[2] == 27.0
+
+
+def test_parse_json_temperatures_keeps_missing_values():
+    temperatures = parse_json_temperatures({"hourly": {"temperature_2m": [1, None]}})
+
+    assert temperatures[0] == 1.0
+    assert np.isnan(temperatures[1])
+
+
+def test_values_at_hour_uses_index_arithmetic():
+    temperatures = list(range(24 * 3))
+
+    assert values_at_hour(temperatures, hour=14).tolist() == [14, 38, 62]
+    assert values_at_hour(temperatures, hour=14, days=2).tolist() == [14, 38]
+    assert average_at_hour(temperatures, hour=14, days=2) == 26.0
+
+
+@pytest.mark.parametrize("engine", ["numpy", "pandas"])
+def test_engines_agree(engine):
+    temperatures = [20.0 + (hour % 24) + hour / 100 for hour in range(24 * 8)]
+    forecast = WeatherForecast(mock_district, engine=engine)
+
+    parsed = forecast._parse_csv(generate_open_meteo_csv(temperatures))
+    result = forecast.process_temperatures(parsed)
+
+    assert result["average_temperature"] == average_at_hour(temperatures, 14, 7)
+
+
+def test_json_engines_agree():
+    hourly = {
+        "time": [f"2024-07-10T{hour:02d}:00" for hour in range(24)],
+        "temperature_2m": [20.0 + hour for hour in range(23)] + [None],
+    }
+    content = orjson.dumps([{"hourly": hourly}, {"hourly": hourly}])
+
+    expected = parse_json_locations(content)
+    parsed = read_json_locations(content)
+
+    assert len(parsed) == 2
+    np.testing.assert_array_equal(parsed, expected)
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from weather.pipeline import FetchPipeline
+
+
+def make_job(value, delay, tracker=None):
+    async def job():
+        if tracker is not None:
+            tracker["running"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["running"])
+        await asyncio.sleep(delay)
+        if tracker is not None:
+            tracker["running"] -= 1
+        return value
+
+    return job
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_in_completion_order():
+    pipeline = FetchPipeline(concurrency=3, timeout=None)
+    jobs = [make_job("slow", 0.05), make_job("fast", 0.0), make_job("mid", 0.02)]
+
+    results = [result async for result in pipeline.stream(jobs)]
+
+    assert results == ["fast", "mid", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_run_respects_concurrency_and_keeps_order():
+    tracker = {"running": 0, "peak": 0}
+    pipeline = FetchPipeline(concurrency=2, timeout=None)
+    jobs = [make_job(i, 0.01, tracker) for i in range(6)]
+
+    results = await pipeline.run(jobs)
+
+    assert results == list(range(6))
+    assert tracker["peak"] == 2
+
+
+@pytest.mark.asyncio
+async def test_job_timeout():
+    pipeline = FetchPipeline(concurrency=1, timeout=0.01)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await pipeline.run([make_job("never", 1)])
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError, match="Concurrency must be a positive integer"):
+        FetchPipeline(concurrency=0)
@@ -0,0 +1,98 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from django.urls import reverse
+
+from weather.profiling import PROFILE_HEADER, RequestProfile, stage
+
+mock_districts = [
+    {"name": f"District {i}", "lat": 23.0 + i, "long": 90.0 + i} for i in range(3)
+]
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.WEATHER_PROFILING = True
+    settings.WEATHER_PROFILING_TOKEN = None
+    settings.WEATHER_PROFILING_DIR = tmp_path
+    settings.WEATHER_FORECAST_BATCH_SIZE = 50
+    return tmp_path
+
+
+def test_stage_is_a_no_op_outside_a_profile():
+    with stage("fetch"):
+        pass
+
+
+def test_stages_add_up_within_a_profile():
+    profile = RequestProfile()
+    profile.start()
+    with stage("parse"):
+        pass
+    with stage("parse"):
+        pass
+    profile.stop()
+
+    assert list(profile.stages) == ["parse"]
+    assert profile.server_timing().startswith("parse;dur=")
+    assert profile.server_timing().split(", ")[-1].startswith("total;dur=")
+
+
+@pytest.mark.asyncio
+@patch("weather.ranking.DistrictService")
+@patch("weather.store.BatchWeatherForecast")
+async def test_profiled_top_districts_request(
+    mock_batch_forecast, mock_district_service, profiling, async_client
+):
+    mock_district_service.return_value.aget = AsyncMock(return_value=mock_districts)
+    mock_batch_forecast.return_value.fetch_temperatures = AsyncMock(
+        return_value=[[20.0 + i] * 24 * 8 for i in range(3)]
+    )
+
+    response = await async_client.get(
+        reverse("top-districts"), headers={PROFILE_HEADER: "1"}
+    )
+
+    assert response.status_code == 200
+    stages = [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+    assert stages == ["districts", "fetch", "rank", "render", "total"]
+
+    profile_id = response[f"{PROFILE_HEADER}-Id"]
+    assert (profiling / f"{profile_id}.prof").exists()
+    summary = json.loads((profiling / f"{profile_id}.json").read_text())
+    assert summary["path"] == reverse("top-districts")
+    assert summary["status"] == 200
+    assert set(summary["stages"]) == {"districts", "fetch", "rank", "render"}
+
+
+def test_profile_query_parameter(profiling, client):
+    response = client.get(reverse("ready"), {"profile": "1"})
+
+    assert "Server-Timing" in response
+    assert (profiling / f"{response[f'{PROFILE_HEADER}-Id']}.prof").exists()
+
+
+def test_requests_are_not_profiled_unless_asked(profiling, client):
+    response = client.get(reverse("ready"))
+
+    assert "Server-Timing" not in response
+    assert list(profiling.iterdir()) == []
+
+
+def test_profiling_is_off_by_default(settings, client):
+    settings.WEATHER_PROFILING = False
+
+    response = client.get(reverse("ready"), headers={PROFILE_HEADER: "1"})
+
+    assert "Server-Timing" not in response
+
+
+def test_profiling_token_must_match(profiling, settings, client):
+    settings.WEATHER_PROFILING_TOKEN = "secret"
+
+    rejected = client.get(reverse("ready"), headers={PROFILE_HEADER: "1"})
+    accepted = client.get(reverse("ready"), headers={PROFILE_HEADER: "secret"})
+
+    assert "Server-Timing" not in rejected
+    assert "Server-Timing" in accepted
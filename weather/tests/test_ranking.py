@@ -0,0 +1,76 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from django.core.cache import cache
+
+from weather.lifespan import lifespan
+from weather.ranking import (
+    TOP_DISTRICTS_CACHE_KEY,
+    RankingRefresher,
+    TopDistrictRanking,
+)
+
+ranking_data = [
+    {"district": "Sylhet", "average_temperature": 27.5},
+    {"district": "Dhaka", "average_temperature": 31.2},
+]
+
+
+@pytest.mark.asyncio
+async def test_refresh_stores_ranking_in_cache():
+    ranking = TopDistrictRanking()
+
+    with patch.object(ranking, "compute", AsyncMock(return_value=ranking_data)):
+        await ranking.refresh()
+
+    assert cache.get(TOP_DISTRICTS_CACHE_KEY) == ranking_data
+
+
+@pytest.mark.asyncio
+async def test_aget_computes_only_when_cold():
+    ranking = TopDistrictRanking()
+    compute = AsyncMock(return_value=ranking_data)
+
+    with patch.object(ranking, "compute", compute):
+        assert await ranking.aget() == ranking_data
+        assert await ranking.aget() == ranking_data
+
+    compute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_refresher_keeps_refreshing_after_failures():
+    ranking = TopDistrictRanking()
+    compute = AsyncMock(side_effect=[Exception("upstream down"), ranking_data])
+    refresher = RankingRefresher(ranking=ranking, interval=0)
+
+    with patch.object(ranking, "compute", compute):
+        refresher.start()
+        while compute.await_count < 2:
+            await asyncio.sleep(0)
+        await refresher.stop()
+
+    assert not refresher.running
+    assert cache.get(TOP_DISTRICTS_CACHE_KEY) == ranking_data
+
+
+@pytest.mark.asyncio
+async def test_lifespan_starts_and_stops_refresher(settings):
+    settings.WEATHER_RANKING_BACKGROUND_REFRESH = True
+    messages = asyncio.Queue()
+    sent = []
+
+    async def send(message):
+        sent.append(message["type"])
+
+    await messages.put({"type": "lifespan.startup"})
+    await messages.put({"type": "lifespan.shutdown"})
+
+    with patch("weather.lifespan.ranking_refresher") as refresher:
+        refresher.stop = AsyncMock()
+        await lifespan({"type": "lifespan"}, messages.get, send)
+
+    refresher.start.assert_called_once_with()
+    refresher.stop.assert_awaited_once()
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,95 @@
+import random
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from weather.registry import DistrictRegistry, chord_to_km, to_unit_vector
+
+districts_data = [
+    {"id": "1", "name": "Dhaka", "lat": "23.7115253", "long": "90.4111451"},
+    {"id": "2", "name": "Chattogram", "lat": "22.335109", "long": "91.834073"},
+    {"id": "3", "name": "Sylhet", "lat": "24.8897956", "long": "91.8697894"},
+    {"id": "4", "name": "Khulna", "lat": "22.815774", "long": "89.568679"},
+]
+
+
+def test_lookup_by_id_and_name():
+    registry = DistrictRegistry(districts_data)
+
+    assert registry.get(3)["name"] == "Sylhet"
+    assert registry.get("2")["name"] == "Chattogram"
+    assert registry.get(99) is None
+    assert registry.get_by_name("dhaka")["id"] == "1"
+
+
+def test_lookup_does_not_depend_on_order():
+    registry = DistrictRegistry(list(reversed(districts_data)))
+
+    assert registry.get(1)["name"] == "Dhaka"
+
+
+def test_nearest_matches_brute_force():
+    rng = random.Random(7)
+    districts = [
+        {
+            "id": str(idx),
+            "name": f"District {idx}",
+            "lat": str(rng.uniform(20.5, 26.5)),
+            "long": str(rng.uniform(88.0, 92.7)),
+        }
+        for idx in range(64)
+    ]
+    registry = DistrictRegistry(districts)
+
+    for _ in range(50):
+        lat, long = rng.uniform(20, 27), rng.uniform(87, 93)
+        point = to_unit_vector(lat, long)
+        expected = min(
+            districts,
+            key=lambda d: (
+                (to_unit_vector(float(d["lat"]), float(d["long"])) - point) ** 2
+            ).sum(),
+        )
+        district, _ = registry.nearest(lat, long)
+        assert district is expected
+
+
+def test_nearest_distance_in_km():
+    registry = DistrictRegistry(districts_data)
+
+    district, distance_km = registry.nearest(23.8103, 90.4125)
+
+    assert district["name"] == "Dhaka"
+    assert distance_km == pytest.approx(11, abs=1)
+    assert chord_to_km(0) == 0
+
+
+def test_nearest_without_districts():
+    with pytest.raises(LookupError):
+        DistrictRegistry([]).nearest(23.8, 90.4)
+
+
+@patch("weather.registry.DistrictService.get")
+def test_nearest_district_view(mock_districts_get):
+    mock_districts_get.return_value = districts_data
+    client = APIClient()
+
+    response = client.get(reverse("nearest-district"), {"lat": 24.9, "long": 91.87})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["district"]["name"] == "Sylhet"
+    assert response.data["distance_km"] < 5
+
+    client.get(reverse("nearest-district"), {"lat": 22.3, "long": 91.8})
+    mock_districts_get.assert_called_once()
+
+
+def test_nearest_district_view_validates_coordinates():
+    client = APIClient()
+
+    response = client.get(reverse("nearest-district"), {"lat": 123, "long": 91.87})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
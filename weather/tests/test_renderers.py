@@ -0,0 +1,71 @@
+import json
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+
+from weather import renderers
+from weather.cache import set_version
+from weather.ranking import TOP_DISTRICTS_CACHE_KEY
+from weather.renderers import FastJSONRenderer, RenderedJSON, camel_key, dumps
+
+payload = {
+    "travel_date": date(2024, 7, 10),
+    "district_ids": [1, 2],
+    "results": [{"dest_district_id": 2, "distance_km": Decimal("1.5")}],
+    "rows": ["01", "10"],
+    "name_2": None,
+    "already": {"camelCase": True, 3: "int key"},
+}
+
+
+def test_keys_match_the_camel_case_package():
+    for key in ("distance_km", "dest_district_id", "name_2", "a_1b", "_private", "x"):
+        expected = CamelCaseJSONRenderer().render({key: 1})
+        assert json.loads(expected) == {camel_key(key): 1}
+
+
+def test_renders_like_the_camel_case_renderer():
+    rendered = FastJSONRenderer().render(payload)
+
+    assert json.loads(rendered) == json.loads(CamelCaseJSONRenderer().render(payload))
+
+
+def test_encodes_numpy_values():
+    assert json.loads(dumps({"value": np.float32(1.5)})) == {"value": 1.5}
+
+
+def test_prerendered_payloads_are_written_as_is():
+    body = RenderedJSON(b'{"snake_case":1}')
+
+    assert FastJSONRenderer().render(body) == b'{"snake_case":1}'
+
+
+def test_response_serializer_keys_are_precomputed():
+    # Nested item serializers of the bulk response included
+    for key in ("district_ids", "dest_district_id", "distance_km"):
+        assert key in renderers._camel_keys
+
+
+@pytest.mark.asyncio
+async def test_top_districts_body_is_rendered_once_per_version(async_client):
+    ranking = [{"district": "Sylhet", "average_temperature": 25.0}]
+    cache.set(TOP_DISTRICTS_CACHE_KEY, ranking)
+    set_version(TOP_DISTRICTS_CACHE_KEY, ranking, timeout=60)
+    url = reverse("top-districts")
+
+    first = await async_client.get(url)
+    with patch("weather.views.TopDistrictRanking.atop") as atop:
+        second = await async_client.get(url)
+
+    atop.assert_not_called()
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+    assert json.loads(second.content) == [
+        {"district": "Sylhet", "averageTemperature": 25.0}
+    ]
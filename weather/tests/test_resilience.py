@@ -0,0 +1,246 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from weather import metrics
+from weather.exceptions import UpstreamUnavailableException
+from weather.resilience import CircuitBreaker, Upstream
+from weather.services import BatchWeatherForecast
+
+URL = "https://api.example.com/v1/forecast"
+
+districts = [
+    {"name": f"District {i}", "lat": 23.0 + i, "long": 90.0 + i} for i in range(4)
+]
+
+
+def responding(*statuses):
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(statuses[min(len(calls), len(statuses)) - 1])
+
+    return handler, calls
+
+
+@pytest.mark.asyncio
+async def test_retries_server_errors_until_success():
+    handler, calls = responding(503, 502, 200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        response = await Upstream().aget(client, URL)
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert metrics.upstream_retries.value(host="api.example.com") == 2
+
+
+def test_client_errors_are_not_retried():
+    handler, calls = responding(404)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        response = Upstream().get(client, URL)
+
+    assert response.status_code == 404
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_returns_last_response_once_retries_are_used_up(settings):
+    settings.WEATHER_UPSTREAM_RETRIES = 1
+    handler, calls = responding(500)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        response = await Upstream().aget(client, URL)
+
+    assert response.status_code == 500
+    assert len(calls) == 2
+
+
+def test_reraises_transport_errors_once_retries_are_used_up():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        raise httpx.ConnectError("unreachable", request=request)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(httpx.ConnectError):
+            Upstream().get(client, URL)
+
+    assert len(calls) == 3
+
+
+def test_circuit_breaker_opens_and_lets_a_trial_call_through():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=0)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.open
+
+    # The reset timeout passed, one trial call goes through at a time
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert not breaker.open
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast(settings):
+    settings.WEATHER_CIRCUIT_BREAKER_THRESHOLD = 2
+    handler, calls = responding(503)
+    upstream = Upstream()
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        # The breaker opens on the second failure, so no third attempt is made
+        assert (await upstream.aget(client, URL)).status_code == 503
+        with pytest.raises(UpstreamUnavailableException):
+            await upstream.aget(client, URL)
+
+    assert len(calls) == 2
+    assert upstream.breaker("api.example.com").open
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_call_lets_the_next_one_through(settings):
+    settings.WEATHER_CIRCUIT_BREAKER_THRESHOLD = 1
+    settings.WEATHER_CIRCUIT_BREAKER_RESET = 0
+    upstream = Upstream()
+    upstream.breaker("api.example.com").record_failure()
+    hang = True
+
+    async def get(url):
+        if hang:
+            await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient()
+    client.get = get
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(upstream.aget(client, URL), 0.01)
+
+    hang = False
+    assert (await upstream.aget(client, URL)).status_code == 200
+    assert not upstream.breaker("api.example.com").open
+
+
+@pytest.mark.asyncio
+async def test_hedges_requests_slower_than_the_latency_percentile(settings):
+    settings.WEATHER_HEDGE_REQUESTS = True
+    settings.WEATHER_HEDGE_MIN_SAMPLES = 1
+    upstream = Upstream()
+    upstream._record_latency("api.example.com", 0.01)
+    calls = []
+
+    async def get(url):
+        calls.append(url)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        return httpx.Response(200, text=str(len(calls)))
+
+    client = httpx.AsyncClient()
+    client.get = get
+    response = await asyncio.wait_for(upstream.aget(client, URL), 1)
+
+    assert response.text == "2"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_fetch_returns_partial_results(settings):
+    settings.WEATHER_UPSTREAM_RETRIES = 0
+
+    def handler(request):
+        latitudes = request.url.params["latitude"].split(",")
+        if latitudes[0] == "23.0":
+            return httpx.Response(503)
+        hourly = {"time": [], "temperature_2m": [20.0] * 24}
+        return httpx.Response(200, json=[{"hourly": hourly}] * len(latitudes))
+
+    batch = BatchWeatherForecast(districts, days=0, batch_size=2)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        series = await batch.fetch_temperatures(client, allow_partial=True)
+        with pytest.raises(httpx.HTTPStatusError):
+            await BatchWeatherForecast(districts[:2], days=0).fetch_temperatures(
+                client, allow_partial=True
+            )
+
+    assert series[:2] == [None, None]
+    assert series[2] == [20.0] * 24
+
+
+def test_travel_decision_upstream_failure_is_503(settings, monkeypatch):
+    settings.WEATHER_UPSTREAM_RETRIES = 0
+
+    async def failing_districts(self):
+        raise httpx.ConnectError("unreachable")
+
+    monkeypatch.setattr("weather.registry.DistrictService.aget", failing_districts)
+    data = {
+        "current_district_id": 1,
+        "dest_district_id": 2,
+        "travel_date": "2024-07-10",
+    }
+
+    response = APIClient().post(reverse("travel-decision"), data, format="json")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.parametrize(
+    "upstream_status, expected",
+    [
+        (status.HTTP_400_BAD_REQUEST, status.HTTP_502_BAD_GATEWAY),
+        (status.HTTP_429_TOO_MANY_REQUESTS, status.HTTP_503_SERVICE_UNAVAILABLE),
+        (status.HTTP_500_INTERNAL_SERVER_ERROR, status.HTTP_503_SERVICE_UNAVAILABLE),
+    ],
+)
+def test_travel_decision_upstream_status_errors(monkeypatch, upstream_status, expected):
+    async def rejected_districts(self):
+        request = httpx.Request("GET", URL)
+        response = httpx.Response(upstream_status, request=request)
+        response.raise_for_status()
+
+    monkeypatch.setattr("weather.registry.DistrictService.aget", rejected_districts)
+    data = {
+        "current_district_id": 1,
+        "dest_district_id": 2,
+        "travel_date": "2024-07-10",
+    }
+
+    response = APIClient().post(reverse("travel-decision"), data, format="json")
+
+    assert response.status_code == expected
+
+
+@pytest.mark.parametrize(
+    "upstream_status, expected",
+    [
+        (status.HTTP_503_SERVICE_UNAVAILABLE, status.HTTP_503_SERVICE_UNAVAILABLE),
+        (status.HTTP_404_NOT_FOUND, status.HTTP_502_BAD_GATEWAY),
+    ],
+)
+def test_travel_decision_districts_failure(settings, upstream_status, expected):
+    settings.WEATHER_UPSTREAM_RETRIES = 0
+
+    async def mock_get(*args, **kwargs):
+        return httpx.Response(upstream_status)
+
+    data = {
+        "current_district_id": 1,
+        "dest_district_id": 2,
+        "travel_date": "2024-07-10",
+    }
+    with patch("httpx.AsyncClient.get", new=mock_get):
+        response = APIClient().post(reverse("travel-decision"), data, format="json")
+
+    assert response.status_code == expected
+    assert response.json()["detail"] == "Couldn't Fetch Data for Districts API"
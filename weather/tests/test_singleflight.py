@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from weather.services import DistrictService
+from weather.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_calls_share_one_flight():
+    flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "districts"
+
+    results = await asyncio.gather(*[flight.ado("key", load) for _ in range(5)])
+
+    assert results == ["districts"] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_async_errors_reach_every_waiter_and_release_the_key():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(
+        flight.ado("key", fail), flight.ado("key", fail), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def load():
+        return "recovered"
+
+    assert await flight.ado("key", load) == "recovered"
+
+
+def test_concurrent_sync_calls_share_one_flight():
+    flight = SingleFlight()
+    calls = 0
+    results = []
+
+    def load():
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return "districts"
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("key", load)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["districts"] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_district_cache_miss_downloads_once():
+    calls = 0
+
+    async def mock_get(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(status_code=200, json={"districts": [{"id": "1"}]})
+
+    service = DistrictService("http://example.com/api/districts")
+    with patch("httpx.AsyncClient.get", new=mock_get):
+        results = await asyncio.gather(*[service.aget() for _ in range(10)])
+
+    assert calls == 1
+    assert all(result == [{"id": "1"}] for result in results)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from weather.store import ForecastMatrix, ForecastStore
+
+districts = [
+    {"id": "1", "name": "Dhaka", "lat": "23.8103", "long": "90.4125"},
+    {"id": "2", "name": "Chittagong", "lat": "22.3569", "long": "91.7832"},
+    {"id": "3", "name": "Sylhet", "lat": "24.8949", "long": "91.8687"},
+]
+
+
+def hourly(*daily_temperatures):
+    return [temperature for day in daily_temperatures for temperature in [day] * 24]
+
+
+def test_matrix_ranks_by_mean_at_hour():
+    matrix = ForecastMatrix.from_series(
+        districts,
+        "2024-07-10",
+        [hourly(30, 32), hourly(25, 27), hourly(28, 26)],
+    )
+
+    assert matrix.temperatures.shape == (3, 48)
+    assert matrix.mean_at_hour(14).tolist() == [31.0, 26.0, 27.0]
+    assert [result["district"] for result in matrix.rank_by_mean(14)] == [
+        "Chittagong",
+        "Sylhet",
+        "Dhaka",
+    ]
+    assert matrix.values_at_hour(18, days=1)[:, 0].tolist() == [30.0, 25.0, 28.0]
+
+
+def test_matrix_pads_short_series_with_nan():
+    matrix = ForecastMatrix.from_series(
+        districts, "2024-07-10", [hourly(30, 32), hourly(25), hourly(28, 26)]
+    )
+
+    assert np.isnan(matrix.row(2)[24:]).all()
+    assert matrix.mean_at_hour(14).tolist() == [31.0, 25.0, 27.0]
+
+
+def test_matrix_looks_rows_up_by_id():
+    matrix = ForecastMatrix.from_series(
+        districts, "2024-07-10", [hourly(30), hourly(25), hourly(28)]
+    )
+
+    assert matrix.index_of("3") == 2
+    assert matrix.row(2)[0] == 25.0
+    with pytest.raises(KeyError):
+        matrix.index_of(99)
+
+
+def test_matrix_aggregates_at_hour():
+    matrix = ForecastMatrix.from_series(
+        districts,
+        "2024-07-10",
+        [hourly(30, 32, 40), hourly(25, 27, 26), hourly(28)],
+    )
+
+    assert matrix.aggregate_at_hour(14, aggregate="median").tolist() == [
+        32.0,
+        26.0,
+        28.0,
+    ]
+    assert matrix.aggregate_at_hour(14, days=2, aggregate="max").tolist() == [
+        32.0,
+        27.0,
+        28.0,
+    ]
+    assert matrix.aggregate_at_hour(14, aggregate="min").tolist() == [30.0, 25.0, 28.0]
+    with pytest.raises(ValueError):
+        matrix.aggregate_at_hour(14, aggregate="mode")
+
+
+def test_matrix_top_matches_the_full_ranking():
+    rng = np.random.default_rng(0)
+    many = [
+        {"id": str(i), "name": f"District {i}", "lat": "23.0", "long": "90.0"}
+        for i in range(64)
+    ]
+    # Few distinct values, so the cut falls inside a run of ties
+    series = [hourly(*rng.integers(20, 24, size=3)) for _ in many]
+    matrix = ForecastMatrix.from_series(many, "2024-07-10", series)
+
+    for limit in (1, 5, 10, 64, 100):
+        assert matrix.top(14, limit=limit) == matrix.rank_by_mean(14)[:limit]
+
+
+def test_matrix_top_leaves_out_districts_without_data():
+    matrix = ForecastMatrix.from_series(
+        districts, "2024-07-10", [hourly(30), None, hourly(28)]
+    )
+
+    assert matrix.missing == 1
+    assert matrix.top(8, aggregate="max", limit=3) == [
+        {"district": "Sylhet", "max_temperature": 28.0},
+        {"district": "Dhaka", "max_temperature": 30.0},
+    ]
+    assert [row["district"] for row in matrix.rank_by_mean(8)] == ["Sylhet", "Dhaka"]
+
+
+def test_store_keeps_a_bounded_number_of_windows():
+    store = ForecastStore(max_windows=2)
+    for day in ("2024-07-10", "2024-07-11", "2024-07-12"):
+        store.put(0, ForecastMatrix.from_series(districts, day, [[], [], []]))
+
+    assert store.get("2024-07-10", 0) is None
+    assert store.get("2024-07-12", 0).start_date == "2024-07-12"
+    assert store.get("2024-07-12", 0, district_ids=(1, 2)) is None
@@ -0,0 +1,20 @@
+import numpy as np
+
+from weather.serializers import TravelDecisionEnum
+from weather.travel import can_visit_matrix, decide, encode_rows
+
+
+def test_can_visit_matrix_matches_decide():
+    temperatures = [30.0, 25.0, 30.0, 35.0]
+
+    matrix = can_visit_matrix(temperatures)
+
+    for i, current in enumerate(temperatures):
+        for j, target in enumerate(temperatures):
+            assert matrix[i, j] == (decide(current, target) == TravelDecisionEnum.YES)
+
+
+def test_encode_rows():
+    matrix = np.array([[True, False, True], [False, False, True]])
+
+    assert encode_rows(matrix) == ["101", "001"]
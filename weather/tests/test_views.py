@@ -1,15 +1,19 @@
 # tests/test_views.py
 import asyncio
 import json
+from datetime import date
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
-from django.http import JsonResponse
+from django.core.cache import cache
 from django.test import RequestFactory
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from weather.ranking import TOP_DISTRICTS_CACHE_KEY
+from weather.renderers import camelize
 from weather.views import TopDistrictListView
 
 mock_districts = [
@@ -22,9 +26,12 @@ mock_weather_data = [
 
 
 @pytest.mark.asyncio
-@patch("weather.views.DistrictService")
-@patch("weather.views.WeatherForecast")
-async def test_top_district_list_view(mock_weather_forecast, mock_district_service):
+@patch("weather.ranking.DistrictService")
+@patch("weather.ranking.WeatherForecast")
+async def test_top_district_list_view(
+    mock_weather_forecast, mock_district_service, settings
+):
+    settings.WEATHER_FORECAST_BATCH_SIZE = None
     mock_district_service.return_value.aget.return_value = asyncio.Future()
     mock_district_service.return_value.aget.return_value.set_result(mock_districts)
 
@@ -39,13 +46,108 @@ async def test_top_district_list_view(mock_weather_forecast, mock_district_servi
 
     response = await view(request)
 
-    assert isinstance(response, JsonResponse)
+    assert response["Content-Type"] == "application/json"
     assert response.status_code == 200
     response_data = json.loads(response.content)
 
     assert len(response_data) == 10
 
 
+@pytest.mark.asyncio
+@patch("weather.ranking.DistrictService")
+@patch("weather.store.BatchWeatherForecast")
+async def test_top_district_list_view_batched(
+    mock_batch_forecast, mock_district_service, settings
+):
+    settings.WEATHER_FORECAST_BATCH_SIZE = 50
+    mock_district_service.return_value.aget = AsyncMock(return_value=mock_districts)
+    # District 0 is the warmest, so the ranking has to reverse the registry order
+    mock_batch_forecast.return_value.fetch_temperatures = AsyncMock(
+        return_value=[
+            [data["average_temperature"]] * 24 * 8
+            for data in reversed(mock_weather_data)
+        ]
+    )
+
+    factory = RequestFactory()
+    request = factory.get("/api/top-districts/")
+    view = TopDistrictListView.as_view()
+
+    response = await view(request)
+
+    response_data = json.loads(response.content)
+    mock_batch_forecast.assert_called_once_with(
+        mock_districts, days=7, start_date=date.today().isoformat()
+    )
+    assert len(response_data) == 10
+    assert response_data[0] == {"district": "District 11", "averageTemperature": 25.0}
+
+
+@pytest.mark.asyncio
+@patch("weather.ranking.DistrictService")
+@patch("weather.store.BatchWeatherForecast")
+async def test_top_district_list_view_query_parameters(
+    mock_batch_forecast, mock_district_service, settings
+):
+    settings.WEATHER_FORECAST_BATCH_SIZE = 50
+    mock_district_service.return_value.aget = AsyncMock(return_value=mock_districts)
+    # District i is i degrees warmer at 8 AM, and the order flips at 2 PM
+    mock_batch_forecast.return_value.fetch_temperatures = AsyncMock(
+        return_value=[
+            [20.0 + i if hour % 24 == 8 else 40.0 - i for hour in range(24 * 8)]
+            for i in range(len(mock_districts))
+        ]
+    )
+    view = TopDistrictListView.as_view()
+    factory = RequestFactory()
+
+    default = await view(factory.get("/api/top-districts/"))
+    commute = await view(
+        factory.get(
+            "/api/top-districts/",
+            {"hour": 8, "days": 3, "aggregate": "max", "limit": 5},
+        )
+    )
+
+    assert json.loads(default.content)[0]["district"] == "District 11"
+    assert json.loads(commute.content) == [
+        {"district": f"District {i}", "maxTemperature": 20.0 + i} for i in range(5)
+    ]
+    # Every variant is computed from the same forecast matrix
+    mock_batch_forecast.return_value.fetch_temperatures.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "query", [{"hour": 24}, {"days": 0}, {"aggregate": "mode"}, {"limit": 0}]
+)
+async def test_top_district_list_view_rejects_invalid_query(query):
+    request = RequestFactory().get("/api/top-districts/", query)
+
+    response = await TopDistrictListView.as_view()(request)
+
+    assert response.status_code == 400
+    assert list(json.loads(response.content)) == list(query)
+
+
+@pytest.mark.asyncio
+@patch("weather.ranking.DistrictService")
+async def test_top_district_list_view_reads_precomputed_ranking(
+    mock_district_service,
+):
+    cache.set(TOP_DISTRICTS_CACHE_KEY, mock_weather_data)
+
+    factory = RequestFactory()
+    request = factory.get("/api/top-districts/")
+    view = TopDistrictListView.as_view()
+
+    response = await view(request)
+
+    response_data = json.loads(response.content)
+    assert response_data == camelize(mock_weather_data[:10])
+    mock_district_service.assert_not_called()
+
+
 districts_data = [
     {"id": "1", "name": "Dhaka", "lat": "23.8103", "long": "90.4125"},
     {"id": "2", "name": "Chittagong", "lat": "22.3569", "long": "91.7832"},
@@ -84,12 +186,23 @@ weather_response = {
 }
 
 
-@patch("weather.views.httpx.Client.get")
-@patch("weather.views.DistrictService.get")
-def test_travel_decision(mock_districts_get, mock_httpx_get):
+def mock_forecast_get(requested_urls):
+    async def mock_get(self, url, *args, **kwargs):
+        requested_urls.append(httpx.URL(url))
+        locations = len(httpx.URL(url).params["latitude"].split(","))
+        return httpx.Response(
+            status_code=status.HTTP_200_OK,
+            json=[weather_response] * locations,
+            request=httpx.Request("GET", url),
+        )
+
+    return mock_get
+
+
+@patch("weather.registry.DistrictService.aget")
+def test_travel_decision(mock_districts_get):
     mock_districts_get.return_value = districts_data
-    mock_httpx_get.return_value.json.return_value = weather_response
-    mock_httpx_get.return_value.status_code = status.HTTP_200_OK
+    requested_urls = []
     url = reverse("travel-decision")  # Replace with your actual URL name
 
     client = APIClient()
@@ -101,9 +214,197 @@ def test_travel_decision(mock_districts_get, mock_httpx_get):
         "travel_date": "2024-07-10",
     }
 
-    response = client.post(url, data, format="json")
+    with patch("httpx.AsyncClient.get", new=mock_forecast_get(requested_urls)):
+        response = client.post(url, data, format="json")
 
     assert response.status_code == status.HTTP_200_OK
     assert "decision" in response.data
     assert response.data["decision"] in ["Can Visit", "Shouldn't visit"]
     assert response.data["travel_date"] == "2024-07-10"
+
+
+@patch("weather.registry.DistrictService.aget")
+def test_travel_decision_fetches_only_the_travel_date(mock_districts_get):
+    mock_districts_get.return_value = districts_data
+    requested_urls = []
+
+    client = APIClient()
+    url = reverse("travel-decision")
+
+    data = {
+        "current_district_id": 1,
+        "dest_district_id": 2,
+        "travel_date": "2024-07-10",
+    }
+
+    with patch("httpx.AsyncClient.get", new=mock_forecast_get(requested_urls)):
+        client.post(url, data, format="json")
+
+    assert len(requested_urls) == 1
+    params = requested_urls[0].params
+    assert params["latitude"] == "23.8103,22.3569"
+    assert params["start_date"] == params["end_date"] == "2024-07-10"
+
+
+@patch("weather.registry.DistrictService.aget")
+def test_travel_decision_without_batching(mock_districts_get, settings):
+    settings.WEATHER_FORECAST_BATCH_SIZE = None
+    mock_districts_get.return_value = districts_data
+    requested_urls = []
+
+    data = {
+        "current_district_id": 1,
+        "dest_district_id": 2,
+        "travel_date": "2024-07-10",
+    }
+
+    with patch("httpx.AsyncClient.get", new=mock_forecast_get(requested_urls)):
+        response = APIClient().post(reverse("travel-decision"), data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(requested_urls) == 2
+
+
+@patch("weather.registry.DistrictService.aget")
+def test_travel_decision_reuses_cached_forecasts(mock_districts_get):
+    mock_districts_get.return_value = districts_data
+    requested_urls = []
+
+    client = APIClient()
+    url = reverse("travel-decision")
+
+    data = {
+        "current_district_id": 1,
+        "dest_district_id": 2,
+        "travel_date": "2024-07-10",
+    }
+
+    with patch("httpx.AsyncClient.get", new=mock_forecast_get(requested_urls)):
+        client.post(url, data, format="json")
+        response = client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(requested_urls) == 1
+
+
+@patch("weather.registry.DistrictService.aget")
+def test_travel_decision_bulk_fetches_each_district_date_once(mock_districts_get):
+    mock_districts_get.return_value = districts_data
+    requested_urls = []
+
+    client = APIClient()
+    url = reverse("travel-decision-bulk")
+
+    data = {
+        "items": [
+            {
+                "current_district_id": 1,
+                "dest_district_id": 2,
+                "travel_date": "2024-07-10",
+            },
+            {
+                "current_district_id": 2,
+                "dest_district_id": 1,
+                "travel_date": "2024-07-10",
+            },
+            {
+                "current_district_id": 1,
+                "dest_district_id": 2,
+                "travel_date": "2024-07-10",
+            },
+            {
+                "current_district_id": 1,
+                "dest_district_id": 2,
+                "travel_date": "2024-07-11",
+            },
+        ]
+    }
+
+    with patch("httpx.AsyncClient.get", new=mock_forecast_get(requested_urls)):
+        response = client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.data["results"]
+    assert [item["travel_date"] for item in results] == [
+        "2024-07-10",
+        "2024-07-10",
+        "2024-07-10",
+        "2024-07-11",
+    ]
+    assert results[1]["current_district_id"] == 2
+    assert all(item["decision"] == "Can Visit" for item in results)
+
+    # One request per travel date, each carrying both districts exactly once
+    assert sorted(url.params["start_date"] for url in requested_urls) == [
+        "2024-07-10",
+        "2024-07-11",
+    ]
+    assert all(url.params["latitude"] == "23.8103,22.3569" for url in requested_urls)
+
+
+@patch("weather.registry.DistrictService.aget")
+def test_travel_decision_bulk_unknown_district(mock_districts_get):
+    mock_districts_get.return_value = districts_data
+
+    client = APIClient()
+    url = reverse("travel-decision-bulk")
+
+    data = {
+        "items": [
+            {
+                "current_district_id": 1,
+                "dest_district_id": 99,
+                "travel_date": "2024-07-10",
+            }
+        ]
+    }
+
+    response = client.post(url, data, format="json")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_travel_decision_bulk_rejects_empty_items():
+    client = APIClient()
+
+    response = client.post(
+        reverse("travel-decision-bulk"), {"items": []}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@patch("weather.registry.DistrictService.aget")
+def test_travel_decision_matrix(mock_districts_get):
+    mock_districts_get.return_value = districts_data
+    requested_urls = []
+    # Dhaka is warmer than Chittagong at 6 PM
+    temperatures = {"23.8103": 35.0, "22.3569": 28.0}
+
+    async def mock_get(self, url, *args, **kwargs):
+        requested_urls.append(httpx.URL(url))
+        latitudes = httpx.URL(url).params["latitude"].split(",")
+        return httpx.Response(
+            status_code=status.HTTP_200_OK,
+            json=[
+                {"hourly": {"temperature_2m": [temperatures[lat]] * 24}}
+                for lat in latitudes
+            ],
+            request=httpx.Request("GET", url),
+        )
+
+    client = APIClient()
+    url = reverse("travel-decision-matrix")
+
+    with patch("httpx.AsyncClient.get", new=mock_get):
+        response = client.get(url, {"travel_date": "2024-07-10"})
+        row = client.get(url, {"travel_date": "2024-07-10", "current_district_id": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["district_ids"] == [1, 2]
+    assert response.data["temperatures"] == [35.0, 28.0]
+    assert response.data["rows"] == ["11", "01"]
+    assert row.data["origins"] == [2]
+    assert row.data["rows"] == ["01"]
+    # The second request is served from the per-day forecast cache
+    assert len(requested_urls) == 1
@@ -0,0 +1,73 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from django.test import RequestFactory
+
+from weather.views import ReadinessView
+from weather.warmup import WarmUp, WarmUpStatus
+
+ranking_data = [{"district": "Sylhet", "average_temperature": 27.5}]
+
+
+def make_warmup(refresh):
+    ranking = MagicMock(refresh=refresh)
+    return WarmUp(ranking=ranking, timeout=5)
+
+
+@pytest.mark.asyncio
+@patch("weather.warmup.aget_registry", new_callable=AsyncMock)
+async def test_warmup_loads_districts_and_ranking(mock_registry):
+    mock_registry.return_value = [object()] * 64
+    warmup = make_warmup(AsyncMock(return_value=ranking_data))
+
+    warmup.start()
+    await warmup.wait()
+
+    assert warmup.ready
+    assert warmup.snapshot()["districts"] == 64
+    assert warmup.snapshot()["ranked_districts"] == 1
+    assert warmup.start() is None
+
+
+@pytest.mark.asyncio
+@patch("weather.warmup.aget_registry", new_callable=AsyncMock)
+async def test_failed_warmup_is_retried(mock_registry):
+    mock_registry.return_value = []
+    warmup = make_warmup(AsyncMock(side_effect=[Exception("upstream down"), []]))
+
+    warmup.start()
+    await warmup.wait()
+    assert warmup.status == WarmUpStatus.FAILED
+    assert warmup.snapshot()["error"] == "upstream down"
+
+    warmup.start()
+    await warmup.wait()
+    assert warmup.status == WarmUpStatus.READY
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_disabled_warmup():
+    response = await ReadinessView.as_view()(RequestFactory().get("/ready/"))
+
+    assert response.status_code == 200
+    assert json.loads(response.content) == {"status": "disabled", "ready": True}
+
+
+@pytest.mark.asyncio
+@patch("weather.warmup.aget_registry", new_callable=AsyncMock)
+async def test_readiness_waits_for_warmup(mock_registry, settings):
+    settings.WEATHER_WARMUP = True
+    mock_registry.return_value = []
+    warmup = make_warmup(AsyncMock(return_value=ranking_data))
+    view = ReadinessView.as_view()
+
+    with patch("weather.views.warmup", warmup):
+        cold = await view(RequestFactory().get("/ready/"))
+        await warmup.wait()
+        warm = await view(RequestFactory().get("/ready/"))
+
+    assert cold.status_code == 503
+    assert json.loads(cold.content)["status"] == "running"
+    assert warm.status_code == 200
+    assert json.loads(warm.content)["ready"] is True
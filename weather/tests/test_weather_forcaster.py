@@ -1,11 +1,16 @@
+import time
 from datetime import datetime
+from unittest.mock import patch
 
 import httpx
 import pandas as pd
 import pytest
 import responses
 
+from weather.exceptions import RemoteCallException
+from weather.revalidation import revalidator
 from weather.services import (
+    BatchWeatherForecast,
     WeatherForecast,
 )
 
@@ -13,6 +18,22 @@ from weather.services import (
 mock_district = {"name": "Mock District", "lat": 23.8103, "long": 90.4125}
 
 
+mock_districts = [
+    {"name": f"District {i}", "lat": 23.0 + i, "long": 90.0 + i} for i in range(5)
+]
+
+
+# Helper function to generate mock Open-Meteo JSON location objects
+def generate_mock_location(base_temperature):
+    times = pd.date_range(start=datetime.today().date(), periods=24 * 8, freq="h")
+    return {
+        "hourly": {
+            "time": [time.strftime("%Y-%m-%dT%H:%M") for time in times],
+            "temperature_2m": [base_temperature + time.hour for time in times],
+        }
+    }
+
+
 # Helper function to generate mock CSV data
 def generate_mock_csv():
     dates = pd.date_range(start=datetime.today(), periods=7, freq="D")
@@ -41,3 +62,108 @@ async def test_fetch_and_process(mock_weather_forecast):
         result = await mock_weather_forecast.fetch_and_process(client)
 
     assert result["district"] == "Mock District"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", ["numpy", "pandas"])
+async def test_batch_fetch_temperatures_splits_locations(engine):
+    requested_urls = []
+
+    def handler(request):
+        requested_urls.append(request.url)
+        latitudes = request.url.params["latitude"].split(",")
+        return httpx.Response(
+            200,
+            json=[generate_mock_location(float(lat)) for lat in latitudes],
+        )
+
+    batch = BatchWeatherForecast(mock_districts, batch_size=2, engine=engine)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        series = await batch.fetch_temperatures(client)
+
+    assert len(requested_urls) == 3
+    assert [temperatures[14] for temperatures in series] == [
+        district["lat"] + 14 for district in mock_districts
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_fetch_rejects_mismatched_response():
+    def handler(request):
+        return httpx.Response(200, json=[generate_mock_location(20.0)])
+
+    batch = BatchWeatherForecast(mock_districts[:2], batch_size=2)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(RemoteCallException):
+            await batch.fetch_temperatures(client)
+
+
+def test_batch_size_must_be_positive():
+    with pytest.raises(ValueError, match="Batch size must be a positive integer"):
+        BatchWeatherForecast(mock_districts, batch_size=0)
+
+
+def test_batch_size_setting_none_means_one_location_per_request(settings):
+    settings.WEATHER_FORECAST_BATCH_SIZE = None
+
+    batches = BatchWeatherForecast(mock_districts).batches()
+
+    assert [len(batch) for batch in batches] == [1] * len(mock_districts)
+
+
+@pytest.mark.asyncio
+async def test_batch_fetch_skips_cached_locations():
+    requested_latitudes = []
+
+    def handler(request):
+        latitudes = request.url.params["latitude"].split(",")
+        requested_latitudes.extend(latitudes)
+        return httpx.Response(
+            200,
+            json=[generate_mock_location(float(lat)) for lat in latitudes],
+        )
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        first = await BatchWeatherForecast(mock_districts[:2]).fetch_temperatures(
+            client
+        )
+        second = await BatchWeatherForecast(mock_districts).fetch_temperatures(client)
+
+    assert requested_latitudes == ["23.0", "24.0", "25.0", "26.0", "27.0"]
+    assert second[:2] == first
+
+
+@pytest.mark.asyncio
+async def test_batch_fetch_serves_stale_locations_while_refreshing():
+    requested_latitudes = []
+    base_temperature = 20.0
+
+    def handler(request):
+        latitudes = request.url.params["latitude"].split(",")
+        requested_latitudes.append(latitudes)
+        return httpx.Response(
+            200,
+            json=[generate_mock_location(base_temperature) for _ in latitudes],
+        )
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        # Cached a day ago, every entry is past its freshness but not yet evicted
+        with patch("weather.cache.time") as clock:
+            clock.time.return_value = time.time() - 60 * 60 * 24
+            clock.monotonic.side_effect = time.monotonic
+            await BatchWeatherForecast(mock_districts[:2]).fetch_temperatures(client)
+
+        base_temperature = 30.0
+        stale = await BatchWeatherForecast(mock_districts).fetch_temperatures(client)
+        await revalidator.wait()
+        fresh = await BatchWeatherForecast(mock_districts[:2]).fetch_temperatures(
+            client
+        )
+
+    assert sorted(requested_latitudes) == [
+        ["23.0", "24.0"],
+        ["23.0", "24.0"],
+        ["25.0", "26.0", "27.0"],
+    ]
+    assert [series[14] for series in stale] == [34.0, 34.0] + [44.0] * 3
+    assert [series[14] for series in fresh] == [44.0, 44.0]
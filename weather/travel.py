@@ -0,0 +1,183 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from weather.exceptions import DistrictNotFoundException
+from weather.http import http_clients
+from weather.pipeline import FetchPipeline
+from weather.registry import aget_registry
+from weather.serializers import TravelDecisionEnum
+from weather.services import BatchWeatherForecast
+from weather.store import forecast_store
+
+SIX_PM_DIGIT = 18
+
+
+def decide(current_temp: float, target_temp: float) -> TravelDecisionEnum:
+    """Travelling is only worth it when the destination isn't warmer at 6 PM."""
+    if target_temp > current_temp:
+        return TravelDecisionEnum.NO
+    return TravelDecisionEnum.YES
+
+
+class TravelDecisionService:
+    """Decides many (origin, destination, date) trips with one fetch per location and date."""
+
+    async def fetch_temperatures(
+        self, pairs: Iterable[Tuple[int, str]]
+    ) -> Dict[Tuple[int, str], float]:
+        """
+        Loads the 6 PM temperature of every unique (district id, date) pair.
+
+        Districts sharing a date are batched into as few upstream requests as possible
+        and all batches run through one bounded-concurrency pipeline.
+
+        Parameters:
+        pairs (Iterable[Tuple[int, str]]): District ids and "YYYY-MM-DD" dates.
+
+        Returns:
+        Dict[Tuple[int, str], float]: The 6 PM temperature per pair.
+
+        Raises:
+        DistrictNotFoundException: If a district id doesn't exist.
+        """
+        registry = await aget_registry()
+
+        ids_by_date: Dict[str, Dict[int, None]] = {}
+        for district_id, travel_date in pairs:
+            if registry.get(district_id) is None:
+                raise DistrictNotFoundException(f"District {district_id} not found")
+            # A dict keeps the first-seen order while dropping duplicates
+            ids_by_date.setdefault(travel_date, {})[int(district_id)] = None
+
+        session = http_clients.get_async_client()
+        keys, jobs = [], []
+        for travel_date, ids in ids_by_date.items():
+            batch = BatchWeatherForecast(
+                [registry.get(district_id) for district_id in ids],
+                days=0,
+                start_date=travel_date,
+            )
+            keys.extend((district_id, travel_date) for district_id in ids)
+            jobs.extend(batch.temperature_jobs(session))
+
+        batch_series = await FetchPipeline().run(jobs)
+        series = [temperatures for batch in batch_series for temperatures in batch]
+        return {
+            key: temperatures[SIX_PM_DIGIT] for key, temperatures in zip(keys, series)
+        }
+
+    async def decide_many(self, trips: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Decides every trip.
+
+        Parameters:
+        trips (List[Dict[str, Any]]): Validated `TravelDecisionInSerializer` data.
+
+        Returns:
+        List[Dict[str, Any]]: The trips with their decision, in request order.
+        """
+        trips = [
+            {
+                "current_district_id": int(trip["current_district_id"]),
+                "dest_district_id": int(trip["dest_district_id"]),
+                "travel_date": str(trip["travel_date"]),
+            }
+            for trip in trips
+        ]
+
+        pairs = []
+        for trip in trips:
+            pairs.append((trip["current_district_id"], trip["travel_date"]))
+            pairs.append((trip["dest_district_id"], trip["travel_date"]))
+        temperatures = await self.fetch_temperatures(pairs)
+
+        return [
+            {
+                **trip,
+                "decision": decide(
+                    temperatures[(trip["current_district_id"], trip["travel_date"])],
+                    temperatures[(trip["dest_district_id"], trip["travel_date"])],
+                ),
+            }
+            for trip in trips
+        ]
+
+
+def can_visit_matrix(temperatures) -> np.ndarray:
+    """
+    Vectorised `decide` over every (origin, destination) pair.
+
+    Parameters:
+    temperatures (array-like): The 6 PM temperature of every district.
+
+    Returns:
+    numpy.ndarray: Boolean matrix, `[i, j]` is True when district j can be visited from i.
+    """
+    temps = np.asarray(temperatures, dtype=np.float64)
+    return temps[np.newaxis, :] <= temps[:, np.newaxis]
+
+
+def encode_rows(matrix: np.ndarray) -> List[str]:
+    """Encodes every row of a boolean matrix as a string of "1" and "0" characters."""
+    digits = np.where(matrix, ord("1"), ord("0")).astype(np.uint8)
+    return [row.tobytes().decode("ascii") for row in digits]
+
+
+class TravelMatrixService:
+    """Travel decisions between every pair of districts on one date."""
+
+    async def fetch_day_temperatures(
+        self, travel_date: str
+    ) -> Tuple[List[int], np.ndarray]:
+        """
+        Loads the 6 PM temperature of every district on `travel_date`.
+
+        Parameters:
+        travel_date (str): The date in "YYYY-MM-DD" format.
+
+        Returns:
+        Tuple[List[int], numpy.ndarray]: District ids and their temperatures, in registry order.
+        """
+        registry = await aget_registry()
+        matrix = await forecast_store.aget(
+            registry.districts, start_date=travel_date, days=0
+        )
+        temperatures = matrix.values_at_hour(SIX_PM_DIGIT, days=1)[:, 0]
+        return list(matrix.district_ids), temperatures.astype(np.float64)
+
+    async def matrix(
+        self, travel_date: str, current_district_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Computes the decision matrix, or only the row of `current_district_id`.
+
+        Parameters:
+        travel_date (str): The date in "YYYY-MM-DD" format.
+        current_district_id (int): Only return the row of this district.
+
+        Returns:
+        Dict[str, Any]: District ids, their temperatures and one encoded row per origin.
+
+        Raises:
+        DistrictNotFoundException: If `current_district_id` doesn't exist.
+        """
+        ids, temperatures = await self.fetch_day_temperatures(travel_date)
+        matrix = can_visit_matrix(temperatures)
+
+        origins = ids
+        if current_district_id is not None:
+            if current_district_id not in ids:
+                raise DistrictNotFoundException(
+                    f"District {current_district_id} not found"
+                )
+            origins = [current_district_id]
+            matrix = matrix[[ids.index(current_district_id)]]
+
+        return {
+            "travel_date": str(travel_date),
+            "district_ids": ids,
+            "temperatures": [round(float(temp), 2) for temp in temperatures],
+            "origins": origins,
+            "rows": encode_rows(matrix),
+        }
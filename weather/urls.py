@@ -6,9 +6,30 @@ urlpatterns = [
     path(
         "top-districts/", view=views.TopDistrictListView.as_view(), name="top-districts"
     ),
+    path(
+        "top-districts/stream/",
+        view=views.TopDistrictStreamView.as_view(),
+        name="top-districts-stream",
+    ),
     path(
         "travel-decision/",
         view=views.TravelDecisionView.as_view(),
         name="travel-decision",
     ),
+    path(
+        "travel-decision/bulk/",
+        view=views.TravelDecisionBulkView.as_view(),
+        name="travel-decision-bulk",
+    ),
+    path(
+        "travel-decision/matrix/",
+        view=views.TravelDecisionMatrixView.as_view(),
+        name="travel-decision-matrix",
+    ),
+    path("ready/", view=views.ReadinessView.as_view(), name="ready"),
+    path(
+        "nearest-district/",
+        view=views.NearestDistrictView.as_view(),
+        name="nearest-district",
+    ),
 ]
@@ -1,21 +1,82 @@
 import asyncio
-from bisect import bisect_left
+import logging
 from enum import StrEnum
+from typing import Optional
 
 import httpx
-from django.http import HttpRequest, JsonResponse
+from django.conf import settings
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.views import View
 from drf_spectacular.utils import extend_schema
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .broadcast import ranking_broadcaster
+from .cache import forecast_cache_timeout
+from .conditional import add_validators, make_etag, not_modified, validate_content
+from .exceptions import (
+    RemoteCallException,
+    UpstreamRejectedException,
+    UpstreamUnavailableException,
+)
+from .metrics import registry as metrics_registry
+from .monitoring import loop_lag_monitor
+from .profiling import stage
+from .ranking import TopDistrictRanking, ranking_refresher
+from .registry import get_registry
+from .renderers import (
+    JSON_CONTENT_TYPE,
+    FastJSONRenderer,
+    camelize,
+    dumps,
+    rendered_responses,
+)
+from .resilience import is_retryable
 from .serializers import (
-    TravelDecisionEnum,
+    NearestDistrictInSerializer,
+    NearestDistrictOutSerializer,
+    TopDistrictQuerySerializer,
+    TravelDecisionBulkInSerializer,
+    TravelDecisionBulkOutSerializer,
     TravelDecisionInSerializer,
+    TravelDecisionMatrixInSerializer,
+    TravelDecisionMatrixOutSerializer,
     TravelDecisionOutSerializer,
 )
-from .services import DistrictService, WeatherForecast
+from .services import TWO_HOUR_CACHE_TIME, DistrictService
+from .travel import TravelDecisionService, TravelMatrixService
+from .warmup import WarmUpStatus, warmup
+
+logger = logging.getLogger(__name__)
+
+
+def upstream_error(exc: Exception) -> Optional[RemoteCallException]:
+    """
+    Maps an upstream failure to the error reported to the client.
+
+    Parameters:
+    exc (Exception): The exception raised while calling upstream.
+
+    Returns:
+    Optional[RemoteCallException]: 503 when upstream is unreachable, too slow or
+        overloaded (5xx and 429) so the client may retry, 502 when it rejected or
+        garbled the request, None if `exc` isn't an upstream failure.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        if is_retryable(exc.response):
+            return UpstreamUnavailableException()
+        return UpstreamRejectedException()
+    if isinstance(exc, (httpx.TransportError, TimeoutError)):
+        return UpstreamUnavailableException()
+    if isinstance(exc, httpx.HTTPError):
+        return UpstreamRejectedException()
+    return None
 
 
 class TemperatureDataModeEnum(StrEnum):
@@ -30,89 +91,316 @@ class TopDistrictListView(View):
     permission_classes = []
     pagination_class = []
 
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Handles GET requests to fetch and return the coolest districts.
+
+        By default these are the 10 districts with the coolest average temperature at
+        2 PM over the next 7 days. The `hour`, `days`, `aggregate` (mean, median, min
+        or max) and `limit` query parameters select another ranking.
+
+        Parameters:
+        request (HttpRequest): The HTTP request object.
+
+        Returns:
+        HttpResponse: JSON response containing data of the coolest districts, or the
+            validation errors with a 400 status.
+        """
+        query = TopDistrictQuerySerializer(data=request.GET)
+        if not query.is_valid():
+            return JsonResponse(query.errors, status=400)
+        params = query.validated_data
+
+        ranking = TopDistrictRanking()
+
+        if settings.WEATHER_LOOP_MONITOR:
+            loop_lag_monitor.start()
+        if settings.WEATHER_RANKING_BACKGROUND_REFRESH:
+            # Keep the ranking warm so following requests are a single cache read
+            ranking_refresher.start(immediate=False)
+
+        limit = params["limit"]
+        precomputed = ranking.precomputed(
+            params["hour"], params["days"], params["aggregate"]
+        )
+        if precomputed:
+            # Repeat requests are answered from the stored version, before any work
+            stamp = ranking.get_version()
+            response = self._cached_response(request, stamp, limit)
+            if response is not None:
+                return add_validators(response, stamp, ranking.lifetime(), limit)
+
+        try:
+            results = await ranking.atop(**params)
+        except (RemoteCallException, httpx.HTTPError, TimeoutError) as exc:
+            # Not even a partial ranking could be computed
+            logger.exception("Failed to compute the top districts")
+            error = upstream_error(exc) or exc
+            if not isinstance(error, UpstreamRejectedException):
+                # Upstream is down or failing, ask the client to retry
+                error = UpstreamUnavailableException()
+            return JsonResponse({"detail": str(error.detail)}, status=error.status_code)
+
+        # Return JSON response with data of the coolest districts
+        with stage("render"):
+            # Keys are snake_case internally, the API speaks camelCase everywhere
+            body = dumps(camelize(results))
+        response = HttpResponse(body, content_type=JSON_CONTENT_TYPE)
+
+        if precomputed:
+            current = ranking.get_version()
+            # Only keep the body if the ranking wasn't replaced while it was read
+            if stamp is not None and current["version"] == stamp["version"]:
+                rendered_responses.set(
+                    make_etag(stamp["version"], limit), body, ranking.lifetime()
+                )
+            return add_validators(response, current, ranking.lifetime(), limit)
+        # Other variants change with the forecasts they are computed from
+        return validate_content(request, response, max_age=forecast_cache_timeout())
+
+    def _cached_response(self, request, stamp, limit) -> Optional[HttpResponse]:
+        response = not_modified(request, stamp, limit)
+        if response is None and stamp is not None:
+            body = rendered_responses.get(make_etag(stamp["version"], limit))
+            if body is not None:
+                response = HttpResponse(body, content_type=JSON_CONTENT_TYPE)
+        return response
+
+
+class TopDistrictStreamView(View):
+    """Server-sent events stream of the top 10 cool districts"""
+
+    async def get(self, request: HttpRequest) -> StreamingHttpResponse:
+        """
+        Streams the top districts as a `ranking` event, then again whenever they change.
+
+        A comment line is sent when nothing changed for a while, to keep proxies from
+        closing the connection. A reconnecting client sending `Last-Event-ID` only
+        gets the ranking again if it changed meanwhile.
+
+        Parameters:
+        request (HttpRequest): The HTTP request object.
+
+        Returns:
+        StreamingHttpResponse: The `text/event-stream` response.
+        """
+        # Fail with a plain error response while nothing has been streamed yet
+        await ranking_broadcaster.ensure_current()
+
+        last_event_id = request.headers.get("Last-Event-ID")
+        response = StreamingHttpResponse(
+            self._events(last_event_id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        # Nginx would otherwise buffer the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def _events(self, last_event_id):
+        async for event in ranking_broadcaster.subscribe(last_event_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            event_id, data = event
+            yield f"id: {event_id}\nevent: ranking\ndata: {data}\n\n"
+
+
+class ReadinessView(View):
+    """Readiness probe for load balancers, only ready once the worker is warm."""
+
     async def get(self, request: HttpRequest) -> JsonResponse:
         """
-        Handles GET requests to fetch and return the 10 coolest districts based on average temperature.
+        Reports the warm-up status, starting the warm-up if nothing has started it yet.
 
         Parameters:
         request (HttpRequest): The HTTP request object.
 
         Returns:
-        JsonResponse: JSON response containing data of the 10 coolest districts.
+        JsonResponse: The warm-up status, 200 when ready and 503 otherwise.
         """
-        ds = DistrictService()
+        if not settings.WEATHER_WARMUP:
+            return JsonResponse({"status": WarmUpStatus.DISABLED, "ready": True})
 
-        districts = await ds.aget()
+        # Servers without lifespan support start (or retry) the warm-up from here
+        warmup.start()
 
-        # Initialize an async HTTP client session
-        async with httpx.AsyncClient() as session:
-            results = []
-            chunk_size = 4
+        snapshot = warmup.snapshot()
+        return JsonResponse(snapshot, status=200 if snapshot["ready"] else 503)
 
-            # Process districts in chunks to avoid overwhelming the system with concurrent requests
-            for i in range(0, len(districts), chunk_size):
-                chunk = districts[i : i + chunk_size]
-                tasks = [
-                    WeatherForecast(district).fetch_and_process(session)
-                    for district in chunk
-                ]
 
-                # Gather and await results for each chunk of districts
-                chunk_results = await asyncio.gather(*tasks)
-                results.extend(chunk_results)
+class MetricsView(View):
+    """Prometheus scrape endpoint."""
 
-            results.sort(key=lambda x: x["average_temperature"])
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
 
-            # Return JSON response with data of the 10 coolest districts
-            return JsonResponse(results[:10], safe=False)
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Renders every weather metric in the Prometheus text exposition format.
+
+        Parameters:
+        request (HttpRequest): The HTTP request object.
+
+        Returns:
+        HttpResponse: The current metric values.
+        """
+        return HttpResponse(metrics_registry.render(), content_type=self.content_type)
 
 
-class TravelDecisionView(APIView):
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers may be coroutines.
+
+    Django REST framework only dispatches synchronously, so this runs the same
+    request initialisation, exception handling and response finalisation around
+    an awaited handler.
+    """
+
+    view_is_async = True
+    renderer_classes = [FastJSONRenderer]
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def handle_exception(self, exc):
+        # An open circuit breaker is already an UpstreamUnavailableException
+        return super().handle_exception(upstream_error(exc) or exc)
+
+
+class TravelDecisionView(AsyncAPIView):
     authentication_classes = []
     permission_classes = []
     pagination_class = None
 
-    def _find_district_by_id(self, districts, target_id):
-        keys = [int(district["id"]) for district in districts]
-        target_id = int(target_id)
-        idx = bisect_left(keys, target_id)
-        if idx < len(keys) and int(keys[idx]) == target_id:
-            return districts[idx]
-        return None
-
     @extend_schema(
         parameters=[TravelDecisionInSerializer],
         responses={200: TravelDecisionOutSerializer},
     )
-    def post(self, request: Request) -> Response:
-        try:
-            in_serialized = TravelDecisionInSerializer(data=request.data)
+    async def post(self, request: Request) -> Response:
+        in_serialized = TravelDecisionInSerializer(data=request.data)
+
+        in_serialized.is_valid(raise_exception=True)
+
+        # Both locations in one upstream request, scoped to the travel date only
+        (result,) = await TravelDecisionService().decide_many([in_serialized.data])
+        travel_date, decision = result["travel_date"], result["decision"]
+
+        return Response({"travel_date": travel_date, "decision": decision})
+
 
-            in_serialized.is_valid(raise_exception=True)
+class TravelDecisionBulkView(AsyncAPIView):
+    authentication_classes = []
+    permission_classes = []
+    pagination_class = None
 
-            ds = DistrictService()
-            districts = ds.get()
+    @extend_schema(
+        request=TravelDecisionBulkInSerializer,
+        responses={200: TravelDecisionBulkOutSerializer},
+    )
+    async def post(self, request: Request) -> Response:
+        """
+        Decides many trips at once, fetching each (district, date) forecast only once.
 
-            current_loc_id = in_serialized.data.get("current_district_id")
-            target_loc_id = in_serialized.data.get("dest_district_id")
-            travel_date = in_serialized.data.get("travel_date")
+        Parameters:
+        request (Request): Body of the form {"items": [TravelDecisionInSerializer, ...]}.
 
-            current = self._find_district_by_id(districts, current_loc_id)
-            target = self._find_district_by_id(districts, target_loc_id)
+        Returns:
+        Response: The decision of every trip, in request order.
+        """
+        in_serialized = TravelDecisionBulkInSerializer(data=request.data)
 
-            with httpx.Client() as session:
-                current_loc_temp = WeatherForecast(
-                    current, days=0, mode="json"
-                ).fetch_temperature_for_day(travel_date, session)
-                target_loc_temp = WeatherForecast(
-                    target, days=0, mode="json"
-                ).fetch_temperature_for_day(travel_date, session)
+        in_serialized.is_valid(raise_exception=True)
 
-                if target_loc_temp > current_loc_temp:
-                    decision = TravelDecisionEnum.NO
-                else:
-                    decision = TravelDecisionEnum.YES
+        results = await TravelDecisionService().decide_many(in_serialized.data["items"])
 
-                return Response({"travel_date": travel_date, "decision": decision})
-        except Exception as exc:
-            return Response({"error": str(exc)}, status=500)
+        out_serialized = TravelDecisionBulkOutSerializer({"results": results})
+        return Response(out_serialized.data)
+
+
+class TravelDecisionMatrixView(AsyncAPIView):
+    authentication_classes = []
+    permission_classes = []
+    pagination_class = None
+
+    @extend_schema(
+        parameters=[TravelDecisionMatrixInSerializer],
+        responses={200: TravelDecisionMatrixOutSerializer},
+    )
+    async def get(self, request: Request) -> Response:
+        """
+        Returns the travel decision between every pair of districts on one date.
+
+        All districts are loaded in one pass and compared at once; pass
+        `current_district_id` to only get the row of that district.
+
+        Parameters:
+        request (Request): Query params `travel_date` and optional `current_district_id`.
+
+        Returns:
+        Response: District ids, their 6 PM temperatures and the encoded decision rows.
+        """
+        in_serialized = TravelDecisionMatrixInSerializer(data=request.query_params)
+
+        in_serialized.is_valid(raise_exception=True)
+
+        result = await TravelMatrixService().matrix(
+            in_serialized.validated_data["travel_date"],
+            in_serialized.validated_data.get("current_district_id"),
+        )
+
+        out_serialized = TravelDecisionMatrixOutSerializer(result)
+        return Response(out_serialized.data)
+
+
+class NearestDistrictView(APIView):
+    renderer_classes = [FastJSONRenderer]
+    authentication_classes = []
+    permission_classes = []
+    pagination_class = None
+
+    @extend_schema(
+        parameters=[NearestDistrictInSerializer],
+        responses={200: NearestDistrictOutSerializer},
+    )
+    def get(self, request: Request) -> Response:
+        in_serialized = NearestDistrictInSerializer(data=request.query_params)
+
+        in_serialized.is_valid(raise_exception=True)
+        lat = in_serialized.validated_data["lat"]
+        long = in_serialized.validated_data["long"]
+
+        stamp = DistrictService().get_version()
+        response = not_modified(request, stamp, lat, long)
+        if response is None:
+            district, distance_km = get_registry().nearest(lat, long)
+
+            out_serialized = NearestDistrictOutSerializer(
+                {"district": district, "distance_km": round(distance_km, 2)}
+            )
+            response = Response(out_serialized.data)
+            # The registry has just loaded the district list if it wasn't cached
+            stamp = DistrictService().get_version()
+        return add_validators(response, stamp, TWO_HOUR_CACHE_TIME, lat, long)
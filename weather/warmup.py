@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import time
+from enum import StrEnum
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+from weather.archive import awarm_cache
+from weather.ranking import TopDistrictRanking
+from weather.registry import aget_registry
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TIMEOUT = 60
+
+
+class WarmUpStatus(StrEnum):
+    DISABLED = "disabled"
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class WarmUp:
+    """
+    Loads the district list and the ranking forecasts before a worker takes traffic.
+
+    Runs as a task on the server's event loop, started by the ASGI lifespan startup
+    or, for servers without lifespan support, by the first readiness probe. A failed
+    warm-up is retried by the next readiness probe.
+    """
+
+    def __init__(self, ranking: TopDistrictRanking = None, timeout: float = None):
+        self.ranking = ranking or TopDistrictRanking()
+        self.timeout = timeout
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.status = WarmUpStatus.PENDING
+        self.error: Optional[str] = None
+        self.districts = 0
+        self.ranked = 0
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+
+    def _get_timeout(self) -> float:
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(settings, "WEATHER_WARMUP_TIMEOUT", WARMUP_TIMEOUT)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == WarmUpStatus.READY
+
+    def start(self) -> Optional[asyncio.Task]:
+        """
+        Starts the warm-up on the running event loop unless it is running or done.
+
+        Returns:
+        Optional[asyncio.Task]: The warm-up task, None once the worker is warm.
+        """
+        if self.ready:
+            return None
+        loop = asyncio.get_running_loop()
+        if not self.running or self._task.get_loop() is not loop:
+            self.status = WarmUpStatus.RUNNING
+            self._task = loop.create_task(self._run(), name="weather-warmup")
+        return self._task
+
+    async def wait(self) -> None:
+        """Waits for a started warm-up to finish."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        """Cancels a running warm-up."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        self.error = None
+        self.started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._load(), timeout=self._get_timeout())
+        except Exception as exc:
+            self.status = WarmUpStatus.FAILED
+            self.error = str(exc) or exc.__class__.__name__
+            logger.exception("Weather warm-up failed")
+        else:
+            self.status = WarmUpStatus.READY
+        finally:
+            self.duration = round(time.perf_counter() - started, 3)
+
+    async def _load(self) -> None:
+        # Archived data first, so whatever upstream can't provide is still served
+        await awarm_cache()
+        registry = await aget_registry()
+        self.districts = len(registry)
+        ranking = await self.ranking.refresh()
+        self.ranked = len(ranking)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Reports the warm-up progress.
+
+        Returns:
+        Dict[str, Any]: The status, whether the worker is ready and what was loaded.
+        """
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "error": self.error,
+            "districts": self.districts,
+            "ranked_districts": self.ranked,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration,
+        }
+
+
+warmup = WarmUp()